@@ -0,0 +1,9 @@
+"""
+Benchmarks reproductibles des endpoints (dashboard, historique, comparaison, ingestion)
+et simulateur de charge d'une flotte de capteurs
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --years 5 --interval 1
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.run --requests 200 --concurrency 10
+    python -m benchmarks.compare benchmarks/results/avant.json benchmarks/results/apres.json
+    python -m benchmarks.loadgen --url http://localhost:8000 --sensors 200 --dashboards 20
+"""
@@ -0,0 +1,83 @@
+"""
+Compare deux résultats de benchmarks.run (référence puis candidat)
+
+    python -m benchmarks.compare benchmarks/results/avant.json benchmarks/results/apres.json [--threshold 10]
+
+Affiche l'écart en % par scénario (p50, p95, p99, débit, pic mémoire) et signale les régressions
+au-delà de --threshold % ; code de sortie 1 s'il y en a (utilisable en CI)
+"""
+import json
+import sys
+from typing import Dict, List, Optional
+
+# (libellé, chemin dans le résultat, True si une valeur plus haute est meilleure)
+COMPARED_FIELDS = (
+    ("p50 ms", ("latency_ms", "p50"), False),
+    ("p95 ms", ("latency_ms", "p95"), False),
+    ("p99 ms", ("latency_ms", "p99"), False),
+    ("req/s", ("throughput_rps",), True),
+    ("mémoire", ("peak_memory_bytes",), False),
+)
+
+
+def _value(result: Dict, path) -> Optional[float]:
+    for key in path:
+        if not isinstance(result, dict) or result.get(key) is None:
+            return None
+        result = result[key]
+    return result
+
+
+def compare_reports(baseline: Dict, candidate: Dict, threshold: float = 10.0) -> List[Dict]:
+    """Écarts par scénario commun aux deux rapports ; regression=True au-delà du seuil"""
+    rows = []
+    for name, base in baseline["scenarios"].items():
+        current = candidate["scenarios"].get(name)
+        if current is None:
+            continue
+        for label, path, higher_is_better in COMPARED_FIELDS:
+            before, after = _value(base, path), _value(current, path)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            worse = -change if higher_is_better else change
+            rows.append({
+                "scenario": name,
+                "metric": label,
+                "baseline": before,
+                "candidate": after,
+                "change_percent": round(change, 1),
+                "regression": worse > threshold
+            })
+    return rows
+
+
+def main(argv: List[str]) -> int:
+    args = list(argv[1:])
+    threshold = 10.0
+    if "--threshold" in args:
+        index = args.index("--threshold")
+        threshold = float(args[index + 1])
+        del args[index:index + 2]
+    if len(args) != 2:
+        print(__doc__)
+        return 2
+
+    with open(args[0], encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args[1], encoding="utf-8") as f:
+        candidate = json.load(f)
+    for label, report in (("Référence", baseline), ("Candidat", candidate)):
+        print(f"{label:10} {report.get('git_commit')} du {report.get('started_at')} "
+              f"({report['dataset']['readings']} mesures, {report['dataset']['dialect']})")
+
+    rows = compare_reports(baseline, candidate, threshold)
+    for row in rows:
+        flag = "⚠️" if row["regression"] else "  "
+        print(f"{flag} {row['scenario']:18} {row['metric']:8} {row['baseline']:>12} → "
+              f"{row['candidate']:>12}  ({row['change_percent']:+.1f} %)")
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
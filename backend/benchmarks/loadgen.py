@@ -0,0 +1,386 @@
+"""
+Simulateur de flotte IoT / générateur de charge contre un serveur lancé (uvicorn)
+Tous les acteurs tournent en asyncio dans un seul processus, chacun avec sa connexion keep-alive :
+- N capteurs postent une mesure toutes les --sensor-interval s (± --jitter), avec des rafales
+  de --burst-size mesures toutes les --burst-every s (reconnexion d'une passerelle qui vide son tampon)
+- M dashboards interrogent /temperature/dashboard (revalidation ETag comme le navigateur : 304 = succès)
+- des utilisateurs parcourent l'historique (jour / mois / année au hasard sur --history-years ans)
+- un job ML poste l'horizon de prédictions 24h toutes les --ml-interval s
+Sortie : débit, taux d'erreur et percentiles de latence par endpoint, toutes les --report-interval s
+et sur toute la durée ; --output écrit le tout en JSON
+
+Utilisation (depuis le dossier backend, serveur déjà lancé) :
+    python -m benchmarks.loadgen --url http://localhost:8000 --duration 120 --sensors 200 --dashboards 20
+        [--sensor-interval 10] [--jitter 0.2] [--burst-every 300] [--burst-size 10] [--ingest data|queue]
+        [--dashboard-interval 5] [--history-users 3] [--history-interval 15] [--history-years 5]
+        [--ml-interval 60] [--report-interval 10] [--timeout 10] [--seed 42] [--output charge.json]
+"""
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from benchmarks.run import PERCENTILES, percentile
+
+DEFAULTS = {
+    "url": "http://localhost:8000",
+    "duration": 60.0,
+    "sensors": 100,
+    "sensor-interval": 10.0,
+    "jitter": 0.2,
+    "burst-every": 300.0,
+    "burst-size": 10,
+    "ingest": "data",
+    "dashboards": 10,
+    "dashboard-interval": 5.0,
+    "history-users": 3,
+    "history-interval": 15.0,
+    "history-years": 5,
+    "ml-interval": 60.0,
+    "report-interval": 10.0,
+    "timeout": 10.0,
+    "seed": 42,
+    "output": None,
+}
+
+
+# ==================== CLIENT HTTP/1.1 ====================
+
+class HttpConnection:
+    """
+    Connexion HTTP/1.1 keep-alive minimale (asyncio streams, sans dépendance)
+    Une connexion par acteur, comme un capteur ou un navigateur ; rouverte après une erreur
+    """
+
+    def __init__(self, url: str, timeout: float):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = parts.scheme == "https"
+        self.timeout = timeout
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (OSError, ConnectionError):
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body=None, headers: Optional[Dict[str, str]] = None
+                      ) -> Tuple[int, Dict[str, str], bytes]:
+        try:
+            return await asyncio.wait_for(self._request(method, path, body, headers or {}), self.timeout)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def _request(self, method, path, body, headers):
+        reused = self.writer is not None
+        try:
+            return await self._exchange(method, path, body, headers)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            if not reused:
+                raise
+            # Connexion keep-alive fermée par le serveur pendant l'inactivité : une seule nouvelle tentative
+            await self.close()
+            return await self._exchange(method, path, body, headers)
+
+    async def _exchange(self, method, path, body, headers):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+        payload = json.dumps(body).encode() if body is not None else b""
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive",
+                 f"Content-Length: {len(payload)}"]
+        if body is not None:
+            lines.append("Content-Type: application/json")
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connexion fermée par le serveur")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = (await self.reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if "content-length" in response_headers:
+            content = await self.reader.readexactly(int(response_headers["content-length"]))
+        elif response_headers.get("transfer-encoding", "").lower() == "chunked":
+            content = b""
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                content += (await self.reader.readexactly(size + 2))[:size]  # données + CRLF
+                if size == 0:
+                    break
+        else:
+            content = await self.reader.read()
+            await self.close()
+
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, response_headers, content
+
+
+# ==================== STATISTIQUES ====================
+
+class LoadStats:
+    """Latences et statuts par endpoint, par fenêtre de --report-interval et sur toute la durée"""
+
+    def __init__(self):
+        self.window: Dict[str, Dict] = {}
+        self.totals: Dict[str, Dict] = {}
+        self.window_started = time.monotonic()
+        self.started = self.window_started
+
+    @staticmethod
+    def _entry(store: Dict[str, Dict], label: str) -> Dict:
+        entry = store.get(label)
+        if entry is None:
+            entry = store[label] = {"latencies": [], "errors": 0, "statuses": {}}
+        return entry
+
+    def record(self, label: str, status: Optional[int], latency: float):
+        """status None = exception (délai dépassé, connexion refusée...)"""
+        key = str(status) if status is not None else "exception"
+        failed = status is None or status >= 400
+        for store in (self.window, self.totals):
+            entry = self._entry(store, label)
+            entry["latencies"].append(latency)
+            entry["statuses"][key] = entry["statuses"].get(key, 0) + 1
+            if failed:
+                entry["errors"] += 1
+
+    @staticmethod
+    def summarize(store: Dict[str, Dict], seconds: float) -> Dict[str, Dict]:
+        summary = {}
+        for label, entry in sorted(store.items()):
+            ms = sorted(value * 1000 for value in entry["latencies"])
+            total = len(ms)
+            summary[label] = {
+                "requests": total,
+                "throughput_rps": round(total / seconds, 2) if seconds else None,
+                "error_rate": round(entry["errors"] / total, 4) if total else 0.0,
+                "statuses": dict(entry["statuses"]),
+                "latency_ms": {f"p{p}": round(percentile(ms, p), 2) for p in PERCENTILES},
+            }
+        return summary
+
+    def flush_window(self) -> Dict:
+        now = time.monotonic()
+        seconds = now - self.window_started
+        window = {
+            "elapsed_seconds": round(now - self.started, 1),
+            "endpoints": self.summarize(self.window, seconds)
+        }
+        self.window = {}
+        self.window_started = now
+        return window
+
+    def total_summary(self) -> Dict[str, Dict]:
+        return self.summarize(self.totals, time.monotonic() - self.started)
+
+
+def print_summary(title: str, endpoints: Dict[str, Dict]):
+    print(f"📈 {title}")
+    for label, item in endpoints.items():
+        latency = item["latency_ms"]
+        print(f"   {label:34} {item['throughput_rps']:>8} req/s  erreurs {item['error_rate'] * 100:5.1f} %  "
+              f"p50 {latency['p50']:>8} ms  p95 {latency['p95']:>8} ms  p99 {latency['p99']:>8} ms")
+
+
+# ==================== ACTEURS ====================
+
+class FleetSimulator:
+    def __init__(self, options: Dict):
+        self.options = options
+        self.stats = LoadStats()
+        self.rng = random.Random(options["seed"])
+        self.deadline = 0.0
+
+    def _running(self) -> bool:
+        return time.monotonic() < self.deadline
+
+    async def _sleep(self, seconds: float):
+        await asyncio.sleep(max(0.0, min(seconds, self.deadline - time.monotonic())))
+
+    def _jittered(self, interval: float) -> float:
+        jitter = self.options["jitter"]
+        return interval * self.rng.uniform(1 - jitter, 1 + jitter)
+
+    async def _call(self, conn: HttpConnection, label: str, method: str, path: str,
+                    body=None, headers=None) -> Tuple[Optional[int], Dict[str, str]]:
+        started = time.perf_counter()
+        try:
+            status, response_headers, _ = await conn.request(method, path, body, headers)
+        except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+            self.stats.record(label, None, time.perf_counter() - started)
+            return None, {}
+        self.stats.record(label, status, time.perf_counter() - started)
+        return status, response_headers
+
+    @staticmethod
+    def _reading(sensor: int, moment: datetime, rng: random.Random) -> Dict:
+        return {
+            "timestamp": moment.isoformat(),
+            "year": moment.year,
+            "month": moment.month,
+            "day": moment.day,
+            "hour": moment.hour,
+            "indoor_temp": round(20 + sensor % 5 * 0.3 + rng.gauss(0, 0.5), 2),
+            "heater_level": rng.randint(0, 60),
+            "fan_level": rng.randint(0, 30)
+        }
+
+    async def sensor(self, index: int):
+        conn = HttpConnection(self.options["url"], self.options["timeout"])
+        path = "/temperature/data/queue" if self.options["ingest"] == "queue" else "/temperature/data"
+        label = f"POST {path}"
+        interval = self.options["sensor-interval"]
+        burst_every = self.options["burst-every"]
+        # Démarrages et rafales étalés : les capteurs ne sont pas synchronisés
+        next_burst = time.monotonic() + self.rng.uniform(0, burst_every) if burst_every else None
+        await self._sleep(self.rng.uniform(0, interval))
+        try:
+            while self._running():
+                count = 1
+                if next_burst is not None and time.monotonic() >= next_burst:
+                    count = self.options["burst-size"]
+                    next_burst += burst_every
+                for _ in range(count):
+                    await self._call(conn, label, "POST", path, self._reading(index, datetime.now(), self.rng))
+                await self._sleep(self._jittered(interval))
+        finally:
+            await conn.close()
+
+    async def dashboard(self):
+        conn = HttpConnection(self.options["url"], self.options["timeout"])
+        interval = self.options["dashboard-interval"]
+        etag = None
+        await self._sleep(self.rng.uniform(0, interval))
+        try:
+            while self._running():
+                headers = {"If-None-Match": etag} if etag else None
+                status, response_headers = await self._call(
+                    conn, "GET /temperature/dashboard", "GET", "/temperature/dashboard", headers=headers
+                )
+                if status == 200:
+                    etag = response_headers.get("etag")
+                await self._sleep(self._jittered(interval))
+        finally:
+            await conn.close()
+
+    async def history_user(self):
+        conn = HttpConnection(self.options["url"], self.options["timeout"])
+        interval = self.options["history-interval"]
+        now = datetime.now()
+        await self._sleep(self.rng.uniform(0, interval))
+        try:
+            while self._running():
+                day = now - timedelta(days=self.rng.randint(1, 365 * self.options["history-years"]))
+                choice = self.rng.random()
+                if choice < 0.6:
+                    label, query = "day", f"year={day.year}&month={day.month}&day={day.day}"
+                elif choice < 0.9:
+                    label, query = "month", f"year={day.year}&month={day.month}"
+                else:
+                    label, query = "year", f"year={day.year}"
+                await self._call(conn, f"GET /history/all ({label})", "GET", f"/history/all?{query}")
+                await self._sleep(self._jittered(interval))
+        finally:
+            await conn.close()
+
+    async def ml_job(self):
+        conn = HttpConnection(self.options["url"], self.options["timeout"])
+        try:
+            while self._running():
+                start = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+                items = []
+                for offset in range(24):
+                    moment = start + timedelta(hours=offset)
+                    items.append({
+                        "year": moment.year, "month": moment.month, "day": moment.day, "hour": moment.hour,
+                        "predicted_temp": round(21 + self.rng.gauss(0, 0.8), 2),
+                        "outdoor_temp": round(10 + self.rng.gauss(0, 3), 2),
+                        "comfort_temp": 21.0
+                    })
+                await self._call(conn, "POST /temperature/prediction/bulk", "POST",
+                                 "/temperature/prediction/bulk", {"items": items})
+                await self._sleep(self.options["ml-interval"])
+        finally:
+            await conn.close()
+
+    async def reporter(self, windows: List[Dict]):
+        while self._running():
+            await self._sleep(self.options["report-interval"])
+            window = self.stats.flush_window()
+            windows.append(window)
+            print_summary(f"t = {window['elapsed_seconds']} s", window["endpoints"])
+
+    async def run(self) -> Dict:
+        options = self.options
+        self.deadline = time.monotonic() + options["duration"]
+        print(f"🚦 {options['sensors']} capteurs, {options['dashboards']} dashboards, "
+              f"{options['history-users']} utilisateurs historique, job ML → {options['url']} "
+              f"pendant {options['duration']} s")
+
+        windows: List[Dict] = []
+        actors = [self.sensor(index) for index in range(options["sensors"])]
+        actors += [self.dashboard() for _ in range(options["dashboards"])]
+        actors += [self.history_user() for _ in range(options["history-users"])]
+        if options["ml-interval"]:
+            actors.append(self.ml_job())
+        await asyncio.gather(self.reporter(windows), *actors)
+
+        totals = self.stats.total_summary()
+        print_summary("Total", totals)
+        return {
+            "started_at": datetime.now().isoformat(),
+            "options": options,
+            "windows": windows,
+            "totals": totals
+        }
+
+
+def parse_options(argv: List[str]) -> Dict:
+    options = dict(DEFAULTS)
+    for flag, value in zip(argv[1::2], argv[2::2]):
+        name = flag.lstrip("-")
+        if name not in DEFAULTS:
+            raise ValueError(f"Option inconnue : {flag}")
+        default = DEFAULTS[name]
+        options[name] = type(default)(value) if default is not None else value
+    return options
+
+
+def main(argv: List[str]) -> int:
+    try:
+        options = parse_options(argv)
+    except ValueError as e:
+        print(f"❌ {e}")
+        print(__doc__)
+        return 1
+
+    report = asyncio.run(FleetSimulator(options).run())
+    if options["output"]:
+        with open(options["output"], "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Résultats écrits dans {options['output']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
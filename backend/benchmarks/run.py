@@ -0,0 +1,321 @@
+"""
+Mesure des endpoints sur la base de benchmark (voir benchmarks.seed)
+- l'application est appelée en ASGI dans le processus (lifespan compris, sans réseau)
+- par scénario : latences (p50 / p90 / p95 / p99), débit, erreurs et pic mémoire (tracemalloc)
+- résultats écrits en JSON pour comparer deux exécutions (benchmarks.compare)
+
+Utilisation (depuis le dossier backend, base choisie par DATABASE_URL) :
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.run [--requests 200] [--concurrency 10]
+        [--warmup 5] [--memory-samples 5] [--scenarios dashboard,history_day] [--output fichier.json]
+"""
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Callable, Dict, List, Optional, Tuple
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+PERCENTILES = (50, 90, 95, 99)
+BATCH_SIZE = 100
+
+
+# ==================== APPEL ASGI ====================
+
+async def asgi_request(app, method: str, path: str, query: str = "", body: Optional[dict] = None) -> Tuple[int, int]:
+    """Exécute une requête HTTP sur l'application ASGI, retourne (statut, taille du corps)"""
+    payload = json.dumps(body, default=str).encode() if body is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"benchmark"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    request_sent = False
+    response = {"status": 0, "size": 0}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        # Pas de déconnexion du client : attente jusqu'à la fin de la réponse
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["size"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return response["status"], response["size"]
+
+
+# ==================== SCÉNARIOS ====================
+
+def _dataset_info() -> Dict:
+    """Volume et période du jeu de données (les scénarios visent des périodes existantes)"""
+    from sqlalchemy import func
+    from sqlalchemy.engine import make_url
+    from database.database import DATABASE_URL, SessionLocal
+    from models.temperature import IndoorTemperatureData, TemperaturePrediction
+
+    db = SessionLocal()
+    try:
+        readings, first, last = db.query(
+            func.count(IndoorTemperatureData.id),
+            func.min(IndoorTemperatureData.timestamp),
+            func.max(IndoorTemperatureData.timestamp)
+        ).one()
+        predictions = db.query(func.count(TemperaturePrediction.id)).scalar()
+    finally:
+        db.close()
+    return {
+        "dialect": make_url(DATABASE_URL).get_backend_name(),
+        "readings": readings,
+        "predictions": predictions,
+        "first": first.isoformat() if first else None,
+        "last": last.isoformat() if last else None,
+    }
+
+
+def _reading(moment: datetime) -> Dict:
+    return {
+        "timestamp": moment.isoformat(),
+        "year": moment.year,
+        "month": moment.month,
+        "day": moment.day,
+        "hour": moment.hour,
+        "indoor_temp": 21.0,
+        "heater_level": 10,
+        "fan_level": 0
+    }
+
+
+def build_scenarios(app, last: datetime) -> Dict[str, Dict]:
+    """
+    Scénarios : nom -> {"call": coroutine sans argument -> (statut, taille), "rows": lignes écrites}
+    Les périodes de l'historique sont prises avant la dernière mesure (jour, mois et année complets)
+    Les écritures d'ingestion sont datées après le jeu de données (une minute de plus à chaque mesure)
+    """
+    day = last - timedelta(days=1)
+    month = last.replace(day=1) - timedelta(days=1)
+    year = last.year - 1
+    minutes = count(1)
+
+    def get(path: str, query: str = "") -> Callable:
+        return lambda: asgi_request(app, "GET", path, query)
+
+    def ingestion_single():
+        return asgi_request(
+            app, "POST", "/temperature/data",
+            body=_reading(last + timedelta(minutes=next(minutes)))
+        )
+
+    def ingestion_batch():
+        items = [_reading(last + timedelta(minutes=next(minutes))) for _ in range(BATCH_SIZE)]
+        return asgi_request(app, "POST", "/temperature/data/batch", body={"items": items})
+
+    return {
+        "dashboard": {"call": get("/temperature/dashboard")},
+        "history_day": {"call": get("/history/all", f"year={day.year}&month={day.month}&day={day.day}")},
+        "history_month": {"call": get("/history/all", f"year={month.year}&month={month.month}")},
+        "history_year": {"call": get("/history/all", f"year={year}")},
+        "comparison_month": {"call": get("/history/comparison", f"year={month.year}&month={month.month}")},
+        "ingestion_single": {"call": ingestion_single, "rows": 1},
+        "ingestion_batch": {"call": ingestion_batch, "rows": BATCH_SIZE},
+    }
+
+
+# ==================== MESURES ====================
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Percentile par rang le plus proche (valeurs triées)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), round(p / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+async def run_scenario(
+    call: Callable,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    memory_samples: int,
+    rows: int = 0
+) -> Dict:
+    """Chauffe, mesure des latences sous `concurrency` requêtes simultanées, puis pic mémoire"""
+    for _ in range(warmup):
+        try:
+            await call()
+        except Exception:
+            pass
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    sizes: List[int] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                status, size = await call()
+            except Exception:
+                # ServerErrorMiddleware relance l'exception après avoir répondu 500
+                status, size = 500, 0
+            latencies.append(time.perf_counter() - started)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            sizes.append(size)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - started
+
+    # Pic mémoire mesuré à part : tracemalloc ralentit fortement l'exécution
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(memory_samples):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            try:
+                await call()
+            except Exception:
+                pass
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    result = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(n for status, n in statuses.items() if not status.startswith("2")),
+        "statuses": statuses,
+        "wall_seconds": round(wall, 4),
+        "throughput_rps": round(requests / wall, 2) if wall else None,
+        "latency_ms": {
+            "min": round(ms[0], 3),
+            "mean": round(sum(ms) / len(ms), 3),
+            **{f"p{p}": round(percentile(ms, p), 3) for p in PERCENTILES},
+            "max": round(ms[-1], 3),
+        },
+        "response_bytes_mean": round(sum(sizes) / len(sizes)),
+        "peak_memory_bytes": max(peaks) if peaks else None,
+    }
+    if rows:
+        result["rows_per_second"] = round(requests * rows / wall, 1) if wall else None
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(__file__)
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _max_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+async def run_benchmarks(
+    requests: int = 200,
+    concurrency: int = 10,
+    warmup: int = 5,
+    memory_samples: int = 5,
+    only: Optional[List[str]] = None
+) -> Dict:
+    """Exécute les scénarios (ingestion en dernier : elle modifie la base) et retourne le rapport"""
+    from main import app
+
+    dataset = _dataset_info()
+    if not dataset["readings"]:
+        raise RuntimeError("Base de benchmark vide : lancez d'abord python -m benchmarks.seed")
+
+    report = {
+        "started_at": datetime.now().isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "memory_samples": memory_samples
+        },
+        "dataset": dataset,
+        "scenarios": {},
+    }
+
+    async with app.router.lifespan_context(app):
+        scenarios = build_scenarios(app, datetime.fromisoformat(dataset["last"]))
+        for name, scenario in scenarios.items():
+            if only and name not in only:
+                continue
+            print(f"⏱️  {name} ...")
+            result = await run_scenario(
+                scenario["call"], requests, concurrency, warmup, memory_samples, scenario.get("rows", 0)
+            )
+            report["scenarios"][name] = result
+            latency = result["latency_ms"]
+            print(f"   p50 {latency['p50']} ms | p95 {latency['p95']} ms | p99 {latency['p99']} ms | "
+                  f"{result['throughput_rps']} req/s | erreurs {result['errors']}")
+
+    report["max_rss_bytes"] = _max_rss_bytes()
+    return report
+
+
+def main(argv: List[str]) -> int:
+    options = dict(zip(argv[1::2], argv[2::2]))
+    only = options["--scenarios"].split(",") if "--scenarios" in options else None
+
+    report = asyncio.run(run_benchmarks(
+        requests=int(options.get("--requests", 200)),
+        concurrency=int(options.get("--concurrency", 10)),
+        warmup=int(options.get("--warmup", 5)),
+        memory_samples=int(options.get("--memory-samples", 5)),
+        only=only
+    ))
+
+    output = options.get("--output")
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['git_commit'] or 'local'}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Résultats écrits dans {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,182 @@
+"""
+Remplit une base de benchmark avec un jeu de données réaliste sur plusieurs années
+- mesures intérieures toutes les `--interval` minutes (saison + cycle jour/nuit + bruit)
+- prédictions horaires jusqu'à 24h après la dernière mesure
+- changements de mode AUTO / MANUEL tous les quelques jours
+- agrégats horaires / journaliers reconstruits à la fin (backfill)
+Le générateur est initialisé avec `--seed` : deux exécutions produisent les mêmes données
+
+Utilisation (depuis le dossier backend, base choisie par DATABASE_URL) :
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed [--years 5] [--interval 1]
+        [--seed 42] [--end 2026-01-01] [--append]
+"""
+import math
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+INSERT_CHUNK_SIZE = 10000
+COMFORT_TEMP = 21.0
+
+
+def _outdoor_temp(moment: datetime) -> float:
+    """Température extérieure modélisée : saison (min fin janvier) + cycle jour/nuit (max 15h)"""
+    season = -math.cos(2 * math.pi * (moment.timetuple().tm_yday - 25) / 365.25)
+    daily = -math.cos(2 * math.pi * (moment.hour + moment.minute / 60 - 3) / 24)
+    return 12 + 10 * season + 5 * daily
+
+
+def _indoor_temp(moment: datetime) -> float:
+    """Température intérieure sans bruit : proche du confort, suit un peu l'extérieur"""
+    return COMFORT_TEMP + 0.15 * (_outdoor_temp(moment) - 12)
+
+
+def _levels(indoor: float) -> Dict[str, int]:
+    heater = max(0, min(100, int((COMFORT_TEMP - indoor) * 40)))
+    fan = max(0, min(100, int((indoor - COMFORT_TEMP) * 40)))
+    return {"heater_level": heater, "fan_level": fan}
+
+
+def _readings(start: datetime, end: datetime, interval: timedelta, rng: random.Random) -> Iterator[Dict]:
+    moment = start
+    while moment < end:
+        indoor = round(_indoor_temp(moment) + rng.gauss(0, 0.4), 2)
+        yield {
+            "timestamp": moment,
+            "year": moment.year,
+            "month": moment.month,
+            "day": moment.day,
+            "hour": moment.hour,
+            "indoor_temp": indoor,
+            **_levels(indoor)
+        }
+        moment += interval
+
+
+def _predictions(start: datetime, end: datetime, rng: random.Random) -> Iterator[Dict]:
+    moment = start
+    while moment < end:
+        predicted = round(_indoor_temp(moment) + rng.gauss(0, 0.6), 2)
+        levels = _levels(predicted)
+        yield {
+            "year": moment.year,
+            "month": moment.month,
+            "day": moment.day,
+            "hour": moment.hour,
+            "forecast_at": moment,
+            "predicted_temp": predicted,
+            "adjusted_temp": round(predicted + rng.uniform(-0.3, 0.3), 2),
+            "outdoor_temp": round(_outdoor_temp(moment) + rng.gauss(0, 1), 2),
+            "heater_level": levels["heater_level"],
+            "fan_speed": levels["fan_level"],
+            "comfort_temp": COMFORT_TEMP,
+            "prediction_date": moment - timedelta(hours=1)
+        }
+        moment += timedelta(hours=1)
+
+
+def _mode_changes(start: datetime, end: datetime, rng: random.Random) -> Iterator[Dict]:
+    moment = start
+    value = 1
+    while moment < end:
+        yield {"mode_value": value, "created_at": moment}
+        value = 1 - value
+        moment += timedelta(hours=rng.randint(12, 120))
+
+
+def _insert_chunks(db: Session, table, rows: Iterator[Dict], label: str) -> int:
+    """INSERT multi-lignes par paquets de INSERT_CHUNK_SIZE, une transaction par paquet"""
+    total = 0
+    chunk: List[Dict] = []
+    started = time.perf_counter()
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= INSERT_CHUNK_SIZE:
+            db.execute(table.insert(), chunk)
+            db.commit()
+            total += len(chunk)
+            chunk = []
+            if total % (INSERT_CHUNK_SIZE * 50) == 0:
+                print(f"   … {label} : {total} lignes ({time.perf_counter() - started:.0f} s)")
+    if chunk:
+        db.execute(table.insert(), chunk)
+        db.commit()
+        total += len(chunk)
+    print(f"   ✅ {label} : {total} lignes en {time.perf_counter() - started:.1f} s")
+    return total
+
+
+def seed_database(
+    db: Session,
+    years: float = 5,
+    interval_minutes: int = 1,
+    seed: int = 42,
+    end: datetime = None
+) -> Dict[str, int]:
+    """
+    Génère `years` années de données se terminant à `end` (par défaut l'heure en cours)
+    Retourne le nombre de lignes insérées par table
+    """
+    from models.temperature import IndoorTemperatureData, TemperaturePrediction
+    from models.mode import mode
+    from services.rollup_service import backfill_rollups
+
+    rng = random.Random(seed)
+    end = (end or datetime.now()).replace(minute=0, second=0, microsecond=0)
+    start = end - timedelta(days=round(365.25 * years))
+
+    counts = {
+        "readings": _insert_chunks(
+            db, IndoorTemperatureData.__table__,
+            _readings(start, end, timedelta(minutes=interval_minutes), rng), "Mesures"
+        ),
+        "predictions": _insert_chunks(
+            db, TemperaturePrediction.__table__,
+            _predictions(start, end + timedelta(hours=24), rng), "Prédictions"
+        ),
+        "modes": _insert_chunks(db, mode.__table__, _mode_changes(start, end, rng), "Modes"),
+    }
+    counts["rollup_hours"] = backfill_rollups(db, start, end)
+    return counts
+
+
+def main(argv: List[str]) -> int:
+    from sqlalchemy.engine import make_url
+    from database.database import DATABASE_URL, SessionLocal
+    from database.migrations import run_migrations
+    from models.temperature import IndoorTemperatureData
+
+    append = "--append" in argv
+    args = [arg for arg in argv[1:] if arg != "--append"]
+    options = dict(zip(args[::2], args[1::2]))
+
+    print(f"🌱 Base de benchmark : {make_url(DATABASE_URL).render_as_string(hide_password=True)}")
+    run_migrations()
+
+    db = SessionLocal()
+    try:
+        existing = db.query(func.count(IndoorTemperatureData.id)).scalar()
+        if existing and not append:
+            print(f"⚠️ La table des mesures contient déjà {existing} lignes : utilisez une base vide "
+                  f"(DATABASE_URL) ou --append")
+            return 1
+        counts = seed_database(
+            db,
+            years=float(options.get("--years", 5)),
+            interval_minutes=int(options.get("--interval", 1)),
+            seed=int(options.get("--seed", 42)),
+            end=datetime.fromisoformat(options["--end"]) if "--end" in options else None
+        )
+    finally:
+        db.close()
+
+    print("✅ Jeu de données prêt : " + ", ".join(f"{key}={value}" for key, value in counts.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -16,12 +16,90 @@ class Settings(BaseSettings):
     DB_PASSWORD: str = ""
     DB_NAME: str = "SmartHomeDB"
     DATABASE_URL: Optional[str] = None  # Optionnel, sera construit automatiquement
+    RUN_MIGRATIONS_ON_STARTUP: bool = True  # Applique database/migrations.py au démarrage
+    
+    # Pool de connexions (par moteur : synchrone et asynchrone)
+    # Dimensionner d'après /health/pool : checked_out proche de pool_size + overflow = pool trop petit
+    DB_POOL_SIZE: int = 10  # Connexions gardées ouvertes
+    DB_MAX_OVERFLOW: int = 20  # Connexions supplémentaires temporaires en pic
+    DB_POOL_TIMEOUT: int = 30  # Secondes d'attente d'une connexion libre avant erreur
+    DB_POOL_RECYCLE: int = 3600  # Recyclage avant le wait_timeout MySQL (8h par défaut)
+    DB_POOL_PRE_PING: bool = False  # Ping à chaque checkout (utile derrière un proxy qui coupe les connexions)
+    DB_ECHO: bool = False  # Affiche chaque requête SQL (debug uniquement)
+    DB_CONNECT_TIMEOUT: int = 10  # Secondes (MySQL : connexion, SQLite : attente du verrou)
+    DB_CONNECT_ARGS: Optional[str] = None  # JSON fusionné aux arguments de connexion du dialecte
     
     # Configuration serveur
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     
-   
+    # Métriques Prometheus (/metrics)
+    METRICS_ENABLED: bool = True  # Middleware de mesure des requêtes HTTP et SQL
+    
+    # Profileur SQL par requête (debug : en-têtes X-SQL-* et /debug/sql)
+    SQL_PROFILER_ENABLED: bool = False
+    SQL_SLOW_QUERY_MS: int = 100  # Au-delà : requête journalisée avec son plan EXPLAIN
+    SQL_REPEAT_THRESHOLD: int = 5  # Même SQL avec N paramètres différents : motif N+1
+    SQL_PROFILER_HISTORY: int = 100  # Profils conservés pour /debug/sql
+    
+    # Cache HTTP (ETag / 304) des endpoints de lecture
+    # Les versions de données sont propres au processus : désactiver si plusieurs workers écrivent
+    HTTP_CACHE_ENABLED: bool = True
+    
+    # Flux temps réel du dashboard (Server-Sent Events)
+    STREAM_HEARTBEAT_SECONDS: int = 15  # Commentaire ": heartbeat" pour garder la connexion
+    STREAM_REFRESH_SECONDS: int = 60  # Recalcul périodique (fenêtre 24h, alertes de fraîcheur)
+    STREAM_DEBOUNCE_MS: int = 250  # Regroupe les écritures rapprochées en un seul calcul
+    STREAM_HISTORY_SIZE: int = 200  # Deltas conservés pour la reprise via Last-Event-ID
+    
+    # Historique : pagination et streaming
+    HISTORY_PAGE_DEFAULT_SIZE: int = 200
+    HISTORY_PAGE_MAX_SIZE: int = 1000
+    STREAM_YIELD_PER: int = 1000  # Lignes lues par paquet depuis le curseur serveur
+    AGGREGATE_MAX_BUCKETS: int = 10000  # Nombre maximum d'intervalles par requête d'agrégation
+    DOWNSAMPLE_MAX_POINTS: int = 5000  # Nombre maximum de points d'une série réduite (LTTB)
+    DOWNSAMPLE_MAX_DAYS: int = 92  # Période maximale d'une série réduite (la série brute est lue en mémoire)
+    EXPORT_CHUNK_SIZE: int = 5000  # Lignes lues et écrites par paquet lors d'un export
+    
+    # Agrégats horaires / journaliers (tables de rollup)
+    USE_ROLLUPS: bool = True  # Statistiques et historique lus depuis les rollups
+    ROLLUP_BACKFILL_CHUNK_DAYS: int = 31  # Taille des tranches du backfill
+    
+    # Cache mémoire des séries récentes (mesures et prédictions, chargé au démarrage)
+    # Propre au processus : toutes les écritures doivent passer par cette API
+    SERIES_CACHE_ENABLED: bool = True
+    SERIES_CACHE_HOURS: int = 48  # Fenêtre gardée en mémoire (séries 24h / 48h, statistiques)
+    
+    # Archive froide des mesures
+    ARCHIVE_AFTER_DAYS: int = 365  # Âge à partir duquel les mesures sont archivées
+    ARCHIVE_CHUNK_DAYS: int = 31  # Taille des tranches déplacées par transaction
+    ARCHIVE_BOUNDARY_TTL_SECONDS: int = 60  # Relecture de la frontière (archivage lancé depuis un autre processus)
+    
+    # Rapports périodiques
+    REPORT_CACHE_SIZE: int = 256  # Rapports de périodes closes gardés en mémoire
+    ACCURACY_CACHE_DAYS: int = 20000  # Erreurs horaires de journées closes gardées en mémoire (toutes zones)
+    ACCURACY_MAX_DAYS: int = 3660  # Période maximale d'une analyse de précision des prévisions
+    
+    # Moteur d'alertes (évalué à l'écriture des mesures, journal AlertLog)
+    # L'état des règles est gardé en mémoire par processus : un seul worker doit écrire les mesures
+    ALERTS_ENABLED: bool = True
+    ALERT_CHECK_SECONDS: int = 60  # Période de la vérification des capteurs silencieux
+    ALERT_STALE_MINUTES: int = 15  # Capteur silencieux : aucune mesure depuis N minutes
+    ALERT_LOW_TEMP: float = 10.0  # Température trop basse (°C)
+    ALERT_HIGH_TEMP: float = 30.0  # Température trop élevée (°C)
+    ALERT_HYSTERESIS: float = 0.5  # Marge (°C) de retour avant de clore une alerte de température / d'écart
+    ALERT_HEATER_LEVEL: int = 3  # Chauffage à haut niveau : niveau strictement supérieur à N...
+    ALERT_HEATER_MINUTES: int = 30  # ... sans interruption pendant N minutes
+    ALERT_FORECAST_DIVERGENCE: float = 3.0  # Écart (°C) entre la mesure et la prédiction de l'heure (0 = désactivé)
+    
+    # Ingestion par lots (capteurs / passerelles)
+    BATCH_CHUNK_SIZE: int = 500  # Nombre de lignes par INSERT multi-lignes
+    
+    # File d'ingestion asynchrone (write-behind)
+    INGESTION_QUEUE_MAX_DEPTH: int = 10000  # Au-delà : réponse 429
+    INGESTION_FLUSH_ROWS: int = 500  # Vidage dès N mesures en attente
+    INGESTION_FLUSH_INTERVAL_MS: int = 1000  # ... ou toutes les T millisecondes
+    INGESTION_DEAD_LETTER_SIZE: int = 1000  # Mesures rejetées par la base gardées pour inspection
     
     
     class Config:
@@ -0,0 +1,51 @@
+"""
+Configuration asynchrone de la base de données (SQLAlchemy asyncio)
+Même base que database.py, avec un pilote asynchrone :
+aiomysql en production (MySQL), aiosqlite en local (SQLite)
+"""
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from database.database import DATABASE_URL, engine_options
+from database.pool import InstrumentedAsyncQueuePool
+
+# Pilote asynchrone correspondant à chaque dialecte
+ASYNC_DRIVERS = {
+    "mysql": "aiomysql",
+    "sqlite": "aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Convertit une URL synchrone (mysql+pymysql://, sqlite://) vers son pilote asynchrone"""
+    parsed = make_url(url)
+    dialect = parsed.get_backend_name()
+    if dialect not in ASYNC_DRIVERS:
+        raise ValueError(f"Pas de pilote asynchrone connu pour le dialecte '{dialect}'")
+    return parsed.set(drivername=f"{dialect}+{ASYNC_DRIVERS[dialect]}").render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+# Moteur asynchrone : les attentes réseau libèrent la boucle d'événements au lieu d'un thread
+# Mêmes réglages de pool que le moteur synchrone (settings DB_*)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **engine_options(ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool)
+)
+
+# Les objets restent lisibles après commit (pas de rechargement implicite hors await)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+async def get_async_db():
+    """
+    Fonction pour obtenir une session asynchrone de base de données
+    Utilisée comme dépendance dans FastAPI (routes async def)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,434 @@
+"""
+Migrations du schéma de la base de données
+Chaque migration est appliquée une seule fois et enregistrée dans la table schema_migrations
+
+Utilisation en ligne de commande (depuis le dossier backend) :
+    python -m database.migrations upgrade   # Applique les migrations en attente
+    python -m database.migrations status    # Liste les migrations appliquées / en attente
+    python -m database.migrations explain   # Plans EXPLAIN des requêtes critiques
+"""
+import sys
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+from sqlalchemy import (
+    Column, DateTime, Index, MetaData, String, Table, and_, inspect, select, text
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from database.database import Base, engine as default_engine
+
+
+# Table de suivi des migrations (hors Base pour ne pas la mélanger aux modèles)
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", String(64), primary_key=True),
+    Column("description", String(255)),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Liste ordonnée des migrations : (version, description, fonction)
+MIGRATIONS: List[tuple] = []
+
+
+def migration(version: str, description: str):
+    """Décorateur pour enregistrer une migration"""
+    def decorator(func: Callable[[Connection], None]):
+        MIGRATIONS.append((version, description, func))
+        return func
+    return decorator
+
+
+# ==================== OUTILS ====================
+
+def _existing_index_names(conn: Connection, table_name: str) -> set:
+    """Noms des index et contraintes uniques existants d'une table"""
+    inspector = inspect(conn)
+    names = {idx["name"] for idx in inspector.get_indexes(table_name)}
+    names.update(uc["name"] for uc in inspector.get_unique_constraints(table_name) if uc.get("name"))
+    return names
+
+
+def create_index_if_missing(conn: Connection, table, name: str, *columns: str, unique: bool = False) -> bool:
+    """Crée un index s'il n'existe pas déjà (portable MySQL / SQLite)"""
+    if name in _existing_index_names(conn, table.name):
+        return False
+    Index(name, *[table.c[col] for col in columns], unique=unique).create(conn)
+    print(f"   ➕ Index {name} créé sur {table.name}")
+    return True
+
+
+def drop_index_if_exists(conn: Connection, table_name: str, name: str) -> bool:
+    """Supprime un index s'il existe (portable MySQL / SQLite)"""
+    if name not in _existing_index_names(conn, table_name):
+        return False
+    quote = conn.dialect.identifier_preparer.quote
+    if conn.dialect.name == "mysql":
+        conn.execute(text(f"DROP INDEX {quote(name)} ON {quote(table_name)}"))
+    else:
+        conn.execute(text(f"DROP INDEX {quote(name)}"))
+    print(f"   ➖ Index {name} supprimé de {table_name}")
+    return True
+
+
+def _column_names(conn: Connection, table_name: str) -> set:
+    return {col["name"] for col in inspect(conn).get_columns(table_name)}
+
+
+def _rebuild_table(conn: Connection, table) -> None:
+    """
+    Recrée une table selon son modèle et y recopie les lignes (colonnes communes)
+    Pour les changements de clé primaire / contrainte unique que SQLite ne sait pas faire en ALTER
+    """
+    quote = conn.dialect.identifier_preparer.quote
+    old_name = f"{table.name}_old"
+    old_columns = _column_names(conn, table.name)
+    if conn.dialect.name == "sqlite":
+        # Les noms d'index sont globaux en SQLite : libérer ceux de l'ancienne table
+        for index in inspect(conn).get_indexes(table.name):
+            conn.execute(text(f"DROP INDEX {quote(index['name'])}"))
+    conn.execute(text(f"ALTER TABLE {quote(table.name)} RENAME TO {quote(old_name)}"))
+    table.create(conn)
+    columns = ", ".join(quote(col.name) for col in table.columns if col.name in old_columns)
+    conn.execute(text(
+        f"INSERT INTO {quote(table.name)} ({columns}) SELECT {columns} FROM {quote(old_name)}"
+    ))
+    conn.execute(text(f"DROP TABLE {quote(old_name)}"))
+    print(f"   🔁 Table {table.name} reconstruite")
+
+
+# ==================== MIGRATIONS ====================
+
+@migration("0001_create_tables", "Création des tables manquantes")
+def _create_tables(conn: Connection):
+    import models  # noqa: F401 - enregistre tous les modèles dans Base.metadata
+    Base.metadata.create_all(conn, checkfirst=True)
+
+
+@migration("0002_unique_prediction_hour", "Suppression des doublons de prédictions et index unique par heure")
+def _unique_prediction_hour(conn: Connection):
+    from models.temperature import TemperaturePrediction
+    table = TemperaturePrediction.__table__
+    
+    if "uq_prediction_hour" in _existing_index_names(conn, table.name):
+        return
+    
+    # Garder la prédiction la plus récente (id max) pour chaque heure
+    # La table dérivée "keep" est nécessaire pour MySQL (pas de sous-requête sur la table modifiée)
+    conn.execute(text(
+        f"DELETE FROM {table.name} WHERE id NOT IN ("
+        f"SELECT max_id FROM (SELECT MAX(id) AS max_id FROM {table.name} "
+        f"GROUP BY year, month, day, hour) AS keep)"
+    ))
+    create_index_if_missing(conn, table, "uq_prediction_hour", "year", "month", "day", "hour", unique=True)
+
+
+@migration("0003_time_series_indexes", "Index composites (year, month, day, hour), mode.created_at et index couvrant 24h")
+def _time_series_indexes(conn: Connection):
+    from models.temperature import IndoorTemperatureData
+    from models.mode import mode
+    readings = IndoorTemperatureData.__table__
+    
+    # Filtres historique / comparaison + jointure avec les prédictions
+    create_index_if_missing(conn, readings, "ix_indoor_ymdh", "year", "month", "day", "hour")
+    # Série 24h, statistiques et alertes : index couvrant (pas d'accès à la table)
+    create_index_if_missing(
+        conn, readings, "ix_indoor_timestamp_cover",
+        "timestamp", "indoor_temp", "heater_level", "fan_level"
+    )
+    # Mode courant : ORDER BY created_at DESC LIMIT 1
+    create_index_if_missing(conn, mode.__table__, "ix_mode_created_at", "created_at")
+
+
+@migration("0004_rollup_tables", "Tables d'agrégats horaires / journaliers et backfill depuis les mesures")
+def _rollup_tables(conn: Connection):
+    from models.rollup import TemperatureRollupHourly, TemperatureRollupDaily
+    from models.temperature import IndoorTemperatureData
+    from services.rollup_service import backfill_rollups
+    Base.metadata.create_all(
+        conn,
+        tables=[TemperatureRollupHourly.__table__, TemperatureRollupDaily.__table__],
+        checkfirst=True
+    )
+    if "zone_id" not in _column_names(conn, IndoorTemperatureData.__tablename__):
+        # Schéma antérieur aux zones : le backfill est fait par la migration 0006
+        return
+    # La session rejoint la transaction de la migration
+    with Session(bind=conn) as db:
+        backfill_rollups(db)
+
+
+@migration("0005_archive_tables", "Table d'archive froide des mesures et frontière de l'archive")
+def _archive_tables(conn: Connection):
+    from models.archive import IndoorTemperatureArchive, ArchiveState
+    Base.metadata.create_all(
+        conn,
+        tables=[IndoorTemperatureArchive.__table__, ArchiveState.__table__],
+        checkfirst=True
+    )
+
+
+@migration("0006_zones", "Colonne zone_id, index composites par zone et rollups par zone")
+def _zones(conn: Connection):
+    from models.archive import IndoorTemperatureArchive
+    from models.mode import mode
+    from models.rollup import TemperatureRollupHourly, TemperatureRollupDaily
+    from models.temperature import IndoorTemperatureData, TemperaturePrediction
+    from models.zone import DEFAULT_ZONE, ZONE_ID_LENGTH
+    from services.rollup_service import backfill_rollups
+    readings = IndoorTemperatureData.__table__
+    archive = IndoorTemperatureArchive.__table__
+    predictions = TemperaturePrediction.__table__
+    quote = conn.dialect.identifier_preparer.quote
+    legacy = "zone_id" not in _column_names(conn, readings.name)
+    
+    # Mesures, archive et modes : simple ajout de colonne (les lignes existantes vont dans la zone par défaut)
+    for table in (readings, archive, mode.__table__):
+        if "zone_id" not in _column_names(conn, table.name):
+            conn.execute(text(
+                f"ALTER TABLE {quote(table.name)} ADD COLUMN zone_id "
+                f"VARCHAR({ZONE_ID_LENGTH}) NOT NULL DEFAULT '{DEFAULT_ZONE}'"
+            ))
+            print(f"   ➕ Colonne zone_id ajoutée à {table.name}")
+    
+    # Prédictions : la contrainte unique change, table reconstruite
+    if "zone_id" not in _column_names(conn, predictions.name):
+        _rebuild_table(conn, predictions)
+    
+    create_index_if_missing(conn, readings, "ix_indoor_zone_ymdh", "zone_id", "year", "month", "day", "hour")
+    create_index_if_missing(
+        conn, readings, "ix_indoor_zone_timestamp_cover",
+        "zone_id", "timestamp", "indoor_temp", "heater_level", "fan_level"
+    )
+    create_index_if_missing(conn, readings, "ix_indoor_zone_id", "zone_id", "id")
+    create_index_if_missing(conn, archive, "ix_archive_zone_ymdh", "zone_id", "year", "month", "day", "hour")
+    create_index_if_missing(
+        conn, archive, "ix_archive_zone_timestamp_cover",
+        "zone_id", "timestamp", "indoor_temp", "heater_level", "fan_level"
+    )
+    create_index_if_missing(
+        conn, predictions, "uq_prediction_zone_hour", "zone_id", "year", "month", "day", "hour", unique=True
+    )
+    create_index_if_missing(conn, predictions, "ix_prediction_zone_id", "zone_id", "id")
+    create_index_if_missing(conn, mode.__table__, "ix_mode_zone_created_at", "zone_id", "created_at")
+    
+    # Index sans zone remplacés par les index composites ci-dessus
+    drop_index_if_exists(conn, readings.name, "ix_indoor_ymdh")
+    drop_index_if_exists(conn, readings.name, "ix_indoor_timestamp_cover")
+    drop_index_if_exists(conn, archive.name, "ix_archive_ymdh")
+    drop_index_if_exists(conn, archive.name, "ix_archive_timestamp_cover")
+    drop_index_if_exists(conn, predictions.name, "uq_prediction_hour")
+    
+    # Rollups : clé primaire (zone_id, bucket_start), données dérivées recalculées depuis les mesures
+    if legacy:
+        rollups = [TemperatureRollupHourly.__table__, TemperatureRollupDaily.__table__]
+        Base.metadata.drop_all(conn, tables=rollups, checkfirst=True)
+        Base.metadata.create_all(conn, tables=rollups)
+        with Session(bind=conn) as db:
+            backfill_rollups(db)
+
+
+@migration("0007_zone_state", "Table de l'état courant des zones, reconstruite depuis l'historique")
+def _zone_state(conn: Connection):
+    from models.zone import ZoneState
+    from services.zone_state_service import rebuild_zone_states
+    Base.metadata.create_all(conn, tables=[ZoneState.__table__], checkfirst=True)
+    with Session(bind=conn) as db:
+        zones = rebuild_zone_states(db)
+        db.flush()
+    print(f"   🗂️  État courant reconstruit pour {zones} zone(s)")
+
+
+@migration("0008_alert_log", "Journal des alertes (AlertLog)")
+def _alert_log(conn: Connection):
+    from models.alert import AlertLog
+    Base.metadata.create_all(conn, tables=[AlertLog.__table__], checkfirst=True)
+
+
+@migration("0009_prediction_forecast_at", "Colonne forecast_at des prédictions (heure prédite), backfill et index par zone")
+def _prediction_forecast_at(conn: Connection):
+    from models.temperature import TemperaturePrediction
+    table = TemperaturePrediction.__table__
+    quote = conn.dialect.identifier_preparer.quote
+    
+    if "forecast_at" not in _column_names(conn, table.name):
+        conn.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN forecast_at DATETIME NULL"))
+        print(f"   ➕ Colonne forecast_at ajoutée à {table.name}")
+    
+    # Même représentation que les dates écrites par SQLAlchemy (texte en SQLite)
+    if conn.dialect.name == "mysql":
+        forecast_at = "DATE_ADD(STR_TO_DATE(CONCAT_WS('-', year, month, day), '%Y-%c-%e'), INTERVAL hour HOUR)"
+    else:
+        forecast_at = "printf('%04d-%02d-%02d %02d:00:00.000000', year, month, day, hour)"
+    result = conn.execute(text(
+        f"UPDATE {quote(table.name)} SET forecast_at = {forecast_at} WHERE forecast_at IS NULL"
+    ))
+    print(f"   🕐 forecast_at renseigné pour {result.rowcount} prédiction(s)")
+    
+    create_index_if_missing(conn, table, "ix_prediction_zone_forecast_at", "zone_id", "forecast_at")
+
+
+# ==================== EXÉCUTION ====================
+
+def get_applied_versions(bind: Engine) -> Dict[str, datetime]:
+    """Versions déjà appliquées"""
+    migration_metadata.create_all(bind, checkfirst=True)
+    with bind.connect() as conn:
+        rows = conn.execute(select(schema_migrations.c.version, schema_migrations.c.applied_at)).all()
+    return {row.version: row.applied_at for row in rows}
+
+
+def run_migrations(bind: Engine = None) -> List[str]:
+    """
+    Applique les migrations en attente, dans l'ordre
+    Chaque migration est exécutée dans sa propre transaction
+    """
+    bind = bind or default_engine
+    applied = get_applied_versions(bind)
+    newly_applied = []
+    
+    for version, description, func in MIGRATIONS:
+        if version in applied:
+            continue
+        print(f"🔧 Migration {version} : {description}")
+        with bind.begin() as conn:
+            func(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version,
+                description=description,
+                applied_at=datetime.now()
+            ))
+        newly_applied.append(version)
+    
+    if newly_applied:
+        print(f"✅ {len(newly_applied)} migration(s) appliquée(s)")
+    return newly_applied
+
+
+def migration_status(bind: Engine = None) -> List[Dict]:
+    """État de chaque migration (appliquée ou en attente)"""
+    bind = bind or default_engine
+    applied = get_applied_versions(bind)
+    return [
+        {
+            "version": version,
+            "description": description,
+            "applied_at": applied[version].isoformat() if version in applied else None
+        }
+        for version, description, _ in MIGRATIONS
+    ]
+
+
+# ==================== VÉRIFICATION EXPLAIN ====================
+
+def _hot_queries(db: Session) -> Dict[str, object]:
+    """Requêtes critiques du dashboard et de l'historique (zone par défaut)"""
+    from models.alert import AlertLog
+    from models.temperature import IndoorTemperatureData, TemperaturePrediction
+    from models.zone import DEFAULT_ZONE, ZoneState
+    from config.settings import settings
+    from services.history_service import history_page_query
+    now = datetime.now()
+    
+    return {
+        # Dernière mesure, prédiction, confort et mode : état courant lu par clé primaire
+        "dashboard_zone_state": db.query(ZoneState).filter(ZoneState.zone_id == DEFAULT_ZONE),
+        "dashboard_active_alerts": db.query(AlertLog).filter(
+            AlertLog.zone_id == DEFAULT_ZONE,
+            AlertLog.cleared_at.is_(None)
+        ).order_by(AlertLog.raised_at.desc()),
+        # Séries 24h hors cache des séries (cache non chargé ou désactivé)
+        "dashboard_temperature_24h": db.query(IndoorTemperatureData.timestamp, IndoorTemperatureData.indoor_temp,
+                                              IndoorTemperatureData.heater_level, IndoorTemperatureData.fan_level)
+            .filter(IndoorTemperatureData.zone_id == DEFAULT_ZONE,
+                    IndoorTemperatureData.timestamp >= now, IndoorTemperatureData.timestamp <= now)
+            .order_by(IndoorTemperatureData.timestamp.asc()),
+        "dashboard_predictions_24h": db.query(TemperaturePrediction).filter(
+            TemperaturePrediction.zone_id == DEFAULT_ZONE,
+            TemperaturePrediction.forecast_at >= now,
+            TemperaturePrediction.forecast_at < now + timedelta(hours=24)
+        ).order_by(TemperaturePrediction.forecast_at).limit(24),
+        "history_month_join": db.query(IndoorTemperatureData, TemperaturePrediction).outerjoin(
+            TemperaturePrediction,
+            and_(
+                IndoorTemperatureData.zone_id == TemperaturePrediction.zone_id,
+                IndoorTemperatureData.year == TemperaturePrediction.year,
+                IndoorTemperatureData.month == TemperaturePrediction.month,
+                IndoorTemperatureData.day == TemperaturePrediction.day,
+                IndoorTemperatureData.hour == TemperaturePrediction.hour
+            )
+        ).filter(
+            IndoorTemperatureData.zone_id == DEFAULT_ZONE,
+            IndoorTemperatureData.year == now.year,
+            IndoorTemperatureData.month == now.month
+        ),
+        # Page suivante de /history/page (curseur), archive comprise si elle existe
+        "history_keyset_page": history_page_query(
+            db, before=(now, 2 ** 31 - 1), size=settings.HISTORY_PAGE_DEFAULT_SIZE + 1, zone_id=DEFAULT_ZONE
+        ),
+    }
+
+
+def explain_hot_queries(bind: Engine = None) -> List[Dict]:
+    """
+    Exécute EXPLAIN sur les requêtes critiques et indique si un index est utilisé
+    MySQL : EXPLAIN (colonne key) | SQLite : EXPLAIN QUERY PLAN (SEARCH ... USING INDEX)
+    """
+    bind = bind or default_engine
+    dialect = bind.dialect.name
+    prefix = "EXPLAIN QUERY PLAN" if dialect == "sqlite" else "EXPLAIN"
+    report = []
+    
+    with Session(bind) as db:
+        for name, query in _hot_queries(db).items():
+            sql = str(query.statement.compile(bind, compile_kwargs={"literal_binds": True}))
+            rows = [dict(row._mapping) for row in db.execute(text(f"{prefix} {sql}"))]
+            
+            if dialect == "sqlite":
+                details = [str(row.get("detail", "")) for row in rows]
+                # SCAN d'une sous-requête (branche d'union limitée) : pas un parcours de table
+                subqueries = {
+                    detail.split()[-1] for detail in details
+                    if detail.startswith(("CO-ROUTINE", "MATERIALIZE"))
+                }
+                uses_index = all(
+                    "USING" in detail for detail in details
+                    if detail.startswith(("SEARCH", "SCAN")) and detail.split()[1] not in subqueries
+                )
+            elif dialect == "mysql":
+                # Lignes <derivedN> / <unionM,N> : lecture d'une sous-requête, pas d'une table
+                uses_index = all(
+                    row.get("key") for row in rows
+                    if not str(row.get("table") or "").startswith("<")
+                )
+            else:
+                uses_index = None
+            
+            report.append({"query": name, "uses_index": uses_index, "plan": rows})
+    return report
+
+
+def main(argv: List[str]) -> int:
+    command = argv[1] if len(argv) > 1 else "upgrade"
+    
+    if command == "upgrade":
+        run_migrations()
+    elif command == "status":
+        for item in migration_status():
+            state = f"appliquée le {item['applied_at']}" if item["applied_at"] else "EN ATTENTE"
+            print(f"{item['version']:<40} {state}")
+    elif command == "explain":
+        for item in explain_hot_queries():
+            flag = "✅" if item["uses_index"] else "⚠️"
+            print(f"{flag} {item['query']}")
+            for row in item["plan"]:
+                print(f"     {row}")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
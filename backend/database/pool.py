@@ -0,0 +1,86 @@
+"""
+Pool de connexions instrumenté
+Mesure le temps d'attente de chaque checkout et compte les dépassements de DB_POOL_TIMEOUT,
+pour dimensionner le pool d'après le nombre de workers plutôt qu'au hasard
+"""
+import threading
+import time
+from typing import Dict
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolStats:
+    """Compteurs cumulés des checkouts d'un pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.last_wait_ms = 0.0
+
+    def record(self, wait_ms: float, timed_out: bool):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.total_wait_ms += wait_ms
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+                self.last_wait_ms = wait_ms
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "checkouts_total": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "last_wait_ms": round(self.last_wait_ms, 3)
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Chronomètre _do_get (attente d'une connexion libre ou ouverture d'une nouvelle)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record((time.perf_counter() - started) * 1000, timed_out=True)
+            raise
+        self.stats.record((time.perf_counter() - started) * 1000, timed_out=False)
+        return connection
+
+    def recreate(self):
+        # Pool recréé (ex. après une déconnexion) : les compteurs sont conservés
+        new_pool = super().recreate()
+        new_pool.stats = self.stats
+        return new_pool
+
+    def status_dict(self) -> Dict:
+        """Statistiques en direct : connexions ouvertes, prêtées, en débordement"""
+        return {
+            "pool_size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "timeout_seconds": self.timeout(),
+            **self.stats.as_dict()
+        }
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """Pool du moteur synchrone"""
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """Pool du moteur asynchrone"""
@@ -0,0 +1,70 @@
+"""
+Construction d'INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE selon le dialecte
+"""
+from typing import Callable, Dict, List, Optional, Sequence
+from sqlalchemy import and_, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+
+def upsert_rows(
+    db: Session,
+    model,
+    rows: List[Dict],
+    index_elements: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+    merge: Optional[Callable] = None
+) -> int:
+    """
+    Insère ou met à jour des lignes en une seule requête (clé = index_elements)
+    - MySQL : INSERT ... ON DUPLICATE KEY UPDATE
+    - SQLite / PostgreSQL : INSERT ... ON CONFLICT (...) DO UPDATE
+    - Autres : SELECT puis UPDATE/INSERT ligne par ligne
+    merge(table, incoming, dialect) : expressions de mise à jour personnalisées
+    (ex. cumul d'un compteur), `incoming[col]` désignant la valeur proposée
+    Ne fait PAS de commit : l'appelant gère la transaction
+    """
+    if not rows:
+        return 0
+    
+    table = model.__table__
+    if update_columns is None:
+        update_columns = [
+            key for key in rows[0].keys() if key not in index_elements
+        ]
+    
+    dialect = db.get_bind().dialect.name
+    
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            merge(table, stmt.inserted, dialect) if merge
+            else {col: stmt.inserted[col] for col in update_columns}
+        )
+        db.execute(stmt)
+    elif dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(index_elements),
+            set_=merge(table, stmt.excluded, dialect) if merge
+            else {col: stmt.excluded[col] for col in update_columns}
+        )
+        db.execute(stmt)
+    else:
+        for row in rows:
+            key_filter = and_(*[table.c[key] == row[key] for key in index_elements])
+            existing = db.execute(select(table.c[index_elements[0]]).where(key_filter)).first()
+            if existing:
+                values = (
+                    merge(table, {col: literal(value) for col, value in row.items()}, dialect) if merge
+                    else {col: row[col] for col in update_columns}
+                )
+                db.execute(update(table).where(key_filter).values(values))
+            else:
+                db.execute(insert(table).values(row))
+    
+    return len(rows)
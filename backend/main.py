@@ -4,11 +4,21 @@ Backend pour le système de contrôle intelligent de température IoT
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 
-from database.database import get_db
-from routes import auth, temperature, history
+from database.database import engine, get_db, pool_status
+from database.async_database import async_engine
+from database.migrations import run_migrations
+from config.settings import settings
+from routes import auth, temperature, history, export, debug, alerts
+from services.alert_service import alert_engine
 from services.auth_service import init_user
+from services.series_cache import series_cache
+from services.ingestion_buffer import ingestion_buffer
+from services.dashboard_stream import dashboard_broadcaster, stop_all_broadcasters, total_subscriber_count
+from utils.metrics import MetricsMiddleware, instrument_engine, register_gauge, render_metrics
+from utils import sql_profiler
 
 # Configuration CORS pour permettre les requêtes depuis React
 origins = [
@@ -28,23 +38,40 @@ origins = [
 async def lifespan(app: FastAPI):
     """
     Gestion du cycle de vie de l'application
+    - Applique les migrations du schéma en attente
     - Initialise l'utilisateur par défaut si nécessaire
+    - Charge le cache mémoire des séries récentes (24h / 48h)
+    - Démarre / arrête la file d'ingestion des mesures
+    - Démarre / arrête le flux temps réel du dashboard
+    - Démarre / arrête la vérification périodique des alertes (capteurs silencieux)
     """
     # Démarrage
     print("🚀 Démarrage de l'application...")
     
+    if settings.RUN_MIGRATIONS_ON_STARTUP:
+        run_migrations()
+    
     # Créer l'utilisateur par défaut si nécessaire
     db = next(get_db())
     try:
         init_user(db)
+        series_cache.warm(db)
         print("✅ Initialisation terminée!")
     finally:
         db.close()
     
+    await ingestion_buffer.start()
+    await dashboard_broadcaster.start()
+    await alert_engine.start()
+    
     yield
     
-    # Arrêt (nettoyage si nécessaire)
+    # Arrêt : écrire les mesures encore en file avant de quitter
     print("👋 Arrêt de l'application...")
+    await alert_engine.stop()
+    await stop_all_broadcasters()
+    await ingestion_buffer.stop()
+    await async_engine.dispose()
 
 
 # Création de l'application FastAPI
@@ -65,10 +92,45 @@ app.add_middleware(
     expose_headers=["*"]  # Ajoutez cette ligne
 )
 
+# Profileur SQL (debug) : en-têtes X-SQL-* et /debug/sql
+if settings.SQL_PROFILER_ENABLED:
+    app.add_middleware(sql_profiler.SQLProfilerMiddleware)
+    sql_profiler.instrument_engine(engine, explain_engine=engine)
+    sql_profiler.instrument_engine(async_engine.sync_engine)
+    app.include_router(debug.router)
+
+# Métriques : mesure des requêtes HTTP et SQL (ajouté en dernier = exécuté en premier)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+
+
+def _pool_gauge(field: str):
+    def collect():
+        return {
+            (name,): pool_status(eng).get(field, 0)
+            for name, eng in (("sync", engine), ("async", async_engine))
+        }
+    return collect
+
+
+register_gauge("db_pool_checked_out", "Connexions prêtées", ("engine",), _pool_gauge("checked_out"))
+register_gauge("db_pool_size", "Connexions ouvertes gardées dans le pool", ("engine",), _pool_gauge("pool_size"))
+register_gauge("db_pool_overflow", "Connexions en débordement", ("engine",), _pool_gauge("overflow"))
+register_gauge("db_pool_checkout_timeouts", "Checkouts expirés (DB_POOL_TIMEOUT)", ("engine",), _pool_gauge("checkout_timeouts"))
+register_gauge("db_pool_checkout_wait_max_ms", "Attente maximale d'un checkout (ms)", ("engine",), _pool_gauge("max_wait_ms"))
+register_gauge("ingestion_queue_depth", "Mesures en attente dans la file d'ingestion", (),
+               lambda: {(): ingestion_buffer.depth})
+register_gauge("dashboard_stream_subscribers", "Abonnés au flux temps réel du dashboard", (),
+               lambda: {(): total_subscriber_count()})
+
 # Inclusion des routes
 app.include_router(auth.router)
 app.include_router(temperature.router)
 app.include_router(history.router)
+app.include_router(export.router)
+app.include_router(alerts.router)
 
 
 # Route racine
@@ -84,7 +146,9 @@ def root():
         "endpoints": {
             "auth": "/auth/login",
             "temperature": "/temperature/dashboard",
-            "history": "/history/all"
+            "history": "/history/all",
+            "export": "/export/readings",
+            "alerts": "/alerts"
         }
     }
 
@@ -98,9 +162,38 @@ def health_check():
     return {"status": "healthy", "service": "Smart Temperature System API"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Métriques au format texte Prometheus
+    Latence / statut / taille par route, requêtes SQL et temps en base par requête,
+    pools de connexions, ingestion (rate(ingestion_rows_total[1m]) = mesures par seconde),
+    caches (hit / miss)
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/pool")
+def pool_health():
+    """
+    Statistiques en direct des pools de connexions (moteurs synchrone et asynchrone)
+    checked_out, overflow, temps d'attente des checkouts, dépassements de DB_POOL_TIMEOUT
+    """
+    return {
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine),
+        "settings": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pre_ping": settings.DB_POOL_PRE_PING
+        }
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
-    from config.settings import settings
     
     print(f"🌐 Démarrage du serveur sur http://{settings.HOST}:{settings.PORT}")
     print(f"📚 Documentation disponible sur http://{settings.HOST}:{settings.PORT}/docs")
@@ -2,11 +2,22 @@
 from .user import User
 from .temperature import TemperaturePrediction,IndoorTemperatureData
 from .mode import mode
+from .rollup import TemperatureRollupHourly, TemperatureRollupDaily
+from .archive import IndoorTemperatureArchive, ArchiveState
+from .zone import DEFAULT_ZONE, ZoneState
+from .alert import AlertLog
 
 __all__ = [
     "user",
     "Ttemperatureprediction",
     "IndoorTemperatureData",
-    "mode"
+    "mode",
+    "TemperatureRollupHourly",
+    "TemperatureRollupDaily",
+    "IndoorTemperatureArchive",
+    "ArchiveState",
+    "DEFAULT_ZONE",
+    "ZoneState",
+    "AlertLog"
 ]
 
@@ -0,0 +1,30 @@
+"""
+Modèle pour la table AlertLog
+Journal des alertes : une ligne par alerte levée, cleared_at renseigné à sa disparition
+"""
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String
+from database.database import Base
+from models.zone import zone_column
+
+
+class AlertLog(Base):
+    """
+    Table AlertLog : alertes levées par le moteur d'alertes (services/alert_service.py)
+    Alerte active : cleared_at IS NULL (au plus une par zone et par règle)
+    """
+    __tablename__ = "AlertLog"
+    __table_args__ = (
+        # Alertes actives d'une zone : WHERE zone_id = ? AND cleared_at IS NULL
+        Index("ix_alert_zone_active", "zone_id", "cleared_at", "rule"),
+        # Journal d'une zone : WHERE zone_id = ? ORDER BY raised_at DESC
+        Index("ix_alert_zone_raised_at", "zone_id", "raised_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    zone_id = zone_column()
+    rule = Column(String(32), nullable=False, comment="stale | low_temp | high_temp | heater_sustained | forecast_divergence")
+    severity = Column(String(16), nullable=False, comment="CRITICAL | WARNING | INFO")
+    message = Column(String(255), nullable=False)
+    value = Column(Float, comment="Valeur ayant déclenché l'alerte (°C, minutes...)")
+    raised_at = Column(DateTime, nullable=False)
+    cleared_at = Column(DateTime)
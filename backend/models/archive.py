@@ -0,0 +1,40 @@
+# models/archive.py
+from sqlalchemy import Column, Integer, Float, DateTime, String, Index
+from sqlalchemy.sql import func
+from database.database import Base
+from models.zone import zone_column
+
+
+class IndoorTemperatureArchive(Base):
+    """
+    Archive froide des mesures anciennes (mêmes colonnes, mêmes id que la table chaude)
+    Lignes compressées sous MySQL (ROW_FORMAT=COMPRESSED)
+    """
+    __tablename__ = "IndoorTempDataArchive"
+    __table_args__ = (
+        Index("ix_archive_zone_ymdh", "zone_id", "year", "month", "day", "hour"),
+        Index("ix_archive_zone_timestamp_cover", "zone_id", "timestamp", "indoor_temp", "heater_level", "fan_level"),
+        {"mysql_row_format": "COMPRESSED"},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    zone_id = zone_column()
+    timestamp = Column(DateTime, nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    day = Column(Integer, nullable=False)
+    hour = Column(Integer, nullable=False)
+    indoor_temp = Column(Float, nullable=False)
+    heater_level = Column(Integer)
+    fan_level = Column(Integer)
+
+
+class ArchiveState(Base):
+    """
+    Frontière de l'archive : toutes les mesures avant archived_before ont été archivées
+    """
+    __tablename__ = "archive_state"
+
+    name = Column(String(64), primary_key=True)
+    archived_before = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
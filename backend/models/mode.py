@@ -2,9 +2,10 @@
 Modèle pour la table user_mode_history
 Historique des changements de mode (AUTO/MANUEL)
 """
-from sqlalchemy import Column, Integer, TIMESTAMP
+from sqlalchemy import Column, Integer, TIMESTAMP, Index
 from sqlalchemy.sql import func
 from database.database import Base
+from models.zone import zone_column
 
 
 class mode(Base):
@@ -13,8 +14,13 @@ class mode(Base):
     mode = 1 pour AUTO, mode = 0 pour MANUEL
     """
     __tablename__ = "mode"
+    __table_args__ = (
+        # Mode courant d'une zone : WHERE zone_id = ? ORDER BY created_at DESC LIMIT 1
+        Index("ix_mode_zone_created_at", "zone_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    zone_id = zone_column()
     mode_value = Column(Integer, nullable=False, comment="1 = AUTO | 0 = MANUEL")
     created_at = Column(TIMESTAMP, default=func.now(), index=True)
 
@@ -0,0 +1,42 @@
+# models/rollup.py
+from sqlalchemy import Column, Integer, Float, DateTime
+from database.database import Base
+from models.zone import zone_column
+
+
+class TemperatureRollupHourly(Base):
+    """
+    Agrégats horaires des mesures par zone, mis à jour à chaque écriture
+    bucket_start = début de l'heure ; moyenne = temp_sum / sample_count
+    """
+    __tablename__ = "TemperatureRollupHourly"
+
+    zone_id = zone_column(primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    sample_count = Column(Integer, nullable=False, default=0)
+    temp_sum = Column(Float, nullable=False, default=0)
+    temp_min = Column(Float)
+    temp_max = Column(Float)
+    heater_sum = Column(Float, nullable=False, default=0, comment="Somme des niveaux (NULL = 0)")
+    fan_sum = Column(Float, nullable=False, default=0, comment="Somme des niveaux (NULL = 0)")
+    heater_on_count = Column(Integer, nullable=False, default=0, comment="Mesures avec chauffage allumé")
+    fan_on_count = Column(Integer, nullable=False, default=0, comment="Mesures avec ventilateur allumé")
+
+
+class TemperatureRollupDaily(Base):
+    """
+    Agrégats journaliers des mesures (mêmes colonnes que l'horaire)
+    bucket_start = minuit du jour
+    """
+    __tablename__ = "TemperatureRollupDaily"
+
+    zone_id = zone_column(primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    sample_count = Column(Integer, nullable=False, default=0)
+    temp_sum = Column(Float, nullable=False, default=0)
+    temp_min = Column(Float)
+    temp_max = Column(Float)
+    heater_sum = Column(Float, nullable=False, default=0, comment="Somme des niveaux (NULL = 0)")
+    fan_sum = Column(Float, nullable=False, default=0, comment="Somme des niveaux (NULL = 0)")
+    heater_on_count = Column(Integer, nullable=False, default=0, comment="Mesures avec chauffage allumé")
+    fan_on_count = Column(Integer, nullable=False, default=0, comment="Mesures avec ventilateur allumé")
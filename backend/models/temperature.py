@@ -1,12 +1,22 @@
 # models/temperature.py
-from sqlalchemy import Column, Integer, Float, DateTime, TIMESTAMP, Boolean
+from sqlalchemy import Column, Integer, Float, DateTime, TIMESTAMP, Boolean, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from database.database import Base
+from models.zone import zone_column
 
 class IndoorTemperatureData(Base):
     __tablename__ = "IndoorTempData2020_2025"
+    __table_args__ = (
+        # Filtres historique / comparaison et jointure avec les prédictions, par zone
+        Index("ix_indoor_zone_ymdh", "zone_id", "year", "month", "day", "hour"),
+        # Série 24h, statistiques et alertes d'une zone (index couvrant)
+        Index("ix_indoor_zone_timestamp_cover", "zone_id", "timestamp", "indoor_temp", "heater_level", "fan_level"),
+        # Dernière mesure d'une zone : WHERE zone_id = ? ORDER BY id DESC LIMIT 1
+        Index("ix_indoor_zone_id", "zone_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    zone_id = zone_column()
     timestamp = Column(DateTime, nullable=False, index=True)
     year = Column(Integer, nullable=False)
     month = Column(Integer, nullable=False)
@@ -19,12 +29,23 @@ class IndoorTemperatureData(Base):
 
 class TemperaturePrediction(Base):
     __tablename__ = "TemperaturePredictions"
+    __table_args__ = (
+        # Une seule prédiction par zone et par heure : clé des upserts de l'horizon ML
+        UniqueConstraint("zone_id", "year", "month", "day", "hour", name="uq_prediction_zone_hour"),
+        # Dernière prédiction d'une zone
+        Index("ix_prediction_zone_id", "zone_id", "id"),
+        # Horizon de prévision d'une zone : WHERE zone_id = ? AND forecast_at >= ? AND forecast_at < ?
+        Index("ix_prediction_zone_forecast_at", "zone_id", "forecast_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    zone_id = zone_column()
     year = Column(Integer, nullable=False)
     month = Column(Integer, nullable=False)
     day = Column(Integer, nullable=False)
     hour = Column(Integer, nullable=False)
+    # Heure prédite (year, month, day, hour), renseignée à chaque écriture
+    forecast_at = Column(DateTime)
     predicted_temp = Column(Float, nullable=False)
     adjusted_temp = Column(Float)
     outdoor_temp = Column(Float)
@@ -0,0 +1,52 @@
+# models/zone.py
+"""
+Dimension zone (pièce, site...) commune aux mesures, prédictions, modes et agrégats
+Les lignes sans zone (clients mono-zone, données antérieures) appartiennent à DEFAULT_ZONE
+"""
+from sqlalchemy import Column, DateTime, Float, Integer, String
+from database.database import Base
+
+DEFAULT_ZONE = "default"
+ZONE_ID_LENGTH = 64
+
+
+def zone_column(primary_key: bool = False) -> Column:
+    """Colonne zone_id (une instance par table)"""
+    return Column(
+        String(ZONE_ID_LENGTH),
+        primary_key=primary_key,
+        nullable=False,
+        default=DEFAULT_ZONE,
+        server_default=DEFAULT_ZONE,
+        comment="Zone (pièce / site) de la donnée"
+    )
+
+
+class ZoneState(Base):
+    """
+    État courant d'une zone (une ligne par zone), mis à jour dans la transaction de chaque écriture
+    Les lectures "dernière valeur" sont des accès par clé primaire, quelle que soit la taille de l'historique
+    Colonnes de mesure nommées comme IndoorTemperatureData (même usage dans le dashboard et les alertes)
+    """
+    __tablename__ = "ZoneCurrentState"
+
+    zone_id = zone_column(primary_key=True)
+
+    # Dernière mesure (la plus récente par timestamp)
+    reading_id = Column(Integer)
+    indoor_temp = Column(Float)
+    heater_level = Column(Integer)
+    fan_level = Column(Integer)
+    # Après les colonnes qu'elle protège : MySQL applique ON DUPLICATE KEY UPDATE dans l'ordre des colonnes
+    timestamp = Column(DateTime, comment="Horodatage de la dernière mesure")
+
+    # Dernière prédiction écrite et consigne de confort
+    prediction_id = Column(Integer)
+    outdoor_temp = Column(Float)
+    comfort_temp = Column(Float)
+
+    # Mode courant (NULL = jamais changé, AUTO)
+    mode_value = Column(Integer, comment="1 = AUTO | 0 = MANUEL")
+    mode_changed_at = Column(DateTime)
+
+    updated_at = Column(DateTime)
@@ -0,0 +1,35 @@
+"""
+Routes pour le journal des alertes (dashboard, panneau de notifications)
+"""
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from database.async_database import get_async_db
+from models.zone import DEFAULT_ZONE
+from schemas.alert_schemas import AlertResponse
+from schemas.zone_schemas import ZoneQuery
+from services.async_alert_service import get_alert_log
+from routes.auth import check_auth
+from utils.http_cache import conditional_get
+
+router = APIRouter(prefix="/alerts", tags=["Alerts"])
+
+
+# Alertes levées à l'écriture des mesures ("temperature") ou par la vérification périodique ("alert")
+@router.get(
+    "",
+    response_model=List[AlertResponse],
+    dependencies=[Depends(conditional_get("temperature", "alert"))]
+)
+async def get_alerts(
+    limit: int = 50,
+    active_only: bool = False,
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Endpoint pour récupérer le journal des alertes d'une zone, les plus récentes d'abord
+    active_only=true : uniquement les alertes en cours (cleared_at vide)
+    """
+    check_auth()
+    return await get_alert_log(db, min(max(limit, 1), 500), active_only, zone_id)
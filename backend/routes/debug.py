@@ -0,0 +1,34 @@
+"""
+Routes de debug : profils SQL des dernières requêtes (SQL_PROFILER_ENABLED)
+"""
+from fastapi import APIRouter, HTTPException, status
+from routes.auth import check_auth
+from utils.sql_profiler import get_profile, get_recent_profiles
+
+router = APIRouter(prefix="/debug", tags=["Debug"])
+
+
+@router.get("/sql")
+def get_sql_profiles(limit: int = 20):
+    """
+    Endpoint pour lister les derniers profils SQL (plus récent en premier)
+    Nombre de requêtes, temps SQL, doublons, motifs N+1 et requêtes lentes par requête HTTP
+    """
+    check_auth()
+    return get_recent_profiles(limit)
+
+
+@router.get("/sql/{profile_id}")
+def get_sql_profile(profile_id: int):
+    """
+    Endpoint pour récupérer le détail d'un profil (id de l'en-tête X-SQL-Profile-Id) :
+    chaque requête SQL avec sa durée et le plan EXPLAIN des requêtes lentes
+    """
+    check_auth()
+    profile = get_profile(profile_id)
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profil SQL introuvable (expiré ou inexistant)"
+        )
+    return profile
@@ -0,0 +1,45 @@
+"""
+Routes pour l'export en masse (CSV / NDJSON, gzip optionnel)
+"""
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from datetime import datetime
+from models.zone import ZONE_ID_LENGTH
+from schemas.zone_schemas import ZONE_ID_PATTERN
+from services.export_service import export_metadata, stream_export
+from routes.auth import check_auth
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+@router.get("/{kind}")
+def export_data(
+    kind: str,
+    format: str = "csv",
+    gzip: bool = False,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    zone_id: Optional[str] = Query(None, max_length=ZONE_ID_LENGTH, pattern=ZONE_ID_PATTERN)
+):
+    """
+    Endpoint pour exporter les données en flux continu
+    kind : readings | predictions | modes
+    format : csv | ndjson ; gzip=true pour compresser à la volée
+    start / end : période [start, end) optionnelle
+    zone_id : une seule zone (toutes les zones par défaut)
+    """
+    check_auth()
+    try:
+        meta = export_metadata(kind, format, gzip)
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+    
+    return StreamingResponse(
+        stream_export(kind, format, gzip, start, end, zone_id),
+        media_type=meta["media_type"],
+        headers={"Content-Disposition": f'attachment; filename="{meta["filename"]}"'}
+    )
@@ -2,21 +2,37 @@
 Routes pour l'historique
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from typing import Optional, List
-from database.database import get_db
+from datetime import datetime, timedelta
+from database.async_database import get_async_db
+from models.zone import DEFAULT_ZONE
+from schemas.zone_schemas import ZoneQuery
 from schemas.history_schemas import (
     UserModeCreate,
     modeResponse,
-    HistoryResponse
+    HistoryResponse,
+    HistoryPageResponse
 )
-from services.history_service import (
+from services.async_history_service import (
     create_mode_history,
     get_current_mode,
     get_mode_history,
-    get_history_data
+    get_history_data,
+    get_history_page,
+    get_comparison_data,
+    get_aggregated_history,
+    get_downsampled_series,
+    get_period_report,
+    get_forecast_accuracy
 )
+from services.history_service import stream_history_ndjson
+from services.report_service import render_report_pdf
+from config.settings import settings
 from routes.auth import check_auth
+from utils.http_cache import conditional_get
 
 router = APIRouter(prefix="/history", tags=["History"])
 
@@ -24,56 +40,260 @@ router = APIRouter(prefix="/history", tags=["History"])
 # ==================== MODE UTILISATEUR ====================
 
 @router.post("/mode", response_model=modeResponse)
-def set_user_mode(
+async def set_user_mode(
     mode_data: UserModeCreate,
-    db: Session = Depends(get_db)
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Endpoint pour changer le mode (AUTO/MANUEL)
+    Endpoint pour changer le mode (AUTO/MANUEL) d'une zone
     mode = 1 pour AUTO, mode = 0 pour MANUEL
     """
     check_auth()
-    return create_mode_history(db, mode_data.mode)
+    return await create_mode_history(db, mode_data.mode, zone_id)
 
 
-@router.get("/mode/current")
-def get_current_user_mode(db: Session = Depends(get_db)):
+@router.get("/mode/current", dependencies=[Depends(conditional_get("mode"))])
+async def get_current_user_mode(
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Endpoint pour récupérer le mode actuel
+    Endpoint pour récupérer le mode actuel d'une zone
     """
     check_auth()
-    mode = get_current_mode(db)
+    mode = await get_current_mode(db, zone_id)
     return {
+        "zone_id": zone_id,
         "mode": mode,
         "mode_name": "AUTO" if mode == 1 else "MANUEL"
     }
 
 
-@router.get("/mode/all", response_model=List[modeResponse])
-def get_user_mode_history(
+@router.get(
+    "/mode/all",
+    response_model=List[modeResponse],
+    dependencies=[Depends(conditional_get("mode"))]
+)
+async def get_user_mode_history(
     limit: int = 100,
-    db: Session = Depends(get_db)
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Endpoint pour récupérer l'historique des changements de mode
+    Endpoint pour récupérer l'historique des changements de mode d'une zone
     """
     check_auth()
-    return get_mode_history(db, limit)
+    return await get_mode_history(db, limit, zone_id)
 
 
 # ==================== HISTORIQUE COMPLET ====================
 
-@router.get("/all", response_model=HistoryResponse)
-def get_history(
+@router.get(
+    "/all",
+    response_model=HistoryResponse,
+    dependencies=[Depends(conditional_get("temperature", "prediction", "mode"))]
+)
+async def get_history(
     year: Optional[int] = None,
     month: Optional[int] = None,
     day: Optional[int] = None,
-    db: Session = Depends(get_db)
+    zone_id: ZoneQuery = DEFAULT_ZONE
 ):
     """
-    Endpoint pour récupérer les données historiques
+    Endpoint pour récupérer les données historiques d'une zone
     Filtres optionnels : year, month, day
     """
     check_auth()
-    return get_history_data(db, year, month, day)
+    return await get_history_data(year, month, day, zone_id)
+
+
+@router.get(
+    "/comparison",
+    dependencies=[Depends(conditional_get("temperature", "prediction"))]
+)
+async def get_history_comparison(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    zone_id: ZoneQuery = DEFAULT_ZONE
+):
+    """
+    Endpoint pour comparer les prédictions ML aux températures réelles d'une zone
+    Filtres optionnels : year, month, day
+    """
+    check_auth()
+    return await get_comparison_data(year, month, day, zone_id)
+
+
+@router.get(
+    "/page",
+    response_model=HistoryPageResponse,
+    dependencies=[Depends(conditional_get("temperature", "prediction"))]
+)
+async def get_history_paginated(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = settings.HISTORY_PAGE_DEFAULT_SIZE,
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Endpoint pour parcourir l'historique page par page
+    Renvoyer next_cursor dans ?cursor= pour obtenir la page suivante
+    """
+    check_auth()
+    try:
+        return await get_history_page(db, year, month, day, cursor, limit, zone_id)
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+
+
+@router.get("/stream")
+async def stream_history(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    zone_id: ZoneQuery = DEFAULT_ZONE
+):
+    """
+    Endpoint pour télécharger l'historique complet d'une zone en NDJSON
+    Les lignes sont envoyées au fur et à mesure de leur lecture en base
+    """
+    check_auth()
+    return StreamingResponse(
+        stream_history_ndjson(year, month, day, zone_id),
+        media_type="application/x-ndjson"
+    )
 
+
+# ==================== AGRÉGATION POUR LES GRAPHIQUES ====================
+
+def _default_range(start: Optional[datetime], end: Optional[datetime]):
+    """Période par défaut : les 7 derniers jours"""
+    end = end or datetime.now()
+    start = start or end - timedelta(days=7)
+    return start, end
+
+
+@router.get(
+    "/aggregate",
+    dependencies=[Depends(conditional_get("temperature", "prediction"))]
+)
+async def get_history_aggregate(
+    bucket: str = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    series: str = "both",
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Endpoint pour récupérer l'historique agrégé par intervalle
+    bucket : 5min | hour | day | week
+    series : real | predicted | both
+    Retourne min / moyenne / max de la température et les niveaux moyens chauffage / ventilateur
+    """
+    check_auth()
+    start, end = _default_range(start, end)
+    try:
+        return await get_aggregated_history(db, bucket, start, end, series, zone_id)
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+
+
+@router.get(
+    "/downsample",
+    dependencies=[Depends(conditional_get("temperature", "prediction"))]
+)
+async def get_history_downsampled(
+    series: str = "real",
+    points: int = 500,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    zone_id: ZoneQuery = DEFAULT_ZONE
+):
+    """
+    Endpoint pour récupérer une série réduite à `points` points (LTTB)
+    La forme de la courbe (pics, creux) est conservée
+    """
+    check_auth()
+    start, end = _default_range(start, end)
+    try:
+        return await get_downsampled_series(series, start, end, points, zone_id)
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+
+
+# ==================== RAPPORTS ====================
+
+@router.get(
+    "/accuracy",
+    dependencies=[Depends(conditional_get("temperature", "prediction"))]
+)
+async def get_history_accuracy(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    zone_id: ZoneQuery = DEFAULT_ZONE
+):
+    """
+    Endpoint pour suivre la précision des prévisions ML d'une zone (journées entières)
+    MAE, RMSE, biais et MAPE : global, par heure de la journée, par jour et par mois
+    Période par défaut : les 7 derniers jours
+    """
+    check_auth()
+    start, end = _default_range(start, end)
+    try:
+        return await get_forecast_accuracy(start, end, zone_id)
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+
+
+@router.get(
+    "/report",
+    dependencies=[Depends(conditional_get("temperature", "prediction", "mode"))]
+)
+async def get_history_report(
+    year: int,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    format: str = "json",
+    zone_id: ZoneQuery = DEFAULT_ZONE
+):
+    """
+    Endpoint pour récupérer le rapport d'une période (année, mois ou jour)
+    Résumé et détail journalier : min / max / moyenne, erreur de prévision,
+    utilisation chauffage / ventilateur, changements de mode, heures en alerte
+    format : json | pdf
+    """
+    check_auth()
+    try:
+        report = await get_period_report(year, month, day, zone_id)
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+    
+    if format == "pdf":
+        filename = f"rapport_{zone_id}_" + "-".join(str(part) for part in (year, month, day) if part) + ".pdf"
+        return Response(
+            content=await run_in_threadpool(render_report_pdf, report),
+            media_type="application/pdf",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+    return report
@@ -1,32 +1,49 @@
 """
 Routes pour les données de température
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
 from typing import Optional, List
-from database.database import get_db
+from database.async_database import get_async_db
+from models.zone import DEFAULT_ZONE
+from schemas.zone_schemas import ZoneQuery
 from schemas.temperature_schemas import (
     TemperaturePredictionCreate,
     TemperaturePredictionResponse,
+    TemperaturePredictionBulkUpsert,
+    TemperaturePredictionBulkResponse,
     IndoorTemperatureDataCreate,
     IndoorTemperatureDataResponse,
+    IndoorTemperatureDataBatchCreate,
+    IndoorTemperatureDataBatchResponse,
     DashboardResponse,
     ComfortTemperatureUpdate,
     ManualControlsUpdate,
     ComfortTemperatureResponse
 )
-from services.temperature_service import (
+from services.async_temperature_service import (
     create_prediction,
+    upsert_predictions_bulk,
     get_latest_prediction,
     get_all_predictions,
     create_temperature_data,
+    create_temperature_data_batch,
     get_latest_temperature,
     get_all_temperature_data,
     get_dashboard_data,
+    get_comfort_temperature,
     update_comfort_temperature,
-    update_manual_controls
+    update_manual_controls,
+    get_temperature_24h,
+    get_predictions_24h,
+    get_forecast
 )
+from services.ingestion_buffer import ingestion_buffer
+from services.dashboard_stream import stream_zone, zone_exists
 from routes.auth import check_auth
+from utils.http_cache import conditional_get
 
 router = APIRouter(prefix="/temperature", tags=["Temperature"])
 
@@ -34,25 +51,45 @@ router = APIRouter(prefix="/temperature", tags=["Temperature"])
 # ==================== PRÉDICTIONS ====================
 
 @router.post("/prediction", response_model=TemperaturePredictionResponse)
-def create_temperature_prediction(
+async def create_temperature_prediction(
     data: TemperaturePredictionCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Endpoint pour créer une nouvelle prédiction de température
     Utilisé par le système ML
     """
     check_auth()
-    return create_prediction(db, data)
+    return await create_prediction(db, data)
 
 
-@router.get("/prediction/latest", response_model=TemperaturePredictionResponse)
-def get_latest_prediction_data(db: Session = Depends(get_db)):
+@router.post("/prediction/bulk", response_model=TemperaturePredictionBulkResponse)
+async def upsert_temperature_predictions(
+    data: TemperaturePredictionBulkUpsert,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Endpoint pour enregistrer un horizon complet de prédictions (24h, 48h, 7 jours)
+    Remplace les prédictions existantes heure par heure (upsert)
+    """
+    check_auth()
+    return await upsert_predictions_bulk(db, data.items)
+
+
+@router.get(
+    "/prediction/latest",
+    response_model=TemperaturePredictionResponse,
+    dependencies=[Depends(conditional_get("prediction"))]
+)
+async def get_latest_prediction_data(
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Endpoint pour récupérer la dernière prédiction
+    Endpoint pour récupérer la dernière prédiction d'une zone
     """
     check_auth()
-    latest = get_latest_prediction(db)
+    latest = await get_latest_prediction(db, zone_id)
     if not latest:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -61,40 +98,106 @@ def get_latest_prediction_data(db: Session = Depends(get_db)):
     return latest
 
 
-@router.get("/prediction/all", response_model=List[TemperaturePredictionResponse])
-def get_all_predictions_data(
+@router.get(
+    "/prediction/all",
+    response_model=List[TemperaturePredictionResponse],
+    dependencies=[Depends(conditional_get("prediction"))]
+)
+async def get_all_predictions_data(
     limit: int = 100,
-    db: Session = Depends(get_db)
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Endpoint pour récupérer toutes les prédictions
+    Endpoint pour récupérer toutes les prédictions d'une zone
     """
     check_auth()
-    return get_all_predictions(db, limit)
+    return await get_all_predictions(db, limit, zone_id)
 
 
 # ==================== TEMPÉRATURE RÉELLE ====================
 
 @router.post("/data", response_model=IndoorTemperatureDataResponse)
-def create_temperature(
+async def create_temperature(
     data: IndoorTemperatureDataCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Endpoint pour créer une nouvelle mesure de température
     Utilisé par les capteurs IoT
     """
     check_auth()
-    return create_temperature_data(db, data)
+    return await create_temperature_data(db, data)
+
+
+@router.post("/data/batch", response_model=IndoorTemperatureDataBatchResponse)
+async def create_temperature_batch(
+    data: IndoorTemperatureDataBatchCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Endpoint pour envoyer un lot de mesures en une seule requête
+    Utilisé par les passerelles IoT (une transaction, un INSERT multi-lignes par paquet)
+    """
+    check_auth()
+    return await create_temperature_data_batch(db, data.items)
+
+
+@router.post("/data/queue", status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_temperature(data: IndoorTemperatureDataCreate):
+    """
+    Endpoint pour déposer une mesure dans la file d'ingestion
+    Répond immédiatement (202), l'écriture en base est faite par lots en arrière-plan
+    """
+    check_auth()
+    if not ingestion_buffer.enqueue([data.model_dump()]):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="File d'ingestion pleine, réessayez plus tard",
+            headers={"Retry-After": "1"}
+        )
+    return {
+        "accepted": True,
+        "queue_depth": ingestion_buffer.depth
+    }
+
+
+@router.get("/ingestion/stats")
+async def get_ingestion_stats():
+    """
+    Endpoint pour consulter l'état de la file d'ingestion
+    """
+    check_auth()
+    return ingestion_buffer.stats()
+
+
+@router.get("/ingestion/dead-letter")
+async def get_ingestion_dead_letter():
+    """
+    Endpoint pour consulter les mesures de la file rejetées par la base (avec l'erreur)
+    """
+    check_auth()
+    rejected = ingestion_buffer.dead_letter()
+    return {
+        "count": len(rejected),
+        "items": rejected
+    }
 
 
-@router.get("/data/latest", response_model=IndoorTemperatureDataResponse)
-def get_latest_temperature_data(db: Session = Depends(get_db)):
+@router.get(
+    "/data/latest",
+    response_model=IndoorTemperatureDataResponse,
+    dependencies=[Depends(conditional_get("temperature"))]
+)
+async def get_latest_temperature_data(
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Endpoint pour récupérer la dernière mesure de température
+    Endpoint pour récupérer la dernière mesure de température d'une zone
     """
     check_auth()
-    latest = get_latest_temperature(db)
+    latest = await get_latest_temperature(db, zone_id)
     if not latest:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -103,40 +206,82 @@ def get_latest_temperature_data(db: Session = Depends(get_db)):
     return latest
 
 
-@router.get("/data/all", response_model=List[IndoorTemperatureDataResponse])
-def get_all_temperature_data_endpoint(
+@router.get(
+    "/data/all",
+    response_model=List[IndoorTemperatureDataResponse],
+    dependencies=[Depends(conditional_get("temperature"))]
+)
+async def get_all_temperature_data_endpoint(
     limit: int = 100,
-    db: Session = Depends(get_db)
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Endpoint pour récupérer toutes les mesures de température
+    Endpoint pour récupérer toutes les mesures de température d'une zone
     """
     check_auth()
-    return get_all_temperature_data(db, limit)
+    return await get_all_temperature_data(db, limit, zone_id)
 
 
 # ==================== DASHBOARD ====================
 
-@router.get("/dashboard", response_model=DashboardResponse)
-def get_dashboard(db: Session = Depends(get_db)):
+@router.get(
+    "/dashboard",
+    response_model=DashboardResponse,
+    # Fenêtre 24h glissante : l'ETag change aussi chaque minute
+    dependencies=[Depends(conditional_get("temperature", "prediction", "mode", "alert", time_bucket_seconds=60))]
+)
+async def get_dashboard(
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Endpoint principal du dashboard
+    Endpoint principal du dashboard (une zone, la zone par défaut si non précisée)
     Retourne toutes les données nécessaires pour l'affichage
     """
     check_auth()
-    dashboard_data = get_dashboard_data(db)
+    dashboard_data = await get_dashboard_data(db, zone_id)
     return DashboardResponse(**dashboard_data)
 
 
+@router.get("/stream")
+async def stream_dashboard(
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Flux temps réel du dashboard d'une zone (Server-Sent Events)
+    - event "snapshot" : état complet à la connexion
+    - event "delta" : champs modifiés après chaque écriture (mesures, prédictions, mode)
+    - reprise sans rechargement complet via l'en-tête Last-Event-ID
+    Zone inconnue (aucune donnée écrite) : 404
+    """
+    check_auth()
+    if not await zone_exists(zone_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Zone inconnue : {zone_id}"
+        )
+    return StreamingResponse(
+        stream_zone(zone_id, last_event_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Désactive la mise en tampon des proxys (nginx)
+        }
+    )
+
+
 # ==================== TEMPÉRATURE DE CONFORT ====================
 
 @router.post("/comfort", response_model=ComfortTemperatureResponse)
-def set_comfort_temperature(
+async def set_comfort_temperature(
     data: ComfortTemperatureUpdate,
-    db: Session = Depends(get_db)
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Endpoint pour sauvegarder la température de confort
+    Endpoint pour sauvegarder la température de confort d'une zone
     """
     check_auth()
     
@@ -147,7 +292,7 @@ def set_comfort_temperature(
             message="La température de confort doit être entre 16°C et 30°C"
         )
     
-    success = update_comfort_temperature(db, data.comfort_temperature)
+    success = await update_comfort_temperature(db, data.comfort_temperature, zone_id)
     
     if success:
         return ComfortTemperatureResponse(
@@ -162,16 +307,19 @@ def set_comfort_temperature(
         )
 
 
-@router.get("/comfort/current")
-def get_current_comfort_temperature(db: Session = Depends(get_db)):
+@router.get("/comfort/current", dependencies=[Depends(conditional_get("prediction"))])
+async def get_current_comfort_temperature(
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Endpoint pour récupérer la température de confort actuelle
+    Endpoint pour récupérer la température de confort actuelle d'une zone
     """
     check_auth()
-    latest_pred = get_latest_prediction(db)
-    comfort_temp = latest_pred.comfort_temp if latest_pred else None
+    comfort_temp = await get_comfort_temperature(db, zone_id)
     
     return {
+        "zone_id": zone_id,
         "comfort_temperature": comfort_temp,
         "success": True
     }
@@ -180,22 +328,24 @@ def get_current_comfort_temperature(db: Session = Depends(get_db)):
 # ==================== CONTRÔLES MANUELS ====================
 
 @router.post("/manual-control")
-def set_manual_controls(
+async def set_manual_controls(
     data: ManualControlsUpdate,
-    db: Session = Depends(get_db)
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Endpoint pour sauvegarder les contrôles manuels
+    Endpoint pour sauvegarder les contrôles manuels d'une zone
     (chauffage, ventilateur, niveaux)
     """
     check_auth()
     
-    success = update_manual_controls(
+    success = await update_manual_controls(
         db, 
         data.heater_on, 
         data.fan_on, 
         data.heater_level, 
-        data.fan_level
+        data.fan_level,
+        zone_id
     )
     
     if success:
@@ -212,15 +362,17 @@ def set_manual_controls(
 
 # ==================== DONNÉES TEMPORELLES ====================
 
-@router.get("/24h/real")
-def get_24h_real_data(db: Session = Depends(get_db)):
+@router.get("/24h/real", dependencies=[Depends(conditional_get("temperature", time_bucket_seconds=60))])
+async def get_24h_real_data(
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Endpoint pour récupérer les données réelles des 24 dernières heures
+    Endpoint pour récupérer les données réelles des 24 dernières heures d'une zone
     """
     check_auth()
-    from services.temperature_service import get_temperature_24h
     try:
-        data = get_temperature_24h(db)
+        data = await get_temperature_24h(db, zone_id)
         return {
             "success": True,
             "data": data,
@@ -235,15 +387,17 @@ def get_24h_real_data(db: Session = Depends(get_db)):
         }
 
 
-@router.get("/24h/predictions")
-def get_24h_predictions(db: Session = Depends(get_db)):
+@router.get("/24h/predictions", dependencies=[Depends(conditional_get("prediction", time_bucket_seconds=60))])
+async def get_24h_predictions(
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Endpoint pour récupérer les prédictions des 24 prochaines heures
+    Endpoint pour récupérer les prédictions des 24 prochaines heures d'une zone
     """
     check_auth()
-    from services.temperature_service import get_predictions_24h
     try:
-        data = get_predictions_24h(db)
+        data = await get_predictions_24h(db, zone_id)
         return {
             "success": True,
             "data": data,
@@ -256,5 +410,18 @@ def get_24h_predictions(db: Session = Depends(get_db)):
             "data": [],
             "count": 0
         }
-    
-    
\ No newline at end of file
+
+
+@router.get("/forecast", dependencies=[Depends(conditional_get("prediction", time_bucket_seconds=60))])
+async def get_forecast_data(
+    start: Optional[datetime] = Query(None, alias="from", description="Première heure (par défaut l'heure en cours)"),
+    hours: int = Query(24, ge=1, le=168, description="Horizon en heures (1h à 7 jours)"),
+    zone_id: ZoneQuery = DEFAULT_ZONE,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Endpoint pour récupérer les prédictions d'une zone sur un horizon quelconque
+    Heures prédites dans [from, from + hours[, lues par l'index (zone_id, forecast_at)
+    """
+    check_auth()
+    return await get_forecast(db, start, hours, zone_id)
@@ -0,0 +1,21 @@
+"""
+Schémas Pydantic pour le journal des alertes
+"""
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class AlertResponse(BaseModel):
+    """Schéma pour une alerte du journal (active si cleared_at est vide)"""
+    id: int
+    zone_id: str
+    rule: str
+    severity: str
+    message: str
+    value: Optional[float] = None
+    raised_at: datetime
+    cleared_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
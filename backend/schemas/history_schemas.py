@@ -1,7 +1,7 @@
 """
 Schémas Pydantic pour l'historique
 """
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -14,8 +14,10 @@ class UserModeCreate(BaseModel):
 class modeResponse(BaseModel):
     """Schéma pour la réponse d'un historique de mode"""
     id: int
-    mode: int
-    selected_at: datetime
+    zone_id: Optional[str] = None
+    # Colonnes mode_value / created_at du modèle
+    mode: int = Field(..., validation_alias=AliasChoices("mode", "mode_value"))
+    selected_at: Optional[datetime] = Field(None, validation_alias=AliasChoices("selected_at", "created_at"))
 
     class Config:
         from_attributes = True
@@ -30,8 +32,18 @@ class HistoryFilter(BaseModel):
     end_date: Optional[datetime] = None
 
 
+class HistoryPageResponse(BaseModel):
+    """Schéma pour une page de l'historique (pagination par curseur)"""
+    zone_id: Optional[str] = None
+    temperature_data: List[dict] = Field(default_factory=list)
+    next_cursor: Optional[str] = Field(None, description="À renvoyer dans ?cursor= pour la page suivante")
+    has_more: bool = False
+    limit: int
+
+
 class HistoryResponse(BaseModel):
     """Schéma pour la réponse de l'historique"""
+    zone_id: Optional[str] = None
     temperature_data: List[dict] = Field(default_factory=list)
     predictions: List[dict] = Field(default_factory=list)
     mode_history: List[dict] = Field(default_factory=list)
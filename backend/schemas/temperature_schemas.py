@@ -1,15 +1,18 @@
 """
 Schémas Pydantic pour les données de température
 """
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional, List, Dict, Any
 from datetime import datetime
+from models.zone import DEFAULT_ZONE
+from schemas.zone_schemas import ZoneId
 
 
 # ==================== PRÉDICTIONS ====================
 
 class TemperaturePredictionCreate(BaseModel):
     """Schéma pour créer une nouvelle prédiction"""
+    zone_id: ZoneId = Field(DEFAULT_ZONE, description="Zone de la prédiction")
     year: int = Field(..., ge=2020, le=2100)
     month: int = Field(..., ge=1, le=12)
     day: int = Field(..., ge=1, le=31)
@@ -21,10 +24,39 @@ class TemperaturePredictionCreate(BaseModel):
     fan_speed: Optional[int] = Field(None, ge=0, le=100)
     comfort_temp: Optional[float] = None
 
+    @property
+    def forecast_at(self) -> datetime:
+        """Heure prédite, stockée dans la colonne indexée forecast_at"""
+        return datetime(self.year, self.month, self.day, self.hour)
+
+    @model_validator(mode="after")
+    def check_forecast_at(self):
+        # L'heure prédite doit exister (pas de 31 avril) : ValueError -> 422
+        self.forecast_at
+        return self
+
+
+class TemperaturePredictionBulkUpsert(BaseModel):
+    """
+    Schéma pour envoyer un horizon complet de prédictions (24h, 48h, 7 jours...)
+    Les prédictions existantes pour la même heure sont remplacées
+    """
+    items: List[TemperaturePredictionCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class TemperaturePredictionBulkResponse(BaseModel):
+    """Schéma pour la réponse d'un upsert de prédictions"""
+    success: bool
+    received: int
+    upserted: int
+    horizon_start: Optional[str] = None
+    horizon_end: Optional[str] = None
+
 
 class TemperaturePredictionResponse(BaseModel):
     """Schéma pour la réponse d'une prédiction"""
     id: int
+    zone_id: str = DEFAULT_ZONE
     year: int
     month: int
     day: int
@@ -45,6 +77,7 @@ class TemperaturePredictionResponse(BaseModel):
 
 class IndoorTemperatureDataCreate(BaseModel):
     """Schéma pour créer une nouvelle mesure de température"""
+    zone_id: ZoneId = Field(DEFAULT_ZONE, description="Zone du capteur")
     timestamp: datetime = Field(..., description="Date et heure de la mesure")
     year: int = Field(..., ge=2020, le=2100)
     month: int = Field(..., ge=1, le=12)
@@ -58,6 +91,7 @@ class IndoorTemperatureDataCreate(BaseModel):
 class IndoorTemperatureDataResponse(BaseModel):
     """Schéma pour la réponse d'une mesure de température"""
     id: int
+    zone_id: str = DEFAULT_ZONE
     timestamp: datetime
     year: int
     month: int
@@ -66,12 +100,39 @@ class IndoorTemperatureDataResponse(BaseModel):
     indoor_temp: float
     heater_level: Optional[int]
     fan_level: Optional[int]
-    created_at: datetime
+    created_at: Optional[datetime] = None  # Pas de colonne created_at dans IndoorTempData2020_2025
 
     class Config:
         from_attributes = True
 
 
+# ==================== INGESTION PAR LOTS ====================
+
+class IndoorTemperatureDataBatchCreate(BaseModel):
+    """
+    Schéma pour envoyer un lot de mesures en une seule requête
+    Chaque élément est validé individuellement (IndoorTemperatureDataCreate)
+    afin qu'une mesure invalide ne fasse pas rejeter tout le lot
+    """
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=5000, description="Mesures à insérer")
+
+
+class BatchItemStatus(BaseModel):
+    """Statut d'un élément d'un lot"""
+    index: int
+    status: str = Field(..., description="inserted | rejected | failed")
+    error: Optional[str] = None
+
+
+class IndoorTemperatureDataBatchResponse(BaseModel):
+    """Schéma pour la réponse d'une ingestion par lots"""
+    success: bool
+    received: int
+    inserted: int
+    rejected: int
+    results: List[BatchItemStatus] = Field(default_factory=list)
+
+
 # ==================== SCHÉMAS POUR LES DONNÉES TEMPORELLES ====================
 
 class Temperature24hItem(BaseModel):
@@ -95,8 +156,18 @@ class Prediction24hItem(BaseModel):
 
 # ==================== DASHBOARD ====================
 
+class DashboardAlert(BaseModel):
+    """Schéma pour une alerte active du dashboard"""
+    id: Optional[int] = None  # Absent pour l'alerte "aucune donnée" (non journalisée)
+    rule: Optional[str] = None
+    type: str  # CRITICAL | WARNING | INFO
+    message: str
+    timestamp: str
+
+
 class DashboardResponse(BaseModel):
     """Schéma pour la réponse du dashboard"""
+    zone_id: str = DEFAULT_ZONE
     current_temperature: Optional[float] = None
     outdoor_temperature: Optional[float] = None
     heater_status: str = "OFF"
@@ -108,6 +179,8 @@ class DashboardResponse(BaseModel):
     last_update: Optional[datetime] = None
     temperature_24h: List[Temperature24hItem] = Field(default_factory=list)
     prediction_24h: List[Prediction24hItem] = Field(default_factory=list)
+    alerts: List[DashboardAlert] = Field(default_factory=list)
+    query_count: Optional[int] = Field(None, description="Nombre de requêtes SQL utilisées pour ce dashboard")
 
 
 # ==================== SCHÉMAS POUR LES MISES À JOUR ====================
@@ -0,0 +1,20 @@
+"""
+Schémas Pydantic pour la dimension zone (pièce, site...)
+"""
+from typing import Annotated
+from fastapi import Query
+from pydantic import StringConstraints
+from models.zone import DEFAULT_ZONE, ZONE_ID_LENGTH
+
+ZONE_ID_PATTERN = r"^[A-Za-z0-9_.:-]+$"
+
+# Identifiant de zone dans un corps de requête
+ZoneId = Annotated[str, StringConstraints(min_length=1, max_length=ZONE_ID_LENGTH, pattern=ZONE_ID_PATTERN)]
+
+# Identifiant de zone en paramètre de requête (?zone_id=...), zone par défaut si absent
+ZoneQuery = Annotated[str, Query(
+    min_length=1,
+    max_length=ZONE_ID_LENGTH,
+    pattern=ZONE_ID_PATTERN,
+    description=f"Zone (pièce / site), '{DEFAULT_ZONE}' par défaut"
+)]
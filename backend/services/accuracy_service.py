@@ -0,0 +1,237 @@
+"""
+Service de précision des prévisions (MAE, RMSE, biais, MAPE)
+Moyennes horaires réelles (rollup horaire) et prédictions sont alignées sur un axe horaire
+en tableaux NumPy ; les indicateurs par heure de la journée, par jour et par mois sont
+calculés sur ces tableaux, sans boucle par heure ni aller-retour par jour.
+Les erreurs horaires des journées closes sont mises en cache : seules les journées
+absentes du cache ou en cours sont relues en base ; une journée est retirée du cache
+après le commit d'une mesure ou d'une prédiction datée de ce jour
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from config.settings import settings
+from models.rollup import TemperatureRollupHourly
+from models.temperature import TemperaturePrediction
+from models.zone import DEFAULT_ZONE
+from services.rollup_service import day_start
+from utils.metrics import record_cache
+
+HOURS_PER_DAY = 24
+
+# Sommes additives d'un groupe d'heures (combinables entre jours, mois, heures de la journée)
+SUM_HOURS, SUM_ERROR, SUM_ABS, SUM_SQUARE, SUM_APE, SUM_APE_HOURS = range(6)
+
+# (zone_id, jour) -> tableau (2, 24) : erreurs (prédit - réel) et moyennes réelles, NaN si absentes
+_cache: "OrderedDict[Tuple[str, datetime], np.ndarray]" = OrderedDict()
+_cache_lock = threading.Lock()
+# (zone_id, jour) -> jeton du chargement en cours ; retiré par une écriture du jour commitée pendant le chargement
+_pending: Dict[Tuple[str, datetime], object] = {}
+_SESSION_DAYS_KEY = "accuracy_days"  # session.info : (zone, jour) écrits, à retirer après le commit
+
+
+def _day_bounds(start: datetime, end: datetime) -> Tuple[datetime, datetime]:
+    """Journées entières couvrant [start, end["""
+    first, last = day_start(start), day_start(end)
+    if last < end:
+        last += timedelta(days=1)
+    return first, last
+
+
+def _hour_index(moments: List[datetime], origin: datetime) -> np.ndarray:
+    """Rang horaire de chaque date depuis origin"""
+    hours = np.array(moments, dtype="datetime64[s]").astype("datetime64[h]")
+    return (hours - np.datetime64(origin, "h")).astype(np.int64)
+
+
+# ==================== CHARGEMENT ====================
+
+def _load_errors(db: Session, start: datetime, days: int, zone_id: str) -> np.ndarray:
+    """
+    Séries alignées des journées [start, start + days[ (une requête par table)
+    Retourne un tableau (days, 2, 24) : erreur prédit - réel et moyenne réelle de chaque heure
+    """
+    end = start + timedelta(days=days)
+    actual = np.full(days * HOURS_PER_DAY, np.nan)
+    predicted = np.full(days * HOURS_PER_DAY, np.nan)
+
+    r = TemperatureRollupHourly
+    rows = db.query(r.bucket_start, r.temp_sum, r.sample_count).filter(
+        r.zone_id == zone_id,
+        r.bucket_start >= start,
+        r.bucket_start < end,
+        r.sample_count > 0
+    ).all()
+    if rows:
+        hours, sums, counts = zip(*rows)
+        actual[_hour_index(hours, start)] = np.array(sums, dtype=float) / np.array(counts, dtype=float)
+
+    p = TemperaturePrediction
+    rows = db.query(p.forecast_at, p.predicted_temp).filter(
+        p.zone_id == zone_id,
+        p.forecast_at >= start,
+        p.forecast_at < end,
+        p.predicted_temp.isnot(None)
+    ).all()
+    if rows:
+        hours, temps = zip(*rows)
+        predicted[_hour_index(hours, start)] = np.array(temps, dtype=float)
+
+    aligned = np.stack([predicted - actual, actual]).reshape(2, days, HOURS_PER_DAY)
+    return aligned.transpose(1, 0, 2)
+
+
+def _daily_errors(db: Session, start: datetime, days: int, zone_id: str) -> np.ndarray:
+    """
+    Séries alignées des journées [start, start + days[, journées closes servies depuis le cache
+    Les journées manquantes sont relues en une seule fois (de la première à la dernière manquante)
+    """
+    today = day_start(datetime.now())
+    result = np.empty((days, 2, HOURS_PER_DAY))
+    missing = []
+    token = object()
+    with _cache_lock:
+        for index in range(days):
+            key = (zone_id, start + timedelta(days=index))
+            cached = _cache.get(key)
+            if cached is None:
+                missing.append(index)
+                _pending[key] = token
+            else:
+                _cache.move_to_end(key)
+                result[index] = cached
+    record_cache("forecast_accuracy", not missing)
+    if not missing:
+        return result
+
+    first, last = missing[0], missing[-1] + 1
+    keys = [(zone_id, start + timedelta(days=index)) for index in missing]
+    try:
+        loaded = _load_errors(db, start + timedelta(days=first), last - first, zone_id)
+    except Exception:
+        with _cache_lock:
+            for key in keys:
+                if _pending.get(key) is token:
+                    del _pending[key]
+        raise
+    with _cache_lock:
+        for index, key in zip(missing, keys):
+            result[index] = loaded[index - first]
+            # Jeton retiré : une écriture du jour a été commitée pendant le chargement
+            if _pending.get(key) is not token:
+                continue
+            del _pending[key]
+            if key[1] < today:
+                _cache[key] = loaded[index - first].copy()
+        while len(_cache) > settings.ACCURACY_CACHE_DAYS:
+            _cache.popitem(last=False)
+    return result
+
+
+def clear_accuracy_cache() -> None:
+    """Vide le cache (après un backfill ou une correction de données passées)"""
+    with _cache_lock:
+        _cache.clear()
+        _pending.clear()
+
+
+def invalidate_accuracy(db: Session, zone_days: Iterable[Tuple[str, datetime]]) -> None:
+    """(zone, jour) écrits dans la transaction de db : retirés du cache après le commit"""
+    db.info.setdefault(_SESSION_DAYS_KEY, set()).update(zone_days)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_session_days(session: Session):
+    zone_days = session.info.pop(_SESSION_DAYS_KEY, None)
+    if zone_days:
+        with _cache_lock:
+            for key in zone_days:
+                _cache.pop(key, None)
+                _pending.pop(key, None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_session_days(session: Session):
+    session.info.pop(_SESSION_DAYS_KEY, None)
+
+
+# ==================== INDICATEURS ====================
+
+def _partial_sums(errors: np.ndarray, actual: np.ndarray, axis: int) -> np.ndarray:
+    """Sommes additives (SUM_*) des heures renseignées le long de axis"""
+    valid = ~np.isnan(errors)
+    error = np.where(valid, errors, 0.0)
+    # MAPE : heures dont la moyenne réelle n'est pas nulle
+    ape_valid = valid & (np.nan_to_num(actual) != 0)
+    ape = np.abs(error) / np.where(ape_valid, np.abs(actual), 1.0)
+    return np.stack([
+        valid.sum(axis=axis),
+        error.sum(axis=axis),
+        np.abs(error).sum(axis=axis),
+        (error * error).sum(axis=axis),
+        np.where(ape_valid, ape, 0.0).sum(axis=axis),
+        ape_valid.sum(axis=axis)
+    ], axis=-1)
+
+
+def _metrics(sums: np.ndarray) -> List[Dict]:
+    """MAE, RMSE, biais (°C) et MAPE (%) de chaque ligne de sommes partielles"""
+    hours = sums[:, SUM_HOURS]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        columns = {
+            "mae": sums[:, SUM_ABS] / hours,
+            "rmse": np.sqrt(sums[:, SUM_SQUARE] / hours),
+            "bias": sums[:, SUM_ERROR] / hours,
+            "mape": 100 * sums[:, SUM_APE] / sums[:, SUM_APE_HOURS]
+        }
+    values = {name: np.round(column, 3).tolist() for name, column in columns.items()}
+    return [
+        {
+            "hours": int(count),
+            **{name: None if np.isnan(values[name][row]) else values[name][row] for name in columns}
+        }
+        for row, count in enumerate(hours)
+    ]
+
+
+def get_forecast_accuracy(db: Session, start: datetime, end: datetime, zone_id: str = DEFAULT_ZONE) -> Dict:
+    """
+    Précision des prévisions d'une zone sur les journées entières couvrant [start, end[
+    Erreur horaire = prédiction - moyenne réelle de l'heure (biais positif : le modèle surestime)
+    Indicateurs globaux, par heure de la journée, par jour et par mois (jours / mois sans données omis)
+    """
+    first, last = _day_bounds(start, end)
+    days = (last - first).days
+    if days <= 0:
+        raise ValueError("La date de fin doit être postérieure à la date de début")
+    if days > settings.ACCURACY_MAX_DAYS:
+        raise ValueError(f"Période trop longue : {days} jours (maximum {settings.ACCURACY_MAX_DAYS})")
+
+    daily = _daily_errors(db, first, days, zone_id)
+    errors, actual = daily[:, 0, :], daily[:, 1, :]
+    by_day = _partial_sums(errors, actual, axis=1)
+    by_hour = _partial_sums(errors, actual, axis=0)
+
+    dates = np.arange(np.datetime64(first, "D"), np.datetime64(last, "D"))
+    months = dates.astype("datetime64[M]")
+    month_starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    by_month = np.add.reduceat(by_day, month_starts, axis=0)
+
+    return {
+        "zone_id": zone_id,
+        "start": first.isoformat(),
+        "end": last.isoformat(),
+        "closed": last <= datetime.now(),
+        "summary": _metrics(by_day.sum(axis=0, keepdims=True))[0],
+        "by_hour": [{"hour": hour, **item} for hour, item in enumerate(_metrics(by_hour))],
+        "by_day": [
+            {"date": str(date), **item} for date, item in zip(dates, _metrics(by_day)) if item["hours"]
+        ],
+        "by_month": [
+            {"month": str(month), **item} for month, item in zip(months[month_starts], _metrics(by_month)) if item["hours"]
+        ]
+    }
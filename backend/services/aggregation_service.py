@@ -0,0 +1,243 @@
+"""
+Service d'agrégation temporelle pour les graphiques de l'historique
+Le regroupement par intervalle (5 min, heure, jour, semaine) est fait en SQL
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import Integer, cast, func, literal, literal_column
+from sqlalchemy.orm import Session
+from config.settings import settings
+from models.temperature import TemperaturePrediction
+from models.zone import DEFAULT_ZONE
+from services.archive_service import readings_source
+from utils.downsampling import lttb
+
+# Taille des intervalles en secondes
+BUCKETS = {
+    "5min": 300,
+    "hour": 3600,
+    "day": 86400,
+    "week": 604800,
+}
+
+# Le 01/01/1970 est un jeudi : décalage de 4 jours pour que les semaines commencent le lundi
+WEEK_OFFSET = 4 * 86400
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _dialect(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def epoch_seconds_expression(db: Session, column):
+    """Expression SQL : nombre de secondes depuis 1970 (sans conversion de fuseau horaire)"""
+    dialect = _dialect(db)
+    if dialect == "mysql":
+        return func.timestampdiff(
+            literal_column("SECOND"), literal("1970-01-01 00:00:00"), column, type_=Integer
+        )
+    if dialect == "sqlite":
+        return cast(func.strftime("%s", column), Integer)
+    return cast(func.extract("epoch", column), Integer)
+
+
+def bucket_start_expression(epoch, bucket: str):
+    """Expression SQL : début de l'intervalle (en secondes depuis 1970)"""
+    size = BUCKETS[bucket]
+    offset = WEEK_OFFSET if bucket == "week" else 0
+    # Division entière : rendue selon le dialecte (FLOOR en MySQL, / entre entiers en SQLite)
+    return ((epoch - offset) // size) * size + offset
+
+
+def _to_datetime(seconds) -> str:
+    return (EPOCH + timedelta(seconds=int(seconds))).isoformat()
+
+
+def validate_range(bucket: str, start: datetime, end: datetime) -> None:
+    """Vérifie l'intervalle et la période ; lève ValueError si invalide"""
+    if bucket not in BUCKETS:
+        raise ValueError(f"Intervalle inconnu '{bucket}' (valeurs : {', '.join(BUCKETS)})")
+    if end <= start:
+        raise ValueError("La date de fin doit être postérieure à la date de début")
+    bucket_count = (end - start).total_seconds() / BUCKETS[bucket]
+    if bucket_count > settings.AGGREGATE_MAX_BUCKETS:
+        raise ValueError(
+            f"Trop d'intervalles ({int(bucket_count)}), maximum {settings.AGGREGATE_MAX_BUCKETS} : "
+            f"choisissez un intervalle plus grand"
+        )
+
+
+def aggregate_temperature(
+    db: Session,
+    bucket: str,
+    start: datetime,
+    end: datetime,
+    zone_id: str = DEFAULT_ZONE
+) -> List[Dict]:
+    """
+    Températures réelles d'une zone agrégées par intervalle : min / moyenne / max,
+    niveaux moyens du chauffage et du ventilateur (un niveau NULL compte comme 0, comme dans les rollups)
+    Heure / jour / semaine sur des bornes alignées : lus depuis les rollups
+    """
+    from services.rollup_service import rollup_series
+    from_rollups = rollup_series(db, bucket, start, end, zone_id)
+    if from_rollups is not None:
+        return from_rollups
+    
+    t = readings_source(db, start, end, zone_id=zone_id)
+    bucket_col = bucket_start_expression(epoch_seconds_expression(db, t.timestamp), bucket).label("bucket")
+    
+    rows = db.query(
+        bucket_col,
+        func.count(t.id).label("count"),
+        func.min(t.indoor_temp).label("min_temp"),
+        func.avg(t.indoor_temp).label("avg_temp"),
+        func.max(t.indoor_temp).label("max_temp"),
+        func.avg(func.coalesce(t.heater_level, 0)).label("avg_heater_level"),
+        func.avg(func.coalesce(t.fan_level, 0)).label("avg_fan_level")
+    ).filter(
+        t.zone_id == zone_id,
+        t.timestamp >= start,
+        t.timestamp < end
+    ).group_by(bucket_col).order_by(bucket_col).all()
+    
+    return [
+        {
+            "bucket_start": _to_datetime(row.bucket),
+            "count": row.count,
+            "min_temp": round(row.min_temp, 2) if row.min_temp is not None else None,
+            "avg_temp": round(row.avg_temp, 2) if row.avg_temp is not None else None,
+            "max_temp": round(row.max_temp, 2) if row.max_temp is not None else None,
+            "avg_heater_level": round(float(row.avg_heater_level), 2) if row.avg_heater_level is not None else None,
+            "avg_fan_level": round(float(row.avg_fan_level), 2) if row.avg_fan_level is not None else None
+        }
+        for row in rows
+    ]
+
+
+def aggregate_predictions(
+    db: Session,
+    bucket: str,
+    start: datetime,
+    end: datetime,
+    zone_id: str = DEFAULT_ZONE
+) -> List[Dict]:
+    """
+    Prédictions d'une zone agrégées par intervalle : min / moyenne / max de la température prédite,
+    niveaux moyens prévus du chauffage et du ventilateur
+    Filtré sur forecast_at : la période est lue par l'index (zone_id, forecast_at)
+    """
+    p = TemperaturePrediction
+    bucket_col = bucket_start_expression(epoch_seconds_expression(db, p.forecast_at), bucket).label("bucket")
+    
+    rows = db.query(
+        bucket_col,
+        func.count(p.id).label("count"),
+        func.min(p.predicted_temp).label("min_temp"),
+        func.avg(p.predicted_temp).label("avg_temp"),
+        func.max(p.predicted_temp).label("max_temp"),
+        func.avg(p.heater_level).label("avg_heater_level"),
+        func.avg(p.fan_speed).label("avg_fan_level")
+    ).filter(
+        p.zone_id == zone_id,
+        p.forecast_at >= start,
+        p.forecast_at < end
+    ).group_by(bucket_col).order_by(bucket_col).all()
+    
+    return [
+        {
+            "bucket_start": _to_datetime(row.bucket),
+            "count": row.count,
+            "min_temp": round(row.min_temp, 2) if row.min_temp is not None else None,
+            "avg_temp": round(row.avg_temp, 2) if row.avg_temp is not None else None,
+            "max_temp": round(row.max_temp, 2) if row.max_temp is not None else None,
+            "avg_heater_level": round(float(row.avg_heater_level), 2) if row.avg_heater_level is not None else None,
+            "avg_fan_level": round(float(row.avg_fan_level), 2) if row.avg_fan_level is not None else None
+        }
+        for row in rows
+    ]
+
+
+def get_aggregated_history(
+    db: Session,
+    bucket: str,
+    start: datetime,
+    end: datetime,
+    series: str = "both",
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    """Séries agrégées (réelle et/ou prédite) d'une zone pour une période"""
+    validate_range(bucket, start, end)
+    result = {
+        "zone_id": zone_id,
+        "bucket": bucket,
+        "start": start.isoformat(),
+        "end": end.isoformat()
+    }
+    if series in ("real", "both"):
+        result["temperature"] = aggregate_temperature(db, bucket, start, end, zone_id)
+    if series in ("predicted", "both"):
+        result["predictions"] = aggregate_predictions(db, bucket, start, end, zone_id)
+    return result
+
+
+def get_downsampled_series(
+    db: Session,
+    series: str,
+    start: datetime,
+    end: datetime,
+    points: int,
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    """
+    Série brute d'une zone réduite à `points` points au maximum (LTTB)
+    series : "real" (mesures) ou "predicted" (prédictions)
+    La série brute de la période est chargée en mémoire avant réduction : période limitée
+    à DOWNSAMPLE_MAX_DAYS jours (au-delà, utiliser l'agrégation par intervalle)
+    """
+    if series not in ("real", "predicted"):
+        raise ValueError("series doit valoir 'real' ou 'predicted'")
+    if end <= start:
+        raise ValueError("La date de fin doit être postérieure à la date de début")
+    if end - start > timedelta(days=settings.DOWNSAMPLE_MAX_DAYS):
+        raise ValueError(
+            f"Période trop longue : maximum {settings.DOWNSAMPLE_MAX_DAYS} jours "
+            f"(utiliser /history/aggregate au-delà)"
+        )
+    points = max(3, min(points, settings.DOWNSAMPLE_MAX_POINTS))
+    stream_options = {"stream_results": True, "yield_per": settings.STREAM_YIELD_PER}
+    
+    if series == "real":
+        t = readings_source(db, start, end, zone_id=zone_id)
+        query = db.query(epoch_seconds_expression(db, t.timestamp), t.indoor_temp).filter(
+            t.zone_id == zone_id,
+            t.timestamp >= start,
+            t.timestamp < end
+        ).order_by(t.timestamp)
+    else:
+        p = TemperaturePrediction
+        query = db.query(epoch_seconds_expression(db, p.forecast_at), p.predicted_temp).filter(
+            p.zone_id == zone_id,
+            p.forecast_at >= start,
+            p.forecast_at < end
+        ).order_by(p.forecast_at)
+    
+    # Lecture par paquets en (x, y) compacts, sans objets ORM
+    raw = [
+        (float(x), float(y))
+        for x, y in db.execute(query.statement, execution_options=stream_options)
+        if x is not None and y is not None
+    ]
+    sampled = lttb(raw, points)
+    
+    return {
+        "zone_id": zone_id,
+        "series": series,
+        "raw_points": len(raw),
+        "points": len(sampled),
+        "data": [
+            {"timestamp": _to_datetime(x), "value": round(y, 2)}
+            for x, y in sampled
+        ]
+    }
@@ -0,0 +1,364 @@
+"""
+Moteur d'alertes évalué à l'écriture des mesures (journal AlertLog)
+- règles configurables (config/settings.py) : capteur silencieux, température basse / haute,
+  chauffage à haut niveau prolongé, écart entre la mesure et la prédiction de l'heure
+- l'état de chaque règle est gardé en mémoire par zone : une mesure est évaluée sans relire l'historique
+- seules les transitions sont écrites, dans la transaction de la mesure :
+  une ligne à la levée, cleared_at à la disparition (pas de doublon tant que l'alerte est active)
+- le capteur silencieux (aucune mesure reçue) est détecté par une vérification périodique
+L'état d'une zone est chargé depuis la table au premier usage,
+et rechargé si une transaction qui l'a modifié est annulée
+"""
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+from config.settings import settings
+from database.async_database import AsyncSessionLocal
+from models.alert import AlertLog
+from models.temperature import TemperaturePrediction
+from models.zone import DEFAULT_ZONE, ZoneState
+from utils.data_version import bump_data_version
+
+RULE_STALE = "stale"
+RULE_LOW_TEMP = "low_temp"
+RULE_HIGH_TEMP = "high_temp"
+RULE_HEATER_SUSTAINED = "heater_sustained"
+RULE_FORECAST_DIVERGENCE = "forecast_divergence"
+
+RULE_SEVERITY = {
+    RULE_STALE: "WARNING",
+    RULE_LOW_TEMP: "WARNING",
+    RULE_HIGH_TEMP: "WARNING",
+    RULE_HEATER_SUSTAINED: "INFO",
+    RULE_FORECAST_DIVERGENCE: "WARNING",
+}
+
+PREDICTION_CACHE_HOURS = 48  # Prédictions horaires gardées par zone pour la règle d'écart
+_SESSION_ZONES_KEY = "alert_zones"  # session.info : zones modifiées dans la transaction en cours
+
+HourKey = Tuple[int, int, int, int]
+
+
+class ZoneAlerts:
+    """État des règles d'une zone"""
+
+    def __init__(self, active: Dict[str, datetime], last_timestamp: Optional[datetime]):
+        self.active = active  # règle -> raised_at des alertes actives
+        self.last_timestamp = last_timestamp  # dernière mesure évaluée
+        # Début de la période de chauffage à haut niveau en cours
+        self.heater_high_since: Optional[datetime] = active.get(RULE_HEATER_SUSTAINED)
+        self.predictions: Dict[HourKey, Optional[float]] = {}
+
+
+class AlertEngine:
+    """
+    Règles d'alerte d'une ou plusieurs zones
+    on_readings / on_predictions / check_staleness écrivent dans la session de l'appelant (sans commit)
+    """
+
+    def __init__(self, check_seconds: int):
+        self.check_seconds = check_seconds
+        self._zones: Dict[str, ZoneAlerts] = {}
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    # ==================== ÉTAT ====================
+
+    def _zone(self, db: Session, zone_id: str) -> ZoneAlerts:
+        """État d'une zone, chargé depuis AlertLog et l'état courant au premier usage"""
+        with self._lock:
+            zone = self._zones.get(zone_id)
+        if zone is not None:
+            return zone
+
+        active = dict(db.query(AlertLog.rule, AlertLog.raised_at).filter(
+            AlertLog.zone_id == zone_id,
+            AlertLog.cleared_at.is_(None)
+        ).all())
+        state = db.get(ZoneState, zone_id)
+        zone = ZoneAlerts(active, state.timestamp if state else None)
+        with self._lock:
+            return self._zones.setdefault(zone_id, zone)
+
+    def invalidate(self, zone_ids: Optional[Iterable[str]] = None) -> None:
+        """Oublie l'état de zones (toutes par défaut) : rechargé depuis la table au prochain usage"""
+        with self._lock:
+            if zone_ids is None:
+                self._zones.clear()
+            else:
+                for zone_id in zone_ids:
+                    self._zones.pop(zone_id, None)
+
+    @staticmethod
+    def _touch(db: Session, zone_id: str) -> None:
+        db.info.setdefault(_SESSION_ZONES_KEY, set()).add(zone_id)
+
+    # ==================== RÈGLES ====================
+
+    @staticmethod
+    def _set(
+        zone: ZoneAlerts,
+        rule: str,
+        active: bool,
+        at: datetime,
+        transitions: List[Tuple],
+        message: Optional[str] = None,
+        value: Optional[float] = None
+    ) -> None:
+        """Lève ou clôt une alerte si son état change"""
+        if active and rule not in zone.active:
+            zone.active[rule] = at
+            transitions.append(("raise", rule, at, message, value))
+        elif not active and rule in zone.active:
+            del zone.active[rule]
+            transitions.append(("clear", rule, at, None, None))
+
+    def _evaluate_reading(self, zone: ZoneAlerts, row: Dict, transitions: List[Tuple]) -> None:
+        timestamp = row["timestamp"]
+        if zone.last_timestamp is not None and timestamp < zone.last_timestamp:
+            return  # Mesure en retard : l'état reflète déjà une mesure plus récente
+        zone.last_timestamp = timestamp
+        self._set(zone, RULE_STALE, False, timestamp, transitions)
+
+        temp = row["indoor_temp"]
+        margin = settings.ALERT_HYSTERESIS
+        if temp is not None:
+            if temp < settings.ALERT_LOW_TEMP:
+                self._set(zone, RULE_LOW_TEMP, True, timestamp, transitions, f"⚠️ Température trop basse: {temp}°C", temp)
+            elif temp >= settings.ALERT_LOW_TEMP + margin:
+                self._set(zone, RULE_LOW_TEMP, False, timestamp, transitions)
+
+            if temp > settings.ALERT_HIGH_TEMP:
+                self._set(zone, RULE_HIGH_TEMP, True, timestamp, transitions, f"⚠️ Température trop élevée: {temp}°C", temp)
+            elif temp <= settings.ALERT_HIGH_TEMP - margin:
+                self._set(zone, RULE_HIGH_TEMP, False, timestamp, transitions)
+
+        # Chauffage à haut niveau sans interruption
+        if (row.get("heater_level") or 0) > settings.ALERT_HEATER_LEVEL:
+            if zone.heater_high_since is None:
+                zone.heater_high_since = timestamp
+            minutes = (timestamp - zone.heater_high_since).total_seconds() / 60
+            if minutes >= settings.ALERT_HEATER_MINUTES:
+                self._set(
+                    zone, RULE_HEATER_SUSTAINED, True, timestamp, transitions,
+                    f"ℹ️ Chauffage à haut niveau depuis plus de {settings.ALERT_HEATER_MINUTES} minutes",
+                    round(minutes)
+                )
+        else:
+            zone.heater_high_since = None
+            self._set(zone, RULE_HEATER_SUSTAINED, False, timestamp, transitions)
+
+        # Écart avec la prédiction de l'heure de la mesure
+        if settings.ALERT_FORECAST_DIVERGENCE and temp is not None:
+            predicted = zone.predictions.get(_hour_key(timestamp))
+            gap = abs(temp - predicted) if predicted is not None else None
+            if gap is not None and gap > settings.ALERT_FORECAST_DIVERGENCE:
+                self._set(
+                    zone, RULE_FORECAST_DIVERGENCE, True, timestamp, transitions,
+                    f"⚠️ Écart de {gap:.1f}°C avec la prédiction ({predicted}°C)", round(gap, 2)
+                )
+            elif gap is None or gap <= settings.ALERT_FORECAST_DIVERGENCE - margin:
+                # Sans prédiction pour l'heure de la mesure, l'écart n'est plus mesurable
+                self._set(zone, RULE_FORECAST_DIVERGENCE, False, timestamp, transitions)
+
+    def _load_predictions(self, db: Session, zone_id: str, zone: ZoneAlerts, rows: List[Dict]) -> None:
+        """Charge en une requête les prédictions des heures des mesures absentes du cache"""
+        p = TemperaturePrediction
+        missing = {_hour_key(row["timestamp"]) for row in rows} - zone.predictions.keys()
+        if not missing:
+            return
+        found = dict(db.query(p.forecast_at, p.predicted_temp).filter(
+            p.zone_id == zone_id,
+            p.forecast_at.in_([datetime(*key) for key in missing])
+        ).all())
+        with self._lock:
+            for key in sorted(missing):
+                zone.predictions[key] = found.get(datetime(*key))
+            _trim_predictions(zone)
+
+    # ==================== ÉCRITURES (sans commit) ====================
+
+    def _write(self, db: Session, zone_id: str, transitions: List[Tuple]) -> int:
+        for kind, rule, at, message, value in transitions:
+            if kind == "raise":
+                db.execute(insert(AlertLog).values(
+                    zone_id=zone_id,
+                    rule=rule,
+                    severity=RULE_SEVERITY[rule],
+                    message=message,
+                    value=value,
+                    raised_at=at
+                ))
+                print(f"🚨 Alerte {rule} ({zone_id}) : {message}")
+            else:
+                db.execute(update(AlertLog).where(
+                    AlertLog.zone_id == zone_id,
+                    AlertLog.rule == rule,
+                    AlertLog.cleared_at.is_(None)
+                ).values(cleared_at=at))
+        return len(transitions)
+
+    def on_readings(self, db: Session, rows: List[Dict]) -> int:
+        """
+        Évalue les règles sur des mesures écrites dans la transaction de db
+        À appeler avant la mise à jour de l'état courant des zones ; retourne le nombre de transitions
+        """
+        if not settings.ALERTS_ENABLED:
+            return 0
+        by_zone: Dict[str, List[Dict]] = {}
+        for row in rows:
+            by_zone.setdefault(row.get("zone_id") or DEFAULT_ZONE, []).append(row)
+
+        written = 0
+        for zone_id, zone_rows in by_zone.items():
+            zone = self._zone(db, zone_id)
+            zone_rows.sort(key=lambda row: row["timestamp"])
+            if settings.ALERT_FORECAST_DIVERGENCE:
+                self._load_predictions(db, zone_id, zone, zone_rows)
+
+            transitions: List[Tuple] = []
+            with self._lock:
+                for row in zone_rows:
+                    self._evaluate_reading(zone, row, transitions)
+            self._touch(db, zone_id)
+            written += self._write(db, zone_id, transitions)
+        return written
+
+    def on_predictions(self, db: Session, rows: List[Dict]) -> None:
+        """Met à jour les prédictions en cache des zones chargées (règle d'écart)"""
+        with self._lock:
+            for row in rows:
+                zone_id = row.get("zone_id") or DEFAULT_ZONE
+                zone = self._zones.get(zone_id)
+                if zone is None:
+                    continue
+                zone.predictions[(row["year"], row["month"], row["day"], row["hour"])] = row.get("predicted_temp")
+                _trim_predictions(zone)
+                self._touch(db, zone_id)
+
+    def check_staleness(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Lève l'alerte capteur silencieux des zones sans mesure récente ; retourne le nombre d'alertes levées"""
+        if not settings.ALERTS_ENABLED:
+            return 0
+        now = now or datetime.now()
+        threshold = now - timedelta(minutes=settings.ALERT_STALE_MINUTES)
+        silent = db.query(ZoneState.zone_id, ZoneState.timestamp).filter(ZoneState.timestamp < threshold).all()
+
+        raised = 0
+        for zone_id, last_timestamp in silent:
+            zone = self._zone(db, zone_id)
+            transitions: List[Tuple] = []
+            with self._lock:
+                # Une mesure a pu être évaluée depuis la lecture de l'état courant
+                if zone.last_timestamp is None or zone.last_timestamp < threshold:
+                    minutes = int((now - last_timestamp).total_seconds() // 60)
+                    self._set(
+                        zone, RULE_STALE, True, now, transitions,
+                        f"⚠️ Aucune mesure depuis {minutes} minutes", minutes
+                    )
+            if transitions:
+                self._touch(db, zone_id)
+                raised += self._write(db, zone_id, transitions)
+        return raised
+
+    # ==================== VÉRIFICATION PÉRIODIQUE ====================
+
+    async def start(self):
+        """Démarre la vérification des capteurs silencieux (appelé depuis le lifespan)"""
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.check_seconds)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping:
+                return
+            try:
+                await self.run_staleness_check()
+            except Exception as e:
+                print(f"❌ ERREUR lors de la vérification des alertes: {str(e)}")
+
+    async def run_staleness_check(self) -> int:
+        async with AsyncSessionLocal() as db:
+            raised = await db.run_sync(self.check_staleness)
+            await db.commit()
+        if raised:
+            bump_data_version("alert")
+        return raised
+
+
+def _hour_key(moment: datetime) -> HourKey:
+    return moment.year, moment.month, moment.day, moment.hour
+
+
+def _trim_predictions(zone: ZoneAlerts) -> None:
+    while len(zone.predictions) > PREDICTION_CACHE_HOURS:
+        del zone.predictions[min(zone.predictions)]
+
+
+# Instance globale du moteur
+alert_engine = AlertEngine(check_seconds=settings.ALERT_CHECK_SECONDS)
+
+
+# L'état en mémoire suit les transactions : oublié (rechargé depuis la table) en cas d'annulation
+@event.listens_for(Session, "after_commit")
+def _forget_session_zones(session: Session):
+    session.info.pop(_SESSION_ZONES_KEY, None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _reload_session_zones(session: Session):
+    zones = session.info.pop(_SESSION_ZONES_KEY, None)
+    if zones:
+        alert_engine.invalidate(zones)
+
+
+# ==================== LECTURE ====================
+
+def get_active_alerts(db: Session, zone_id: str = DEFAULT_ZONE) -> List[AlertLog]:
+    """Alertes actives d'une zone, les plus récentes d'abord"""
+    return db.query(AlertLog).filter(
+        AlertLog.zone_id == zone_id,
+        AlertLog.cleared_at.is_(None)
+    ).order_by(AlertLog.raised_at.desc()).all()
+
+
+def get_alert_log(
+    db: Session,
+    limit: int = 50,
+    active_only: bool = False,
+    zone_id: str = DEFAULT_ZONE
+) -> List[AlertLog]:
+    """Journal des alertes d'une zone (actives et closes), les plus récentes d'abord"""
+    query = db.query(AlertLog).filter(AlertLog.zone_id == zone_id)
+    if active_only:
+        query = query.filter(AlertLog.cleared_at.is_(None))
+    return query.order_by(AlertLog.raised_at.desc(), AlertLog.id.desc()).limit(limit).all()
+
+
+def format_alert(alert: AlertLog) -> Dict:
+    """Alerte au format du dashboard"""
+    return {
+        "id": alert.id,
+        "rule": alert.rule,
+        "type": alert.severity,
+        "message": alert.message,
+        "timestamp": alert.raised_at.strftime("%Y-%m-%d %H:%M:%S")
+    }
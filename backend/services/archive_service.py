@@ -0,0 +1,255 @@
+"""
+Service d'archivage des mesures anciennes et routage des lectures
+- les mesures plus anciennes que ARCHIVE_AFTER_DAYS sont déplacées vers l'archive froide
+- archive_state mémorise la frontière : tout ce qui est avant archived_before est archivé
+- readings_source() choisit la table à lire selon la période demandée :
+  la table chaude seule si la période commence après la frontière (plus une tranche de marge),
+  sinon l'union des deux (chaque branche filtrée sur la période, la zone et le curseur de pagination
+  pour n'utiliser que ses propres index)
+- la frontière est gardée en mémoire : vidée au commit d'un archivage du processus,
+  relue après ARCHIVE_BOUNDARY_TTL_SECONDS pour un archivage lancé depuis un autre processus
+
+Archivage en ligne de commande (depuis le dossier backend) :
+    python -m services.archive_service archive [--before 2025-01-01]
+    python -m services.archive_service status
+"""
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from sqlalchemy import and_, desc, event, func, or_, select, union_all
+from sqlalchemy.orm import Session, aliased
+from config.settings import settings
+from models.archive import IndoorTemperatureArchive, ArchiveState
+from models.temperature import IndoorTemperatureData
+
+ARCHIVE_STATE_NAME = "readings"
+READING_COLUMNS = (
+    "id", "zone_id", "timestamp", "year", "month", "day", "hour",
+    "indoor_temp", "heater_level", "fan_level"
+)
+
+# (instant de lecture, frontière) : None tant que la frontière n'a pas été lue
+_boundary_cache: Optional[Tuple[float, Optional[datetime]]] = None
+_boundary_lock = threading.Lock()
+_SESSION_BOUNDARY_KEY = "archive_boundary"  # session.info : frontière avancée, cache à vider après le commit
+
+
+# ==================== FRONTIÈRE DE L'ARCHIVE ====================
+
+def _read_archive_boundary(db: Session) -> Optional[datetime]:
+    return db.execute(
+        select(ArchiveState.archived_before).where(ArchiveState.name == ARCHIVE_STATE_NAME)
+    ).scalar()
+
+
+def get_archive_boundary(db: Session) -> Optional[datetime]:
+    """
+    Date avant laquelle les mesures sont dans l'archive (None = rien d'archivé)
+    Gardée en mémoire : vidée au commit d'un archivage de ce processus ; un archivage lancé
+    depuis un autre processus (ligne de commande) est vu après ARCHIVE_BOUNDARY_TTL_SECONDS.
+    En attendant, la marge d'une tranche de readings_source() couvre une avance de la frontière
+    de moins de ARCHIVE_CHUNK_DAYS (archivage périodique)
+    """
+    global _boundary_cache
+    with _boundary_lock:
+        cached = _boundary_cache
+    if cached is not None and time.monotonic() - cached[0] < settings.ARCHIVE_BOUNDARY_TTL_SECONDS:
+        return cached[1]
+
+    read_at = time.monotonic()
+    boundary = _read_archive_boundary(db)
+    with _boundary_lock:
+        # Un commit d'archivage pendant la lecture a vidé le cache : ne pas y remettre l'ancienne valeur
+        if _boundary_cache is cached:
+            _boundary_cache = (read_at, boundary)
+    return boundary
+
+
+def clear_archive_boundary() -> None:
+    """Oublie la frontière gardée en mémoire (relue à la prochaine lecture)"""
+    global _boundary_cache
+    with _boundary_lock:
+        _boundary_cache = None
+
+
+def _set_archive_boundary(db: Session, boundary: datetime) -> None:
+    state = db.get(ArchiveState, ARCHIVE_STATE_NAME)
+    if state is None:
+        db.add(ArchiveState(name=ARCHIVE_STATE_NAME, archived_before=boundary))
+    elif boundary > state.archived_before:
+        state.archived_before = boundary
+    db.info[_SESSION_BOUNDARY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_session_boundary(session: Session):
+    if session.info.pop(_SESSION_BOUNDARY_KEY, None):
+        clear_archive_boundary()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_session_boundary(session: Session):
+    session.info.pop(_SESSION_BOUNDARY_KEY, None)
+
+
+# ==================== ROUTAGE DES LECTURES ====================
+
+def date_bounds(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    day: Optional[int] = None
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Période [start, end) couverte par des filtres year / month / day (None si non bornée)"""
+    if not year:
+        return None, None
+    try:
+        if month and day:
+            start = datetime(year, month, day)
+            return start, start + timedelta(days=1)
+        if month:
+            return datetime(year, month, 1), datetime(year + month // 12, month % 12 + 1, 1)
+        return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    except ValueError:
+        return None, None
+
+
+def readings_source(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    zone_id: Optional[str] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+    limit: Optional[int] = None
+):
+    """
+    Entité à interroger pour les mesures de [start, end)
+    - IndoorTemperatureData si la période ne chevauche pas l'archive
+    - sinon un alias de IndoorTemperatureData sur l'union table chaude + archive
+    S'utilise comme le modèle : db.query(t).filter(t.timestamp >= ...)
+    La table chaude seule n'est choisie qu'à plus d'une tranche de la frontière :
+    une tranche archivée entre la lecture de la frontière et la requête ne peut pas
+    faire disparaître de mesures de la période
+    Filtres reportés dans chaque branche de l'union (lecture par l'index (zone_id, timestamp)),
+    à appliquer aussi par l'appelant sur l'entité retournée :
+    - zone_id : mesures d'une seule zone
+    - before : curseur (timestamp, id), mesures strictement antérieures
+    - limit : les `limit` mesures les plus récentes de chaque branche (lecture du plus récent au plus ancien)
+    """
+    boundary = get_archive_boundary(db)
+    if boundary is None:
+        return IndoorTemperatureData
+    if start is not None and start >= boundary + timedelta(days=settings.ARCHIVE_CHUNK_DAYS):
+        return IndoorTemperatureData
+
+    branches = []
+    for table in (IndoorTemperatureData.__table__, IndoorTemperatureArchive.__table__):
+        branch = select(*[table.c[name] for name in READING_COLUMNS])
+        if zone_id is not None:
+            branch = branch.where(table.c.zone_id == zone_id)
+        if start is not None:
+            branch = branch.where(table.c.timestamp >= start)
+        if end is not None:
+            branch = branch.where(table.c.timestamp < end)
+        if before is not None:
+            before_ts, before_id = before
+            branch = branch.where(or_(
+                table.c.timestamp < before_ts,
+                and_(table.c.timestamp == before_ts, table.c.id < before_id)
+            ))
+        if limit is not None:
+            # Sous-requête : ORDER BY / LIMIT ne sont pas admis dans une branche d'UNION sous SQLite
+            ranked = branch.order_by(desc(table.c.timestamp), desc(table.c.id)).limit(limit).subquery()
+            branch = select(*ranked.c)
+        branches.append(branch)
+
+    return aliased(IndoorTemperatureData, union_all(*branches).subquery("readings"))
+
+
+# ==================== ARCHIVAGE ====================
+
+def archive_readings(db: Session, before: Optional[datetime] = None, chunk_days: Optional[int] = None) -> int:
+    """
+    Déplace les mesures antérieures à `before` (minuit) vers l'archive, par tranches
+    Chaque tranche est copiée, supprimée de la table chaude et la frontière avancée
+    dans la même transaction : une requête sur l'union des deux tables voit chaque mesure
+    une seule fois ; une lecture en plusieurs requêtes (pagination) pendant l'archivage
+    peut en revanche manquer ou répéter les mesures de la tranche déplacée entre deux pages
+    Retourne le nombre de mesures archivées
+    """
+    chunk_days = chunk_days or settings.ARCHIVE_CHUNK_DAYS
+    before = before or datetime.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    before = before.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    hot = IndoorTemperatureData.__table__
+    archive = IndoorTemperatureArchive.__table__
+    first = db.query(func.min(hot.c.timestamp)).scalar()
+    total = 0
+
+    if first is not None:
+        chunk_start = first.replace(hour=0, minute=0, second=0, microsecond=0)
+        while chunk_start < before:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days), before)
+            in_chunk = (hot.c.timestamp >= chunk_start, hot.c.timestamp < chunk_end)
+
+            db.execute(archive.insert().from_select(
+                list(READING_COLUMNS),
+                select(*[hot.c[name] for name in READING_COLUMNS]).where(*in_chunk)
+            ))
+            moved = db.execute(hot.delete().where(*in_chunk)).rowcount
+            _set_archive_boundary(db, chunk_end)
+            db.commit()
+
+            total += moved
+            print(f"   🗄️  Archive {chunk_start:%Y-%m-%d} → {chunk_end:%Y-%m-%d} : {moved} mesures")
+            chunk_start = chunk_end
+
+    # Période vide : la frontière avance quand même
+    _set_archive_boundary(db, before)
+    db.commit()
+    return total
+
+
+def get_archive_status(db: Session) -> Dict:
+    """Frontière de l'archive et volume de chaque table"""
+    hot_count, hot_first = db.query(func.count(IndoorTemperatureData.id), func.min(IndoorTemperatureData.timestamp)).one()
+    archive_count, archive_first = db.query(
+        func.count(IndoorTemperatureArchive.id),
+        func.min(IndoorTemperatureArchive.timestamp)
+    ).one()
+    boundary = _read_archive_boundary(db)
+    return {
+        "archived_before": boundary.isoformat() if boundary else None,
+        "hot_rows": hot_count,
+        "hot_first": hot_first.isoformat() if hot_first else None,
+        "archive_rows": archive_count,
+        "archive_first": archive_first.isoformat() if archive_first else None
+    }
+
+
+def _parse_args(args):
+    options = {}
+    for flag in ("--before",):
+        if flag in args:
+            options[flag[2:]] = datetime.fromisoformat(args[args.index(flag) + 1])
+    return options
+
+
+if __name__ == "__main__":
+    from database.database import SessionLocal
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    db = SessionLocal()
+    try:
+        if command == "archive":
+            moved = archive_readings(db, **_parse_args(sys.argv[2:]))
+            print(f"✅ {moved} mesures archivées")
+        elif command == "status":
+            for key, value in get_archive_status(db).items():
+                print(f"{key:16} {value}")
+        else:
+            print("Commandes : archive [--before AAAA-MM-JJ] | status")
+            sys.exit(1)
+    finally:
+        db.close()
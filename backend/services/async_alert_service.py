@@ -0,0 +1,22 @@
+"""
+Version asynchrone du service d'alertes (routes async def)
+Même principe que async_temperature_service : la logique de alert_service est exécutée via AsyncSession.run_sync
+"""
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.alert import AlertLog
+from models.zone import DEFAULT_ZONE
+from services import alert_service
+
+
+async def get_active_alerts(db: AsyncSession, zone_id: str = DEFAULT_ZONE) -> List[AlertLog]:
+    return await db.run_sync(alert_service.get_active_alerts, zone_id)
+
+
+async def get_alert_log(
+    db: AsyncSession,
+    limit: int = 50,
+    active_only: bool = False,
+    zone_id: str = DEFAULT_ZONE
+) -> List[AlertLog]:
+    return await db.run_sync(alert_service.get_alert_log, limit, active_only, zone_id)
@@ -0,0 +1,113 @@
+"""
+Version asynchrone du service d'historique (routes async def)
+Requêtes courtes (modes, pages, agrégats SQL) : même principe que async_temperature_service,
+via AsyncSession.run_sync.
+Services au calcul Python long (historique complet, comparaison, LTTB, précision NumPy, rapports) :
+exécutés sur une session synchrone dans le pool de threads ; via run_sync, ce calcul tournerait
+sur la boucle d'événements et bloquerait toutes les autres requêtes
+"""
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from database.database import SessionLocal
+from models.mode import mode
+from models.zone import DEFAULT_ZONE
+from services import accuracy_service, aggregation_service, history_service, report_service
+
+
+async def _run_in_threadpool(fn: Callable, *args) -> Any:
+    """Exécute fn(db, *args) dans le pool de threads, sur sa propre session synchrone"""
+    def call():
+        db = SessionLocal()
+        try:
+            return fn(db, *args)
+        finally:
+            db.close()
+    return await run_in_threadpool(call)
+
+
+# ==================== MODE UTILISATEUR ====================
+
+async def create_mode_history(db: AsyncSession, mode_value: int, zone_id: str = DEFAULT_ZONE) -> mode:
+    return await db.run_sync(history_service.create_mode_history, mode_value, zone_id)
+
+
+async def get_current_mode(db: AsyncSession, zone_id: str = DEFAULT_ZONE) -> int:
+    return await db.run_sync(history_service.get_current_mode, zone_id)
+
+
+async def get_mode_history(db: AsyncSession, limit: int = 100, zone_id: str = DEFAULT_ZONE) -> List[mode]:
+    return await db.run_sync(history_service.get_mode_history, limit, zone_id)
+
+
+# ==================== HISTORIQUE ====================
+
+async def get_history_data(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    return await _run_in_threadpool(history_service.get_history_data, year, month, day, zone_id)
+
+
+async def get_history_page(
+    db: AsyncSession,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 200,
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    return await db.run_sync(history_service.get_history_page, year, month, day, cursor, limit, zone_id)
+
+
+async def get_comparison_data(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    return await _run_in_threadpool(history_service.get_comparison_data, year, month, day, zone_id)
+
+
+# ==================== AGRÉGATION ET RAPPORTS ====================
+
+async def get_aggregated_history(
+    db: AsyncSession,
+    bucket: str,
+    start: datetime,
+    end: datetime,
+    series: str = "both",
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    return await db.run_sync(aggregation_service.get_aggregated_history, bucket, start, end, series, zone_id)
+
+
+async def get_downsampled_series(
+    series: str,
+    start: datetime,
+    end: datetime,
+    points: int,
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    return await _run_in_threadpool(aggregation_service.get_downsampled_series, series, start, end, points, zone_id)
+
+
+async def get_period_report(
+    year: int,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    return await _run_in_threadpool(report_service.get_period_report, year, month, day, zone_id)
+
+
+async def get_forecast_accuracy(
+    start: datetime,
+    end: datetime,
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    return await _run_in_threadpool(accuracy_service.get_forecast_accuracy, start, end, zone_id)
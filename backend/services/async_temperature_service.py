@@ -0,0 +1,107 @@
+"""
+Version asynchrone du service de température (routes async def)
+Chaque fonction exécute la logique de temperature_service via AsyncSession.run_sync :
+mêmes requêtes, mais les attentes réseau passent par le pilote asynchrone
+et ne bloquent ni la boucle d'événements ni un thread du pool
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.temperature import IndoorTemperatureData, TemperaturePrediction
+from models.zone import DEFAULT_ZONE
+from schemas.temperature_schemas import IndoorTemperatureDataCreate, TemperaturePredictionCreate
+from services import temperature_service
+
+
+# ==================== PRÉDICTIONS ====================
+
+async def create_prediction(db: AsyncSession, data: TemperaturePredictionCreate) -> TemperaturePrediction:
+    return await db.run_sync(temperature_service.create_prediction, data)
+
+
+async def upsert_predictions_bulk(db: AsyncSession, items: List[TemperaturePredictionCreate]) -> Dict:
+    return await db.run_sync(temperature_service.upsert_predictions_bulk, items)
+
+
+async def get_latest_prediction(db: AsyncSession, zone_id: str = DEFAULT_ZONE) -> Optional[TemperaturePrediction]:
+    return await db.run_sync(temperature_service.get_latest_prediction, zone_id)
+
+
+async def get_all_predictions(
+    db: AsyncSession,
+    limit: int = 100,
+    zone_id: str = DEFAULT_ZONE
+) -> List[TemperaturePrediction]:
+    return await db.run_sync(temperature_service.get_all_predictions, limit, zone_id)
+
+
+async def get_predictions_24h(db: AsyncSession, zone_id: str = DEFAULT_ZONE) -> List[Dict]:
+    return await db.run_sync(temperature_service.get_predictions_24h, zone_id)
+
+
+async def get_forecast(
+    db: AsyncSession,
+    start: Optional[datetime] = None,
+    hours: int = 24,
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    return await db.run_sync(temperature_service.get_forecast, start, hours, zone_id)
+
+
+# ==================== TEMPÉRATURE RÉELLE ====================
+
+async def create_temperature_data(db: AsyncSession, data: IndoorTemperatureDataCreate) -> IndoorTemperatureData:
+    return await db.run_sync(temperature_service.create_temperature_data, data)
+
+
+async def create_temperature_data_batch(db: AsyncSession, items: List[Dict[str, Any]]) -> Dict:
+    return await db.run_sync(temperature_service.create_temperature_data_batch, items)
+
+
+async def insert_temperature_rows(db: AsyncSession, rows: List[Dict]) -> int:
+    """Insertion multi-lignes sans commit (file d'ingestion)"""
+    return await db.run_sync(temperature_service.insert_temperature_rows, rows)
+
+
+async def get_latest_temperature(db: AsyncSession, zone_id: str = DEFAULT_ZONE) -> Optional[IndoorTemperatureData]:
+    return await db.run_sync(temperature_service.get_latest_temperature, zone_id)
+
+
+async def get_all_temperature_data(
+    db: AsyncSession,
+    limit: int = 100,
+    zone_id: str = DEFAULT_ZONE
+) -> List[IndoorTemperatureData]:
+    return await db.run_sync(temperature_service.get_all_temperature_data, limit, zone_id)
+
+
+async def get_temperature_24h(db: AsyncSession, zone_id: str = DEFAULT_ZONE) -> List[Dict]:
+    return await db.run_sync(temperature_service.get_temperature_24h, zone_id)
+
+
+# ==================== DASHBOARD ET CONTRÔLES ====================
+
+async def get_dashboard_data(db: AsyncSession, zone_id: str = DEFAULT_ZONE) -> Dict:
+    return await db.run_sync(temperature_service.get_dashboard_data, zone_id)
+
+
+async def get_comfort_temperature(db: AsyncSession, zone_id: str = DEFAULT_ZONE) -> Optional[float]:
+    return await db.run_sync(temperature_service.get_comfort_temperature, zone_id)
+
+
+async def update_comfort_temperature(db: AsyncSession, comfort_temp: float, zone_id: str = DEFAULT_ZONE) -> bool:
+    return await db.run_sync(temperature_service.update_comfort_temperature, comfort_temp, zone_id)
+
+
+async def update_manual_controls(
+    db: AsyncSession,
+    heater_on: bool,
+    fan_on: bool,
+    heater_level: int,
+    fan_level: int,
+    zone_id: str = DEFAULT_ZONE
+) -> bool:
+    return await db.run_sync(
+        temperature_service.update_manual_controls,
+        heater_on, fan_on, heater_level, fan_level, zone_id
+    )
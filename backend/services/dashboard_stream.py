@@ -0,0 +1,282 @@
+"""
+Diffusion en temps réel du dashboard (Server-Sent Events)
+Chaque changement est calculé une seule fois puis envoyé à tous les abonnés sous forme de delta
+Un diffuseur par zone existante : celui de la zone par défaut vit avec l'application,
+les autres sont créés au premier abonné et arrêtés au départ du dernier
+"""
+import asyncio
+import json
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, FrozenSet, Optional, Set, Tuple
+from fastapi.encoders import jsonable_encoder
+from config.settings import settings
+from database.async_database import AsyncSessionLocal
+from models.zone import DEFAULT_ZONE, ZoneState
+from services.async_temperature_service import get_dashboard_data
+from utils.data_version import add_version_listener, remove_version_listener
+
+# Champs propres au calcul, ignorés dans les deltas
+VOLATILE_FIELDS = ("query_count",)
+
+
+def format_sse(event: str, data: Dict, event_id: Optional[int] = None) -> str:
+    """Formate un message Server-Sent Events"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class DashboardBroadcaster:
+    """
+    Recalcule le dashboard d'une zone après chaque écriture (mesures, prédictions, mode)
+    et diffuse le delta à tous les abonnés
+    """
+
+    def __init__(
+        self,
+        history_size: int,
+        heartbeat_seconds: int,
+        refresh_seconds: int,
+        debounce_ms: int,
+        zone_id: str = DEFAULT_ZONE
+    ):
+        self.zone_id = zone_id
+        self.heartbeat_seconds = heartbeat_seconds
+        self.refresh_seconds = refresh_seconds
+        self.debounce = debounce_ms / 1000.0
+        
+        self._state: Optional[Dict] = None
+        self._event_id = 0
+        self._history: deque = deque(maxlen=history_size)  # (event_id, delta)
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._refresh_lock = asyncio.Lock()
+        self._users = 0  # Flux en cours (abonnés et connexions en train de s'abonner)
+        self.on_idle: Optional[Callable[["DashboardBroadcaster"], None]] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _on_data_change(self, scopes: Tuple[str, ...], zones: Optional[FrozenSet[str]]):
+        """Appelé (depuis n'importe quel thread) après une écriture"""
+        if zones is not None and self.zone_id not in zones:
+            return
+        if self._loop is not None and self._changed is not None:
+            self._loop.call_soon_threadsafe(self._changed.set)
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        self._stopping = False
+        add_version_listener(self._on_data_change)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        remove_version_listener(self._on_data_change)
+        if self._task is not None:
+            # Arrêt coopératif : pas d'annulation au milieu d'un recalcul (requête en cours)
+            self._stopping = True
+            self._changed.set()
+            await self._task
+            self._task = None
+        # Débloquer les abonnés pour fermer les connexions
+        for queue in list(self._subscribers):
+            queue.put_nowait(None)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=self.refresh_seconds)
+                # Regrouper les écritures rapprochées (ex. file d'ingestion)
+                await asyncio.sleep(self.debounce)
+            except asyncio.TimeoutError:
+                pass
+            self._changed.clear()
+            if self._stopping:
+                return
+            
+            if not self._subscribers:
+                # Personne à l'écoute : le prochain abonné recevra un snapshot frais
+                self._state = None
+                continue
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"❌ ERREUR dans le flux du dashboard: {str(e)}")
+
+    async def _compute(self) -> Dict:
+        async with AsyncSessionLocal() as db:
+            return jsonable_encoder(await get_dashboard_data(db, self.zone_id))
+
+    async def refresh(self) -> Optional[Dict]:
+        """
+        Recalcule le dashboard une fois et diffuse le delta aux abonnés
+        Retourne le delta (None si rien n'a changé)
+        """
+        async with self._refresh_lock:
+            return await self._refresh_locked(broadcast=True)
+
+    async def _refresh_locked(self, broadcast: bool) -> Optional[Dict]:
+        new_state = await self._compute()
+        old_state = self._state
+        self._state = new_state
+        if old_state is None or not broadcast:
+            return None
+        
+        delta = {
+            key: value for key, value in new_state.items()
+            if key not in VOLATILE_FIELDS and old_state.get(key) != value
+        }
+        # Champs disparus (ex. next_hour_prediction)
+        delta.update({key: None for key in old_state if key not in new_state})
+        if not delta:
+            return None
+        
+        self._event_id += 1
+        self._history.append((self._event_id, delta))
+        message = format_sse("delta", delta, self._event_id)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Client trop lent : on le déconnecte, il reprendra via Last-Event-ID
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+        return delta
+
+    def _replay_after(self, last_event_id: Optional[str]):
+        """
+        Deltas manqués depuis last_event_id
+        Retourne None si la reprise est impossible (snapshot nécessaire)
+        """
+        if last_event_id is None or self._state is None:
+            return None
+        try:
+            last_id = int(last_event_id)
+        except ValueError:
+            return None
+        if last_id > self._event_id:
+            return None  # Identifiant d'un autre processus / redémarrage
+        if last_id == self._event_id:
+            return []
+        if not self._history or last_id < self._history[0][0] - 1:
+            return None  # Trop ancien, sorti de l'historique
+        return [(event_id, delta) for event_id, delta in self._history if event_id > last_id]
+
+    async def subscribe(self, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Générateur SSE pour un client
+        Envoie un snapshot complet (ou les deltas manqués si reprise), puis les deltas et des heartbeats
+        """
+        # Compté avant toute attente : le diffuseur ne peut pas être arrêté pendant l'abonnement
+        self._users += 1
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        try:
+            # Sous le verrou : aucun delta ne peut être publié entre le snapshot et l'abonnement
+            async with self._refresh_lock:
+                replay = self._replay_after(last_event_id)
+                if replay is None and self._state is None:
+                    await self._refresh_locked(broadcast=False)
+                state, event_id = self._state, self._event_id
+                self._subscribers.add(queue)
+            
+            if replay is None:
+                yield format_sse("snapshot", state, event_id)
+            else:
+                for replay_id, delta in replay:
+                    yield format_sse("delta", delta, replay_id)
+            
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            self._subscribers.discard(queue)
+            self._users -= 1
+            if self._users == 0 and self.on_idle is not None:
+                self.on_idle(self)
+
+
+def _new_broadcaster(zone_id: str) -> DashboardBroadcaster:
+    return DashboardBroadcaster(
+        history_size=settings.STREAM_HISTORY_SIZE,
+        heartbeat_seconds=settings.STREAM_HEARTBEAT_SECONDS,
+        refresh_seconds=settings.STREAM_REFRESH_SECONDS,
+        debounce_ms=settings.STREAM_DEBOUNCE_MS,
+        zone_id=zone_id
+    )
+
+
+# Diffuseur de la zone par défaut (démarré avec l'application)
+dashboard_broadcaster = _new_broadcaster(DEFAULT_ZONE)
+
+# Un diffuseur par zone, créé et démarré au premier abonné
+_broadcasters: Dict[str, DashboardBroadcaster] = {DEFAULT_ZONE: dashboard_broadcaster}
+_stopping_tasks: Set[asyncio.Task] = set()
+
+
+async def zone_exists(zone_id: str) -> bool:
+    """Zone connue (état courant écrit) ; la zone par défaut existe toujours"""
+    if zone_id == DEFAULT_ZONE:
+        return True
+    async with AsyncSessionLocal() as db:
+        return await db.get(ZoneState, zone_id) is not None
+
+
+def _release(broadcaster: DashboardBroadcaster) -> None:
+    """Dernier abonné parti : le diffuseur d'une zone autre que la zone par défaut est retiré et arrêté"""
+    if _broadcasters.get(broadcaster.zone_id) is not broadcaster:
+        return
+    del _broadcasters[broadcaster.zone_id]
+    task = asyncio.get_running_loop().create_task(broadcaster.stop())
+    _stopping_tasks.add(task)
+    task.add_done_callback(_stopping_tasks.discard)
+
+
+async def get_broadcaster(zone_id: str = DEFAULT_ZONE) -> DashboardBroadcaster:
+    """Diffuseur d'une zone (démarré à la première demande) ; l'appelant vérifie que la zone existe"""
+    broadcaster = _broadcasters.get(zone_id)
+    if broadcaster is None:
+        broadcaster = _new_broadcaster(zone_id)
+        broadcaster.on_idle = _release
+        _broadcasters[zone_id] = broadcaster
+        await broadcaster.start()
+    return broadcaster
+
+
+async def stream_zone(zone_id: str, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Flux SSE d'une zone
+    Le diffuseur est pris au début du flux : jamais un diffuseur arrêté entre la requête et l'abonnement
+    """
+    broadcaster = await get_broadcaster(zone_id)
+    async for message in broadcaster.subscribe(last_event_id):
+        yield message
+
+
+async def stop_all_broadcasters() -> None:
+    """Arrête tous les diffuseurs (arrêt de l'application)"""
+    for zone_id, broadcaster in list(_broadcasters.items()):
+        await broadcaster.stop()
+        if zone_id != DEFAULT_ZONE:
+            del _broadcasters[zone_id]
+    if _stopping_tasks:
+        await asyncio.gather(*_stopping_tasks)
+
+
+def total_subscriber_count() -> int:
+    return sum(broadcaster.subscriber_count for broadcaster in _broadcasters.values())
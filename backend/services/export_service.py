@@ -0,0 +1,160 @@
+"""
+Service d'export en masse des mesures, prédictions et changements de mode
+Les lignes sont lues par paquets depuis un curseur côté serveur et écrites au fil de l'eau
+(CSV ou NDJSON, compression gzip optionnelle) : mémoire constante quelle que soit la période
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from config.settings import settings
+from database.database import SessionLocal
+from models.mode import mode
+from models.temperature import TemperaturePrediction
+from services.archive_service import readings_source
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _readings_query(db: Session, start: Optional[datetime], end: Optional[datetime], zone_id: Optional[str]):
+    # Table chaude, plus l'archive si la période la chevauche
+    t = readings_source(db, start, end, zone_id=zone_id)
+    query = select(
+        t.id, t.zone_id, t.timestamp, t.year, t.month, t.day, t.hour,
+        t.indoor_temp, t.heater_level, t.fan_level
+    )
+    if zone_id:
+        query = query.where(t.zone_id == zone_id)
+    if start:
+        query = query.where(t.timestamp >= start)
+    if end:
+        query = query.where(t.timestamp < end)
+    return query.order_by(t.timestamp, t.id)
+
+
+def _predictions_query(db: Session, start: Optional[datetime], end: Optional[datetime], zone_id: Optional[str]):
+    p = TemperaturePrediction
+    query = select(
+        p.id, p.zone_id, p.forecast_at, p.year, p.month, p.day, p.hour, p.predicted_temp, p.adjusted_temp,
+        p.outdoor_temp, p.heater_level, p.fan_speed, p.comfort_temp, p.prediction_date
+    )
+    if zone_id:
+        query = query.where(p.zone_id == zone_id)
+    if start:
+        query = query.where(p.forecast_at >= start)
+    if end:
+        query = query.where(p.forecast_at < end)
+    return query.order_by(p.forecast_at, p.id)
+
+
+def _modes_query(db: Session, start: Optional[datetime], end: Optional[datetime], zone_id: Optional[str]):
+    query = select(mode.id, mode.zone_id, mode.mode_value, mode.created_at)
+    if zone_id:
+        query = query.where(mode.zone_id == zone_id)
+    if start:
+        query = query.where(mode.created_at >= start)
+    if end:
+        query = query.where(mode.created_at < end)
+    return query.order_by(mode.created_at, mode.id)
+
+
+EXPORT_KINDS = {
+    "readings": _readings_query,
+    "predictions": _predictions_query,
+    "modes": _modes_query,
+}
+
+
+def _serialize(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _iter_row_chunks(
+    kind: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    zone_id: Optional[str]
+) -> Iterator[Tuple[List[str], List[tuple]]]:
+    """Paquets de lignes (colonnes, lignes) lus depuis un curseur côté serveur"""
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            EXPORT_KINDS[kind](db, start, end, zone_id),
+            execution_options={"stream_results": True, "yield_per": settings.EXPORT_CHUNK_SIZE}
+        )
+        columns = list(result.keys())
+        empty = True
+        for partition in result.partitions():
+            empty = False
+            yield columns, partition
+        # Export vide : un paquet sans ligne, pour l'en-tête CSV
+        if empty:
+            yield columns, []
+    finally:
+        db.close()
+
+
+def _encode_chunks(
+    kind: str,
+    fmt: str,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    zone_id: Optional[str]
+) -> Iterator[str]:
+    header_written = False
+    for columns, rows in _iter_row_chunks(kind, start, end, zone_id):
+        buffer = io.StringIO()
+        if fmt == "csv":
+            writer = csv.writer(buffer)
+            if not header_written:
+                writer.writerow(columns)
+                header_written = True
+            writer.writerows([_serialize(value) for value in row] for row in rows)
+        else:
+            for row in rows:
+                buffer.write(json.dumps({col: _serialize(value) for col, value in zip(columns, row)}))
+                buffer.write("\n")
+        yield buffer.getvalue()
+
+
+def stream_export(
+    kind: str,
+    fmt: str = "csv",
+    gzip: bool = False,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    zone_id: Optional[str] = None
+) -> Iterator[bytes]:
+    """
+    Générateur d'export : un morceau de sortie par paquet de EXPORT_CHUNK_SIZE lignes
+    gzip=True : compression à la volée (format .gz standard)
+    zone_id=None : toutes les zones (colonne zone_id dans l'export)
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    for text_chunk in _encode_chunks(kind, fmt, start, end, zone_id):
+        data = text_chunk.encode("utf-8")
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
+
+
+def export_metadata(kind: str, fmt: str, gzip: bool) -> Dict:
+    """Type MIME et nom de fichier de l'export ; lève ValueError si invalide"""
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Export inconnu '{kind}' (valeurs : {', '.join(EXPORT_KINDS)})")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format inconnu '{fmt}' (valeurs : {', '.join(EXPORT_FORMATS)})")
+    filename = f"{kind}_{datetime.now():%Y%m%d_%H%M%S}.{fmt}"
+    if gzip:
+        return {"media_type": "application/gzip", "filename": filename + ".gz"}
+    return {"media_type": EXPORT_FORMATS[fmt], "filename": filename}
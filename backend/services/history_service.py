@@ -1,67 +1,84 @@
 """
 Service pour gérer l'historique
 """
+import base64
+import json
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
+from sqlalchemy import desc, and_, or_
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator, Tuple
+from config.settings import settings
+from database.database import SessionLocal
 from models.mode import mode
 from models.temperature import IndoorTemperatureData, TemperaturePrediction
+from models.zone import DEFAULT_ZONE
+from services.archive_service import date_bounds, readings_source
+from services.zone_state_service import get_zone_state, record_mode
+from utils.data_version import bump_data_version
 
 
-def create_mode_history(db: Session, mode_value: int) -> mode:
+def create_mode_history(db: Session, mode_value: int, zone_id: str = DEFAULT_ZONE) -> mode:
     """
-    Crée un nouvel historique de changement de mode
+    Crée un nouvel historique de changement de mode pour une zone
     mode = 1 pour AUTO, mode = 0 pour MANUEL
     """
-    db_mode = mode(mode_value=mode_value)
+    db_mode = mode(mode_value=mode_value, zone_id=zone_id)
     db.add(db_mode)
+    db.flush()
+    db.refresh(db_mode)  # created_at est fixé par la base
+    record_mode(db, mode_value, db_mode.created_at, zone_id)
     db.commit()
+    bump_data_version("mode", zones=[zone_id])
     db.refresh(db_mode)
     return db_mode
 
 
-def get_current_mode(db: Session) -> int:
+def get_current_mode(db: Session, zone_id: str = DEFAULT_ZONE) -> int:
     """
-    Récupère le mode actuel (dernier mode enregistré)
+    Récupère le mode actuel d'une zone (dernier mode enregistré, lu dans l'état courant)
     Retourne 1 pour AUTO, 0 pour MANUEL
     """
-    latest = db.query(mode).order_by(desc(mode.created_at)).first()
-    return latest.mode_value if latest else 1  # Par défaut AUTO (1)
+    state = get_zone_state(db, zone_id)
+    if state is None or state.mode_value is None:
+        return 1  # Par défaut AUTO (1)
+    return state.mode_value
 
 
-def get_mode_history(db: Session, limit: int = 100) -> List[mode]:
-    """Récupère l'historique des changements de mode"""
-    return db.query(mode).order_by(desc(mode.created_at)).limit(limit).all()
+def get_mode_history(db: Session, limit: int = 100, zone_id: str = DEFAULT_ZONE) -> List[mode]:
+    """Récupère l'historique des changements de mode d'une zone"""
+    return db.query(mode).filter(mode.zone_id == zone_id).order_by(desc(mode.created_at)).limit(limit).all()
 
 
 def get_temperature_by_date_direct(
     db: Session,
     year: Optional[int] = None,
     month: Optional[int] = None,
-    day: Optional[int] = None
+    day: Optional[int] = None,
+    zone_id: str = DEFAULT_ZONE
 ) -> List[IndoorTemperatureData]:
     """Version directe pour éviter les imports circulaires"""
-    query = db.query(IndoorTemperatureData)
+    t = readings_source(db, *date_bounds(year, month, day), zone_id=zone_id)
+    query = db.query(t).filter(t.zone_id == zone_id)
     
     if year:
-        query = query.filter(IndoorTemperatureData.year == year)
+        query = query.filter(t.year == year)
     if month:
-        query = query.filter(IndoorTemperatureData.month == month)
+        query = query.filter(t.month == month)
     if day:
-        query = query.filter(IndoorTemperatureData.day == day)
+        query = query.filter(t.day == day)
     
-    return query.order_by(desc(IndoorTemperatureData.id)).all()
+    return query.order_by(desc(t.id)).all()
 
 
 def get_predictions_by_date_direct(
     db: Session,
     year: Optional[int] = None,
     month: Optional[int] = None,
-    day: Optional[int] = None
+    day: Optional[int] = None,
+    zone_id: str = DEFAULT_ZONE
 ) -> List[TemperaturePrediction]:
     """Version directe pour éviter les imports circulaires"""
-    query = db.query(TemperaturePrediction)
+    query = db.query(TemperaturePrediction).filter(TemperaturePrediction.zone_id == zone_id)
     
     if year:
         query = query.filter(TemperaturePrediction.year == year)
@@ -73,119 +90,271 @@ def get_predictions_by_date_direct(
     return query.order_by(desc(TemperaturePrediction.id)).all()
 
 
-def get_history_data(
+def _history_query(
     db: Session,
     year: Optional[int] = None,
     month: Optional[int] = None,
-    day: Optional[int] = None
-) -> Dict:
+    day: Optional[int] = None,
+    zone_id: str = DEFAULT_ZONE,
+    before: Optional[Tuple[datetime, int]] = None,
+    limit: Optional[int] = None
+):
     """
-    Récupère toutes les données historiques avec jointure entre température réelle et prédictions
+    Requête de l'historique d'une zone : jointure entre température réelle et prédictions, filtrée par date
+    Retourne (requête, entité des mesures) : l'entité inclut l'archive si la période la chevauche
+    before / limit : curseur et taille de page, reportés dans chaque branche de l'union (voir readings_source)
     """
-    # Construire la requête pour les données de température avec jointure aux prédictions
+    t = readings_source(db, *date_bounds(year, month, day), zone_id=zone_id, before=before, limit=limit)
     query = db.query(
-        IndoorTemperatureData,
+        t,
         TemperaturePrediction
     ).outerjoin(
         TemperaturePrediction,
         and_(
-            IndoorTemperatureData.year == TemperaturePrediction.year,
-            IndoorTemperatureData.month == TemperaturePrediction.month,
-            IndoorTemperatureData.day == TemperaturePrediction.day,
-            IndoorTemperatureData.hour == TemperaturePrediction.hour
+            t.zone_id == TemperaturePrediction.zone_id,
+            t.year == TemperaturePrediction.year,
+            t.month == TemperaturePrediction.month,
+            t.day == TemperaturePrediction.day,
+            t.hour == TemperaturePrediction.hour
         )
-    )
+    ).filter(t.zone_id == zone_id)
     
     # Appliquer les filtres de date
     if year:
-        query = query.filter(IndoorTemperatureData.year == year)
+        query = query.filter(t.year == year)
     if month:
-        query = query.filter(IndoorTemperatureData.month == month)
+        query = query.filter(t.month == month)
     if day:
-        query = query.filter(IndoorTemperatureData.day == day)
+        query = query.filter(t.day == day)
     
+    return query, t
+
+
+def _format_history_row(temp_data: IndoorTemperatureData, pred_data: Optional[TemperaturePrediction]) -> Dict:
+    """Formate une mesure (et sa prédiction éventuelle) de l'historique"""
+    item = {
+        "id": temp_data.id,
+        "timestamp": temp_data.timestamp.isoformat(),
+        "year": temp_data.year,
+        "month": temp_data.month,
+        "day": temp_data.day,
+        "hour": temp_data.hour,
+        "indoor_temp": temp_data.indoor_temp,
+        "heater_level": temp_data.heater_level,
+        "fan_level": temp_data.fan_level
+    }
+    
+    # Ajouter les données de prédiction si disponibles
+    if pred_data:
+        item.update({
+            "predicted_temp": pred_data.predicted_temp,
+            "adjusted_temp": pred_data.adjusted_temp,
+            "outdoor_temp": pred_data.outdoor_temp,
+            "predicted_heater_level": pred_data.heater_level,
+            "predicted_fan_speed": pred_data.fan_speed,
+            "comfort_temp": pred_data.comfort_temp,
+            "prediction_date": pred_data.prediction_date.isoformat() if pred_data.prediction_date else None
+        })
+    
+    return item
+
+
+def _format_prediction_row(item: TemperaturePrediction) -> Dict:
+    """Formate une prédiction de l'historique"""
+    return {
+        "id": item.id,
+        "year": item.year,
+        "month": item.month,
+        "day": item.day,
+        "hour": item.hour,
+        "predicted_temp": item.predicted_temp,
+        "adjusted_temp": item.adjusted_temp,
+        "outdoor_temp": item.outdoor_temp,
+        "heater_level": item.heater_level,
+        "fan_speed": item.fan_speed,
+        "comfort_temp": item.comfort_temp,
+        "prediction_date": item.prediction_date.isoformat() if item.prediction_date else None
+    }
+
+
+def _format_mode_row(item: mode) -> Dict:
+    """Formate un changement de mode de l'historique"""
+    return {
+        "id": item.id,
+        "mode": item.mode_value,
+        "mode_name": "AUTO" if item.mode_value == 1 else "MANUEL",
+        "created_at": item.created_at.isoformat() if item.created_at else None
+    }
+
+
+def get_history_data(
+    db: Session,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    """
+    Récupère toutes les données historiques d'une zone avec jointure entre température réelle et prédictions
+    """
     # Exécuter la requête
-    results = query.order_by(desc(IndoorTemperatureData.timestamp)).all()
+    query, t = _history_query(db, year, month, day, zone_id)
+    results = query.order_by(desc(t.timestamp)).all()
     
     # Préparer les données de température avec prédictions
-    temp_list = []
-    for temp_data, pred_data in results:
-        item = {
-            "id": temp_data.id,
-            "timestamp": temp_data.timestamp.isoformat(),
-            "year": temp_data.year,
-            "month": temp_data.month,
-            "day": temp_data.day,
-            "hour": temp_data.hour,
-            "indoor_temp": temp_data.indoor_temp,
-            "heater_level": temp_data.heater_level,
-            "fan_level": temp_data.fan_level
-        }
-        
-        # Ajouter les données de prédiction si disponibles
-        if pred_data:
-            item.update({
-                "predicted_temp": pred_data.predicted_temp,
-                "adjusted_temp": pred_data.adjusted_temp,
-                "outdoor_temp": pred_data.outdoor_temp,
-                "predicted_heater_level": pred_data.heater_level,
-                "predicted_fan_speed": pred_data.fan_speed,
-                "comfort_temp": pred_data.comfort_temp,
-                "prediction_date": pred_data.prediction_date.isoformat() if pred_data.prediction_date else None
-            })
-        
-        temp_list.append(item)
+    temp_list = [_format_history_row(temp_data, pred_data) for temp_data, pred_data in results]
     
     # Récupérer également les prédictions séparément pour les graphes
-    predictions = get_predictions_by_date_direct(db, year, month, day)
-    pred_list = [
-        {
-            "id": item.id,
-            "year": item.year,
-            "month": item.month,
-            "day": item.day,
-            "hour": item.hour,
-            "predicted_temp": item.predicted_temp,
-            "adjusted_temp": item.adjusted_temp,
-            "outdoor_temp": item.outdoor_temp,
-            "heater_level": item.heater_level,
-            "fan_speed": item.fan_speed,
-            "comfort_temp": item.comfort_temp,
-            "prediction_date": item.prediction_date.isoformat() if item.prediction_date else None
-        }
-        for item in predictions
-    ]
+    predictions = get_predictions_by_date_direct(db, year, month, day, zone_id)
+    pred_list = [_format_prediction_row(item) for item in predictions]
     
     # Historique des modes
-    mode_history = get_mode_history(db, limit=100)
-    mode_list = [
-        {
-            "id": item.id,
-            "mode": item.mode_value,
-            "mode_name": "AUTO" if item.mode_value == 1 else "MANUEL",
-            "created_at": item.created_at.isoformat() if item.created_at else None
-        }
-        for item in mode_history
-    ]
+    mode_history = get_mode_history(db, limit=100, zone_id=zone_id)
+    mode_list = [_format_mode_row(item) for item in mode_history]
     
     return {
+        "zone_id": zone_id,
         "temperature_data": temp_list,
         "predictions": pred_list,
         "mode_history": mode_list
     }
 
 
+# ==================== PAGINATION PAR CURSEUR ====================
+
+def encode_history_cursor(timestamp: datetime, row_id: int) -> str:
+    """Curseur opaque (timestamp, id) de la dernière ligne d'une page"""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Décode un curseur ; lève ValueError s'il est invalide"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except Exception:
+        raise ValueError("Curseur invalide")
+
+
+def history_page_query(
+    db: Session,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+    size: int = 200,
+    zone_id: str = DEFAULT_ZONE
+):
+    """
+    Requête d'une page de l'historique : `size` mesures (et leur prédiction) antérieures au curseur before,
+    de la plus récente à la plus ancienne (keyset sur timestamp, id)
+    """
+    # Taille de page reportée dans l'union seulement si les filtres de date correspondent
+    # exactement à la période de date_bounds (sinon le filtre final écarterait des lignes de la page)
+    exact_bounds = bool(year or not (month or day)) and bool(month or not day)
+    query, t = _history_query(
+        db, year, month, day, zone_id,
+        before=before, limit=size if exact_bounds else None
+    )
+    
+    if before:
+        cursor_ts, cursor_id = before
+        query = query.filter(or_(
+            t.timestamp < cursor_ts,
+            and_(t.timestamp == cursor_ts, t.id < cursor_id)
+        ))
+    
+    return query.order_by(
+        desc(t.timestamp),
+        desc(t.id)
+    ).limit(size)
+
+
+def get_history_page(
+    db: Session,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 200,
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    """
+    Page de l'historique d'une zone, de la plus récente à la plus ancienne mesure
+    Pagination par curseur (keyset sur timestamp, id) : coût constant quelle que soit la page
+    """
+    limit = max(1, min(limit, settings.HISTORY_PAGE_MAX_SIZE))
+    before = decode_history_cursor(cursor) if cursor else None
+    # Une ligne de plus pour savoir s'il reste des données
+    results = history_page_query(db, year, month, day, before, limit + 1, zone_id).all()
+    
+    has_more = len(results) > limit
+    results = results[:limit]
+    next_cursor = None
+    if has_more:
+        last_temp = results[-1][0]
+        next_cursor = encode_history_cursor(last_temp.timestamp, last_temp.id)
+    
+    return {
+        "zone_id": zone_id,
+        "temperature_data": [_format_history_row(temp_data, pred_data) for temp_data, pred_data in results],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+        "limit": limit
+    }
+
+
+def stream_history_ndjson(
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    zone_id: str = DEFAULT_ZONE
+) -> Iterator[str]:
+    """
+    Historique complet en NDJSON (une ligne JSON par élément, champ "type")
+    Les lignes sont lues par paquets depuis un curseur côté serveur : mémoire constante
+    Ouvre sa propre session, qui vit aussi longtemps que la réponse
+    """
+    db = SessionLocal()
+    try:
+        stream_options = {"stream_results": True, "yield_per": settings.STREAM_YIELD_PER}
+        
+        query, t = _history_query(db, year, month, day, zone_id)
+        query = query.order_by(desc(t.timestamp), desc(t.id))
+        for temp_data, pred_data in db.execute(query.statement, execution_options=stream_options):
+            yield json.dumps({"type": "temperature", **_format_history_row(temp_data, pred_data)}) + "\n"
+        
+        predictions = db.query(TemperaturePrediction).filter(TemperaturePrediction.zone_id == zone_id)
+        if year:
+            predictions = predictions.filter(TemperaturePrediction.year == year)
+        if month:
+            predictions = predictions.filter(TemperaturePrediction.month == month)
+        if day:
+            predictions = predictions.filter(TemperaturePrediction.day == day)
+        predictions = predictions.order_by(desc(TemperaturePrediction.id))
+        for item in db.execute(predictions.statement, execution_options=stream_options).scalars():
+            yield json.dumps({"type": "prediction", **_format_prediction_row(item)}) + "\n"
+        
+        for item in get_mode_history(db, limit=100, zone_id=zone_id):
+            yield json.dumps({"type": "mode", **_format_mode_row(item)}) + "\n"
+    finally:
+        db.close()
+
+
 def get_comparison_data(
     db: Session,
     year: Optional[int] = None,
     month: Optional[int] = None,
-    day: Optional[int] = None
+    day: Optional[int] = None,
+    zone_id: str = DEFAULT_ZONE
 ) -> Dict:
     """
-    Récupère les données spécifiquement pour la comparaison ML vs Réel
+    Récupère les données spécifiquement pour la comparaison ML vs Réel d'une zone
     """
     # Données réelles
-    real_data = get_temperature_by_date_direct(db, year, month, day)
+    real_data = get_temperature_by_date_direct(db, year, month, day, zone_id)
     real_temps = [
         {
             "timestamp": item.timestamp.isoformat(),
@@ -197,7 +366,7 @@ def get_comparison_data(
     ]
     
     # Données prédites
-    pred_data = get_predictions_by_date_direct(db, year, month, day)
+    pred_data = get_predictions_by_date_direct(db, year, month, day, zone_id)
     pred_temps = [
         {
             "timestamp": f"{item.year}-{item.month:02d}-{item.day:02d} {item.hour:02d}:00:00",
@@ -209,6 +378,7 @@ def get_comparison_data(
     ]
     
     return {
+        "zone_id": zone_id,
         "real_temperatures": real_temps,
         "predicted_temperatures": pred_temps
     }
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""
+File d'ingestion en mémoire (write-behind) pour les mesures des capteurs
+Les routes ajoutent les mesures et répondent immédiatement (202),
+une tâche de fond les écrit par INSERT multi-lignes
+- erreur passagère (base injoignable, verrou) : paquet remis en tête de file, la file pleine répond 429
+- erreur de données : paquet coupé en deux jusqu'à isoler les mesures fautives, mises de côté
+  dans la file des rejets (dead letter) pour ne pas bloquer les suivantes
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+from config.settings import settings
+from database.async_database import AsyncSessionLocal
+from models.zone import DEFAULT_ZONE
+from services.async_temperature_service import insert_temperature_rows
+from utils.data_version import bump_data_version
+from utils.metrics import ingestion_rows_total
+
+
+class IngestionBuffer:
+    """
+    File bornée de mesures en attente d'écriture
+    Vidée toutes les `flush_interval_ms` ou dès `flush_rows` mesures
+    """
+
+    def __init__(self, max_depth: int, flush_rows: int, flush_interval_ms: int, dead_letter_size: int = 1000):
+        self.max_depth = max_depth
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval_ms / 1000.0
+        
+        self._rows = deque()
+        self._dead_letter = deque(maxlen=dead_letter_size)
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        
+        # Compteurs
+        self.enqueued_total = 0
+        self.rejected_total = 0
+        self.flushed_rows_total = 0
+        self.flush_count = 0
+        self.flush_errors = 0
+        self.last_error: Optional[str] = None
+        self.dead_letter_total = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._rows)
+
+    def enqueue(self, rows: List[Dict]) -> bool:
+        """
+        Ajoute des mesures à la file (tout ou rien)
+        Retourne False si la file est pleine
+        """
+        with self._lock:
+            if len(self._rows) + len(rows) > self.max_depth:
+                self.rejected_total += len(rows)
+                return False
+            self._rows.extend(rows)
+            self.enqueued_total += len(rows)
+            depth = len(self._rows)
+        
+        if depth >= self.flush_rows and self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return True
+
+    async def start(self):
+        """Démarre la tâche de vidage (appelé depuis le lifespan)"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête la tâche et écrit les mesures restantes"""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        # Dernier vidage pour ne perdre aucune mesure
+        await self._flush_all()
+        if self.depth:
+            print(f"❌ Arrêt : {self.depth} mesures n'ont pas pu être écrites")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._flush_all()
+
+    async def _flush_all(self):
+        """Vide la file par paquets de `flush_rows` mesures"""
+        while self.depth:
+            with self._lock:
+                count = min(self.flush_rows, len(self._rows))
+                batch = [self._rows.popleft() for _ in range(count)]
+            
+            retry = await self._write_isolating(batch)
+            if retry:
+                # Erreur passagère : remettre les mesures en tête de file et réessayer au prochain cycle
+                with self._lock:
+                    self._rows.extendleft(reversed(retry))
+                break
+
+    async def _write_isolating(self, rows: List[Dict]) -> List[Dict]:
+        """
+        Écrit un paquet ; sur erreur de données, le coupe en deux jusqu'à isoler les mesures fautives
+        Retourne les mesures à remettre en file (erreur passagère)
+        """
+        error = await self._write(rows)
+        if error is None:
+            return []
+        if _is_transient(error):
+            return rows
+        if len(rows) == 1:
+            self._reject(rows[0], error)
+            return []
+        middle = len(rows) // 2
+        retry = await self._write_isolating(rows[:middle])
+        if retry:
+            return retry + rows[middle:]
+        return await self._write_isolating(rows[middle:])
+
+    def _reject(self, row: Dict, error: Exception):
+        with self._lock:
+            self._dead_letter.append({"row": row, "error": str(error), "rejected_at": datetime.now()})
+            self.dead_letter_total += 1
+        ingestion_rows_total.inc(1, "dead_letter")
+        print(f"❌ Mesure rejetée par la base, mise de côté ({self.dead_letter_total} au total) : {str(error)}")
+
+    async def _write(self, rows: List[Dict]) -> Optional[Exception]:
+        """Écrit un paquet de mesures en une transaction ; retourne l'erreur si le commit a échoué"""
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            try:
+                await insert_temperature_rows(db, rows)
+                await db.commit()
+            except Exception as e:
+                print(f"❌ ERREUR lors du vidage de la file d'ingestion: {str(e)}")
+                await db.rollback()
+                self.flush_errors += 1
+                self.last_error = str(e)
+                return e
+        
+        # Mesures validées : ne plus jamais les remettre en file
+        bump_data_version("temperature", zones={row.get("zone_id") or DEFAULT_ZONE for row in rows})
+        ingestion_rows_total.inc(len(rows), "queue")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flush_count += 1
+        self.flushed_rows_total += len(rows)
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.total_flush_ms += elapsed_ms
+        return None
+
+    def dead_letter(self) -> List[Dict]:
+        """Mesures rejetées par la base (les plus récentes, au plus INGESTION_DEAD_LETTER_SIZE)"""
+        with self._lock:
+            return list(self._dead_letter)
+
+    def stats(self) -> Dict:
+        """Compteurs de la file (profondeur, débit, latence de vidage)"""
+        return {
+            "queue_depth": self.depth,
+            "max_depth": self.max_depth,
+            "enqueued_total": self.enqueued_total,
+            "rejected_total": self.rejected_total,
+            "flushed_rows_total": self.flushed_rows_total,
+            "flush_count": self.flush_count,
+            "flush_errors": self.flush_errors,
+            "last_error": self.last_error,
+            "dead_letter_depth": len(self._dead_letter),
+            "dead_letter_total": self.dead_letter_total,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "avg_flush_ms": round(self.total_flush_ms / self.flush_count, 2) if self.flush_count else 0.0
+        }
+
+
+def _is_transient(error: Exception) -> bool:
+    """Erreur liée à la base plutôt qu'aux mesures : le même paquet passera plus tard"""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (OperationalError, InterfaceError, PoolTimeoutError, ConnectionError, asyncio.TimeoutError))
+
+
+# Instance globale de la file
+ingestion_buffer = IngestionBuffer(
+    max_depth=settings.INGESTION_QUEUE_MAX_DEPTH,
+    flush_rows=settings.INGESTION_FLUSH_ROWS,
+    flush_interval_ms=settings.INGESTION_FLUSH_INTERVAL_MS,
+    dead_letter_size=settings.INGESTION_DEAD_LETTER_SIZE
+)
@@ -0,0 +1,287 @@
+"""
+Service des rapports périodiques (jour, mois, année)
+Les résumés sont calculés côté serveur à partir des rollups, des prédictions et des modes ;
+ceux des périodes closes sont mis en cache, et retirés du cache après le commit
+d'une écriture datée dans la période (mesures ou prédictions antidatées)
+"""
+import calendar
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from config.settings import settings
+from models.mode import mode
+from models.rollup import TemperatureRollupHourly, TemperatureRollupDaily
+from models.temperature import TemperaturePrediction
+from models.zone import DEFAULT_ZONE
+from utils.metrics import record_cache
+from utils.pdf import render_text_pdf
+
+# Seuils des alertes de température (mêmes valeurs que le moteur d'alertes)
+LOW_TEMP_THRESHOLD = settings.ALERT_LOW_TEMP
+HIGH_TEMP_THRESHOLD = settings.ALERT_HIGH_TEMP
+
+_cache: "OrderedDict[Tuple, Dict]" = OrderedDict()
+_cache_lock = threading.Lock()
+# Clé -> jeton du calcul en cours ; retiré par une écriture de la période commitée pendant le calcul
+_pending: Dict[Tuple, object] = {}
+_SESSION_DAYS_KEY = "report_days"  # session.info : (zone, jour) écrits, rapports à retirer après le commit
+
+
+def period_bounds(year: int, month: Optional[int] = None, day: Optional[int] = None) -> Tuple[datetime, datetime, str]:
+    """Bornes [start, end) et type de la période ; lève ValueError si la date est invalide"""
+    if day and not month:
+        raise ValueError("Le jour nécessite le mois")
+    if day:
+        start = datetime(year, month, day)
+        return start, start + timedelta(days=1), "day"
+    if month:
+        start = datetime(year, month, 1)
+        return start, start + timedelta(days=calendar.monthrange(year, month)[1]), "month"
+    return datetime(year, 1, 1), datetime(year + 1, 1, 1), "year"
+
+
+def _daily_rollups(db: Session, start: datetime, end: datetime, zone_id: str) -> Dict[datetime, TemperatureRollupDaily]:
+    rows = db.query(TemperatureRollupDaily).filter(
+        TemperatureRollupDaily.zone_id == zone_id,
+        TemperatureRollupDaily.bucket_start >= start,
+        TemperatureRollupDaily.bucket_start < end
+    ).all()
+    return {row.bucket_start: row for row in rows}
+
+
+def _hourly_means(db: Session, start: datetime, end: datetime, zone_id: str) -> Dict[datetime, Tuple[float, float, float]]:
+    """(moyenne, min, max) par heure depuis le rollup horaire"""
+    rows = db.query(
+        TemperatureRollupHourly.bucket_start,
+        TemperatureRollupHourly.temp_sum,
+        TemperatureRollupHourly.sample_count,
+        TemperatureRollupHourly.temp_min,
+        TemperatureRollupHourly.temp_max
+    ).filter(
+        TemperatureRollupHourly.zone_id == zone_id,
+        TemperatureRollupHourly.bucket_start >= start,
+        TemperatureRollupHourly.bucket_start < end,
+        TemperatureRollupHourly.sample_count > 0
+    ).all()
+    return {row[0]: (row[1] / row[2], row[3], row[4]) for row in rows}
+
+
+def _predictions_by_hour(db: Session, start: datetime, end: datetime, zone_id: str) -> Dict[datetime, float]:
+    p = TemperaturePrediction
+    rows = db.query(p.forecast_at, p.predicted_temp).filter(
+        p.zone_id == zone_id,
+        p.forecast_at >= start,
+        p.forecast_at < end
+    ).all()
+    return {forecast_at: temp for forecast_at, temp in rows if temp is not None}
+
+
+def _mode_changes_by_day(db: Session, start: datetime, end: datetime, zone_id: str) -> Dict[str, int]:
+    day_col = func.date(mode.created_at)
+    rows = db.query(day_col, func.count(mode.id)).filter(
+        mode.zone_id == zone_id,
+        mode.created_at >= start,
+        mode.created_at < end
+    ).group_by(day_col).all()
+    return {str(day): count for day, count in rows}
+
+
+def _error_stats(errors: List[float]) -> Dict:
+    if not errors:
+        return {"forecast_hours": 0, "forecast_mae": None, "forecast_bias": None, "forecast_rmse": None}
+    n = len(errors)
+    return {
+        "forecast_hours": n,
+        "forecast_mae": round(sum(abs(e) for e in errors) / n, 3),
+        "forecast_bias": round(sum(errors) / n, 3),
+        "forecast_rmse": round((sum(e * e for e in errors) / n) ** 0.5, 3)
+    }
+
+
+def _build_report(db: Session, year: int, month: Optional[int], day: Optional[int], zone_id: str) -> Dict:
+    start, end, period = period_bounds(year, month, day)
+    
+    daily = _daily_rollups(db, start, end, zone_id)
+    hourly = _hourly_means(db, start, end, zone_id)
+    predictions = _predictions_by_hour(db, start, end, zone_id)
+    mode_changes = _mode_changes_by_day(db, start, end, zone_id)
+    
+    # Erreur de prévision par heure (prédit - réel), regroupée par jour
+    errors_by_day: Dict[datetime, List[float]] = {}
+    alert_hours: Dict[datetime, Dict[str, int]] = {}
+    for hour, (mean, temp_min, temp_max) in hourly.items():
+        day_key = hour.replace(hour=0)
+        if hour in predictions:
+            errors_by_day.setdefault(day_key, []).append(predictions[hour] - mean)
+        counters = alert_hours.setdefault(day_key, {"low_temp_hours": 0, "high_temp_hours": 0})
+        if temp_min is not None and temp_min < LOW_TEMP_THRESHOLD:
+            counters["low_temp_hours"] += 1
+        if temp_max is not None and temp_max > HIGH_TEMP_THRESHOLD:
+            counters["high_temp_hours"] += 1
+    
+    days = []
+    day_cursor = start
+    while day_cursor < end:
+        rollup = daily.get(day_cursor)
+        count = rollup.sample_count if rollup else 0
+        alerts = alert_hours.get(day_cursor, {"low_temp_hours": 0, "high_temp_hours": 0})
+        item = {
+            "date": day_cursor.date().isoformat(),
+            "data_points": count,
+            "min_temp": round(rollup.temp_min, 2) if count else None,
+            "max_temp": round(rollup.temp_max, 2) if count else None,
+            "avg_temp": round(rollup.temp_sum / count, 2) if count else None,
+            "heater_duty": round(rollup.heater_on_count / count, 3) if count else None,
+            "fan_duty": round(rollup.fan_on_count / count, 3) if count else None,
+            "avg_heater_level": round(rollup.heater_sum / count, 2) if count else None,
+            "avg_fan_level": round(rollup.fan_sum / count, 2) if count else None,
+            "mode_changes": mode_changes.get(day_cursor.date().isoformat(), 0),
+            **alerts,
+            **_error_stats(errors_by_day.get(day_cursor, []))
+        }
+        if period == "year":
+            # Rapport annuel : uniquement les jours avec des données
+            if count or item["mode_changes"]:
+                days.append(item)
+        else:
+            days.append(item)
+        day_cursor += timedelta(days=1)
+    
+    total = sum(r.sample_count for r in daily.values())
+    all_errors = [e for errors in errors_by_day.values() for e in errors]
+    summary = {
+        "data_points": total,
+        "min_temp": round(min(r.temp_min for r in daily.values() if r.sample_count), 2) if total else None,
+        "max_temp": round(max(r.temp_max for r in daily.values() if r.sample_count), 2) if total else None,
+        "avg_temp": round(sum(r.temp_sum for r in daily.values()) / total, 2) if total else None,
+        "heater_duty": round(sum(r.heater_on_count for r in daily.values()) / total, 3) if total else None,
+        "fan_duty": round(sum(r.fan_on_count for r in daily.values()) / total, 3) if total else None,
+        "mode_changes": sum(mode_changes.values()),
+        "low_temp_hours": sum(a["low_temp_hours"] for a in alert_hours.values()),
+        "high_temp_hours": sum(a["high_temp_hours"] for a in alert_hours.values()),
+        **_error_stats(all_errors)
+    }
+    
+    return {
+        "zone_id": zone_id,
+        "period": period,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "closed": end <= datetime.now(),
+        "summary": summary,
+        "days": days
+    }
+
+
+def get_period_report(
+    db: Session,
+    year: int,
+    month: Optional[int] = None,
+    day: Optional[int] = None,
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    """
+    Rapport d'une période (année, mois ou jour) pour une zone
+    Les périodes closes sont servies depuis le cache
+    """
+    key = (zone_id, year, month, day)
+    token = object()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            record_cache("period_report", True)
+            return _cache[key]
+        _pending[key] = token
+    record_cache("period_report", False)
+    
+    try:
+        report = _build_report(db, year, month, day, zone_id)
+    except Exception:
+        with _cache_lock:
+            if _pending.get(key) is token:
+                del _pending[key]
+        raise
+    
+    with _cache_lock:
+        # Jeton retiré : une écriture de la période a été commitée pendant le calcul
+        if _pending.get(key) is token:
+            del _pending[key]
+            if report["closed"]:
+                _cache[key] = report
+                while len(_cache) > settings.REPORT_CACHE_SIZE:
+                    _cache.popitem(last=False)
+    return report
+
+
+def clear_report_cache() -> None:
+    """Vide le cache (après un backfill ou une correction de données passées)"""
+    with _cache_lock:
+        _cache.clear()
+        _pending.clear()
+
+
+def invalidate_reports(db: Session, zone_days: Iterable[Tuple[str, datetime]]) -> None:
+    """(zone, jour) écrits dans la transaction de db : rapports du jour, du mois et de l'année retirés après le commit"""
+    db.info.setdefault(_SESSION_DAYS_KEY, set()).update(zone_days)
+
+
+def _evict_reports(zone_days: Iterable[Tuple[str, datetime]]) -> None:
+    keys = set()
+    for zone_id, day in zone_days:
+        keys.update((
+            (zone_id, day.year, None, None),
+            (zone_id, day.year, day.month, None),
+            (zone_id, day.year, day.month, day.day)
+        ))
+    with _cache_lock:
+        for key in keys:
+            _cache.pop(key, None)
+            _pending.pop(key, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_session_reports(session: Session):
+    zone_days = session.info.pop(_SESSION_DAYS_KEY, None)
+    if zone_days:
+        _evict_reports(zone_days)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_session_reports(session: Session):
+    session.info.pop(_SESSION_DAYS_KEY, None)
+
+
+def _fmt(value, suffix: str = "") -> str:
+    return "-" if value is None else f"{value}{suffix}"
+
+
+def render_report_pdf(report: Dict) -> bytes:
+    """Rapport au format PDF (résumé puis tableau journalier)"""
+    summary = report["summary"]
+    lines = [
+        f"Zone : {report['zone_id']}",
+        f"Période : {report['start'][:10]} -> {report['end'][:10]}",
+        "",
+        f"Mesures            : {summary['data_points']}",
+        f"Température min    : {_fmt(summary['min_temp'], ' °C')}",
+        f"Température max    : {_fmt(summary['max_temp'], ' °C')}",
+        f"Température moy.   : {_fmt(summary['avg_temp'], ' °C')}",
+        f"Chauffage allumé   : {_fmt(summary['heater_duty'])}",
+        f"Ventilateur allumé : {_fmt(summary['fan_duty'])}",
+        f"Erreur prévision   : MAE {_fmt(summary['forecast_mae'])} / biais {_fmt(summary['forecast_bias'])}",
+        f"Changements mode   : {summary['mode_changes']}",
+        f"Heures en alerte   : basse {summary['low_temp_hours']} / haute {summary['high_temp_hours']}",
+        "",
+        f"{'Date':<11}{'Min':>7}{'Moy':>7}{'Max':>7}{'Chauf.':>8}{'Vent.':>7}{'MAE':>7}{'Modes':>6}",
+    ]
+    for item in report["days"]:
+        lines.append(
+            f"{item['date']:<11}{_fmt(item['min_temp']):>7}{_fmt(item['avg_temp']):>7}"
+            f"{_fmt(item['max_temp']):>7}{_fmt(item['heater_duty']):>8}{_fmt(item['fan_duty']):>7}"
+            f"{_fmt(item['forecast_mae']):>7}{item['mode_changes']:>6}"
+        )
+    titles = {"day": "Rapport journalier", "month": "Rapport mensuel", "year": "Rapport annuel"}
+    return render_text_pdf(titles[report["period"]], lines)
@@ -0,0 +1,366 @@
+"""
+Service des agrégats horaires et journaliers (tables de rollup)
+- mis à jour de façon incrémentale dans la transaction de chaque écriture de mesures
+- reconstruits depuis les données brutes par la commande de backfill
+- utilisés par les statistiques et l'historique à la place d'un scan des mesures
+
+Backfill en ligne de commande (depuis le dossier backend) :
+    python -m services.rollup_service backfill [--start 2020-01-01] [--end 2026-01-01]
+"""
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from config.settings import settings
+from database.upsert import upsert_rows
+from models.rollup import TemperatureRollupHourly, TemperatureRollupDaily
+from models.zone import DEFAULT_ZONE
+from services.aggregation_service import EPOCH, bucket_start_expression, epoch_seconds_expression
+from services.archive_service import readings_source
+
+ROLLUP_COLUMNS = (
+    "sample_count", "temp_sum", "temp_min", "temp_max",
+    "heater_sum", "fan_sum", "heater_on_count", "fan_on_count"
+)
+ADDITIVE_COLUMNS = ("sample_count", "temp_sum", "heater_sum", "fan_sum", "heater_on_count", "fan_on_count")
+ROLLUP_KEY_COLUMNS = ("zone_id", "bucket_start")
+
+
+def hour_start(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _ceil(value: datetime, floor_func, step: timedelta) -> datetime:
+    floored = floor_func(value)
+    return floored if floored == value else floored + step
+
+
+# ==================== MISE À JOUR INCRÉMENTALE ====================
+
+def _empty_stats() -> Dict:
+    return {
+        "sample_count": 0, "temp_sum": 0.0, "temp_min": None, "temp_max": None,
+        "heater_sum": 0.0, "fan_sum": 0.0, "heater_on_count": 0, "fan_on_count": 0
+    }
+
+
+def _merge_stats(target: Dict, other: Dict) -> Dict:
+    """Combine deux agrégats (somme des compteurs, min des min, max des max)"""
+    for col in ADDITIVE_COLUMNS:
+        target[col] += other[col] or 0
+    if other["temp_min"] is not None:
+        target["temp_min"] = other["temp_min"] if target["temp_min"] is None else min(target["temp_min"], other["temp_min"])
+    if other["temp_max"] is not None:
+        target["temp_max"] = other["temp_max"] if target["temp_max"] is None else max(target["temp_max"], other["temp_max"])
+    return target
+
+
+def _aggregate_rows(rows: Iterable[Dict]) -> Tuple[Dict, Dict]:
+    """Pré-agrège des mesures par (zone, heure) et par (zone, jour) (en mémoire)"""
+    hourly: Dict[Tuple[str, datetime], Dict] = {}
+    for row in rows:
+        temp = row["indoor_temp"]
+        heater = row.get("heater_level") or 0
+        fan = row.get("fan_level") or 0
+        key = (row.get("zone_id") or DEFAULT_ZONE, hour_start(row["timestamp"]))
+        stats = hourly.setdefault(key, _empty_stats())
+        stats["sample_count"] += 1
+        stats["temp_sum"] += temp
+        stats["temp_min"] = temp if stats["temp_min"] is None else min(stats["temp_min"], temp)
+        stats["temp_max"] = temp if stats["temp_max"] is None else max(stats["temp_max"], temp)
+        stats["heater_sum"] += heater
+        stats["fan_sum"] += fan
+        stats["heater_on_count"] += 1 if heater > 0 else 0
+        stats["fan_on_count"] += 1 if fan > 0 else 0
+    
+    return hourly, _daily_from_hourly(hourly)
+
+
+def _daily_from_hourly(hourly: Dict[Tuple[str, datetime], Dict]) -> Dict[Tuple[str, datetime], Dict]:
+    daily: Dict[Tuple[str, datetime], Dict] = {}
+    for (zone_id, bucket), stats in hourly.items():
+        _merge_stats(daily.setdefault((zone_id, day_start(bucket)), _empty_stats()), dict(stats))
+    return daily
+
+
+def _additive_merge(table, incoming, dialect: str) -> Dict:
+    """Expressions de cumul pour l'upsert des rollups"""
+    least, greatest = (func.min, func.max) if dialect == "sqlite" else (func.least, func.greatest)
+    values = {col: table.c[col] + incoming[col] for col in ADDITIVE_COLUMNS}
+    values["temp_min"] = least(table.c.temp_min, incoming["temp_min"])
+    values["temp_max"] = greatest(table.c.temp_max, incoming["temp_max"])
+    return values
+
+
+def apply_rollups(db: Session, rows: List[Dict]) -> None:
+    """
+    Ajoute des mesures aux agrégats horaires et journaliers
+    Un upsert multi-lignes par table ; ne fait PAS de commit (même transaction que les mesures)
+    """
+    if not rows:
+        return
+    hourly, daily = _aggregate_rows(rows)
+    for model, buckets in ((TemperatureRollupHourly, hourly), (TemperatureRollupDaily, daily)):
+        upsert_rows(
+            db,
+            model,
+            [{"zone_id": zone_id, "bucket_start": bucket, **stats} for (zone_id, bucket), stats in sorted(buckets.items())],
+            ROLLUP_KEY_COLUMNS,
+            merge=_additive_merge
+        )
+
+
+# ==================== BACKFILL ====================
+
+def _rebuild_hourly(db: Session, start: datetime, end: datetime) -> Dict[Tuple[str, datetime], Dict]:
+    """Recalcule en SQL les agrégats horaires par zone de [start, end) depuis les mesures (archive comprise)"""
+    t = readings_source(db, start, end)
+    bucket = bucket_start_expression(epoch_seconds_expression(db, t.timestamp), "hour").label("bucket")
+    heater = func.coalesce(t.heater_level, 0)
+    fan = func.coalesce(t.fan_level, 0)
+    
+    rows = db.query(
+        t.zone_id,
+        bucket,
+        func.count(t.id),
+        func.sum(t.indoor_temp),
+        func.min(t.indoor_temp),
+        func.max(t.indoor_temp),
+        func.sum(heater),
+        func.sum(fan),
+        func.sum(case((heater > 0, 1), else_=0)),
+        func.sum(case((fan > 0, 1), else_=0))
+    ).filter(
+        t.timestamp >= start,
+        t.timestamp < end
+    ).group_by(t.zone_id, bucket).all()
+    
+    return {
+        (row[0], EPOCH + timedelta(seconds=int(row[1]))): dict(zip(ROLLUP_COLUMNS, (
+            int(row[2]), float(row[3] or 0), row[4], row[5],
+            float(row[6] or 0), float(row[7] or 0), int(row[8] or 0), int(row[9] or 0)
+        )))
+        for row in rows
+    }
+
+
+def backfill_rollups(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chunk_days: Optional[int] = None
+) -> int:
+    """
+    Reconstruit les rollups de toutes les zones depuis les mesures brutes, par tranches de `chunk_days` jours
+    Chaque tranche (jours entiers) est remplacée puis validée dans sa propre transaction
+    Retourne le nombre d'heures agrégées
+    """
+    chunk_days = chunk_days or settings.ROLLUP_BACKFILL_CHUNK_DAYS
+    t = readings_source(db, start, end)
+    
+    if start is None or end is None:
+        first, last = db.query(func.min(t.timestamp), func.max(t.timestamp)).one()
+        if first is None:
+            return 0
+        start = start or first
+        end = end or last + timedelta(seconds=1)
+    
+    start = day_start(start)
+    end = _ceil(end, day_start, timedelta(days=1))
+    total_hours = 0
+    
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days), end)
+        hourly = _rebuild_hourly(db, chunk_start, chunk_end)
+        daily = _daily_from_hourly(hourly)
+        
+        for model, buckets in ((TemperatureRollupHourly, hourly), (TemperatureRollupDaily, daily)):
+            db.query(model).filter(
+                model.bucket_start >= chunk_start,
+                model.bucket_start < chunk_end
+            ).delete(synchronize_session=False)
+            rows = [
+                {"zone_id": zone_id, "bucket_start": bucket, **stats}
+                for (zone_id, bucket), stats in sorted(buckets.items())
+            ]
+            for i in range(0, len(rows), settings.BATCH_CHUNK_SIZE):
+                db.execute(model.__table__.insert().values(rows[i:i + settings.BATCH_CHUNK_SIZE]))
+        
+        db.commit()
+        total_hours += len(hourly)
+        print(f"   📊 Rollups {chunk_start:%Y-%m-%d} → {chunk_end:%Y-%m-%d} : {len(hourly)} heures")
+        chunk_start = chunk_end
+    
+    return total_hours
+
+
+# ==================== LECTURE ====================
+
+def _raw_stats(db: Session, start: datetime, end: datetime, zone_id: str = DEFAULT_ZONE) -> Dict:
+    t = readings_source(db, start, end, zone_id=zone_id)
+    heater = func.coalesce(t.heater_level, 0)
+    fan = func.coalesce(t.fan_level, 0)
+    row = db.query(
+        func.count(t.id),
+        func.sum(t.indoor_temp),
+        func.min(t.indoor_temp),
+        func.max(t.indoor_temp),
+        func.sum(heater),
+        func.sum(fan),
+        func.sum(case((heater > 0, 1), else_=0)),
+        func.sum(case((fan > 0, 1), else_=0))
+    ).filter(
+        t.zone_id == zone_id,
+        t.timestamp >= start,
+        t.timestamp < end
+    ).one()
+    return dict(zip(ROLLUP_COLUMNS, (
+        int(row[0] or 0), float(row[1] or 0), row[2], row[3],
+        float(row[4] or 0), float(row[5] or 0), int(row[6] or 0), int(row[7] or 0)
+    )))
+
+
+def _rollup_stats(db: Session, model, start: datetime, end: datetime, zone_id: str = DEFAULT_ZONE) -> Dict:
+    row = db.query(
+        func.sum(model.sample_count),
+        func.sum(model.temp_sum),
+        func.min(model.temp_min),
+        func.max(model.temp_max),
+        func.sum(model.heater_sum),
+        func.sum(model.fan_sum),
+        func.sum(model.heater_on_count),
+        func.sum(model.fan_on_count)
+    ).filter(
+        model.zone_id == zone_id,
+        model.bucket_start >= start,
+        model.bucket_start < end
+    ).one()
+    return dict(zip(ROLLUP_COLUMNS, (
+        int(row[0] or 0), float(row[1] or 0), row[2], row[3],
+        float(row[4] or 0), float(row[5] or 0), int(row[6] or 0), int(row[7] or 0)
+    )))
+
+
+def get_range_stats(db: Session, start: datetime, end: datetime, zone_id: str = DEFAULT_ZONE) -> Dict:
+    """
+    Agrégat des mesures d'une zone sur [start, end) en lisant le rollup le plus grossier possible :
+    jours entiers -> rollup journalier, heures entières -> rollup horaire,
+    bords partiels -> mesures brutes
+    """
+    if end <= start:
+        return _empty_stats()
+    if not settings.USE_ROLLUPS:
+        return _raw_stats(db, start, end, zone_id)
+    
+    first_hour = _ceil(start, hour_start, timedelta(hours=1))
+    last_hour = hour_start(end)
+    if first_hour >= last_hour:
+        return _raw_stats(db, start, end, zone_id)
+    
+    stats = _empty_stats()
+    parts = []
+    if start < first_hour:
+        parts.append(_raw_stats(db, start, first_hour, zone_id))
+    if last_hour < end:
+        parts.append(_raw_stats(db, last_hour, end, zone_id))
+    
+    first_day = _ceil(first_hour, day_start, timedelta(days=1))
+    last_day = day_start(last_hour)
+    if first_day < last_day:
+        parts.append(_rollup_stats(db, TemperatureRollupDaily, first_day, last_day, zone_id))
+        if first_hour < first_day:
+            parts.append(_rollup_stats(db, TemperatureRollupHourly, first_hour, first_day, zone_id))
+        if last_day < last_hour:
+            parts.append(_rollup_stats(db, TemperatureRollupHourly, last_day, last_hour, zone_id))
+    else:
+        parts.append(_rollup_stats(db, TemperatureRollupHourly, first_hour, last_hour, zone_id))
+    
+    for part in parts:
+        _merge_stats(stats, part)
+    return stats
+
+
+def rollup_series(
+    db: Session,
+    bucket: str,
+    start: datetime,
+    end: datetime,
+    zone_id: str = DEFAULT_ZONE
+) -> Optional[List[Dict]]:
+    """
+    Série agrégée d'une zone par heure / jour / semaine lue depuis les rollups
+    Niveaux moyens chauffage / ventilateur : un niveau NULL compte comme 0 (éteint)
+    Retourne None si les bornes ne sont pas alignées (l'appelant lit alors les mesures brutes)
+    """
+    if not settings.USE_ROLLUPS or bucket not in ("hour", "day", "week"):
+        return None
+    if bucket == "hour":
+        model = TemperatureRollupHourly
+        aligned = hour_start(start) == start and hour_start(end) == end
+    else:
+        model = TemperatureRollupDaily
+        aligned = day_start(start) == start and day_start(end) == end
+    if not aligned:
+        return None
+    
+    if bucket == "week":
+        bucket_col = bucket_start_expression(epoch_seconds_expression(db, model.bucket_start), "week").label("bucket")
+    else:
+        bucket_col = epoch_seconds_expression(db, model.bucket_start).label("bucket")
+    
+    rows = db.query(
+        bucket_col,
+        func.sum(model.sample_count).label("count"),
+        func.sum(model.temp_sum).label("temp_sum"),
+        func.min(model.temp_min).label("min_temp"),
+        func.max(model.temp_max).label("max_temp"),
+        func.sum(model.heater_sum).label("heater_sum"),
+        func.sum(model.fan_sum).label("fan_sum")
+    ).filter(
+        model.zone_id == zone_id,
+        model.bucket_start >= start,
+        model.bucket_start < end
+    ).group_by(bucket_col).order_by(bucket_col).all()
+    
+    return [
+        {
+            "bucket_start": (EPOCH + timedelta(seconds=int(row.bucket))).isoformat(),
+            "count": int(row.count),
+            "min_temp": round(row.min_temp, 2) if row.min_temp is not None else None,
+            "avg_temp": round(row.temp_sum / row.count, 2) if row.count else None,
+            "max_temp": round(row.max_temp, 2) if row.max_temp is not None else None,
+            "avg_heater_level": round(row.heater_sum / row.count, 2) if row.count else None,
+            "avg_fan_level": round(row.fan_sum / row.count, 2) if row.count else None
+        }
+        for row in rows
+    ]
+
+
+def main(argv: List[str]) -> int:
+    from database.database import SessionLocal
+    
+    if len(argv) < 2 or argv[1] != "backfill":
+        print(__doc__)
+        return 1
+    
+    options = dict(zip(argv[2::2], argv[3::2]))
+    start = datetime.fromisoformat(options["--start"]) if "--start" in options else None
+    end = datetime.fromisoformat(options["--end"]) if "--end" in options else None
+    
+    db = SessionLocal()
+    try:
+        hours = backfill_rollups(db, start, end)
+        print(f"✅ Backfill terminé : {hours} heures agrégées")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,398 @@
+"""
+Cache mémoire des séries récentes, par zone (fenêtre glissante)
+- mesures des SERIES_CACHE_HOURS dernières heures et prédictions horaires en tableaux compacts
+  (array : horodatages en secondes, températures, niveaux), sans objets ORM
+- chargé depuis la base au démarrage (lifespan), complété après le commit de chaque écriture
+- min / max / moyenne des fenêtres 24h et SERIES_CACHE_HOURS tenus à jour au fil de l'eau
+- cache non chargé (désactivé, scripts hors application) : les services lisent la base
+Propre au processus : toutes les écritures doivent passer par les services de cette API
+"""
+import math
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque, namedtuple
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from config.settings import settings
+from models.temperature import TemperaturePrediction
+from models.zone import DEFAULT_ZONE, ZoneState
+from services.archive_service import readings_source
+
+EPOCH = datetime(1970, 1, 1)
+NO_LEVEL = -1  # Niveau absent (NULL) dans les tableaux d'entiers
+COMPACT_MIN = 1024  # Mesures sorties de la fenêtre avant de compacter les tableaux
+_SESSION_PENDING_KEY = "series_pending"  # session.info : écritures à reporter après le commit
+
+FORECAST_FLOAT_FIELDS = ("predicted_temp", "adjusted_temp", "outdoor_temp", "comfort_temp")
+FORECAST_INT_FIELDS = ("heater_level", "fan_speed")
+
+# Mêmes attributs que les lignes lues en base : les fonctions de formatage servent aux deux
+ReadingPoint = namedtuple("ReadingPoint", "timestamp indoor_temp heater_level fan_level")
+ForecastPoint = namedtuple(
+    "ForecastPoint",
+    "year month day hour predicted_temp adjusted_temp outdoor_temp heater_level fan_speed comfort_temp"
+)
+
+
+def _seconds(moment: datetime) -> float:
+    return (moment - EPOCH).total_seconds()
+
+
+def _moment(seconds: float) -> datetime:
+    return EPOCH + timedelta(seconds=seconds)
+
+
+def _level(value: Optional[int]) -> int:
+    return NO_LEVEL if value is None else value
+
+
+def _level_or_none(value: int) -> Optional[int]:
+    return None if value == NO_LEVEL else value
+
+
+def _float(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+
+def _float_or_none(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+class RunningWindow:
+    """Nombre, somme, min et max des températures d'une fenêtre glissante [now - seconds, ...]"""
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.start = 0  # Index de la première mesure de la fenêtre
+        self.total = 0.0
+        self.count = 0
+        # (horodatage, valeur) à valeurs croissantes / décroissantes : min / max en tête
+        self.mins: deque = deque()
+        self.maxs: deque = deque()
+        self.stale = False  # Mesure insérée dans le désordre : recalcul à la prochaine lecture
+
+    def push(self, ts: float, value: float) -> None:
+        self.total += value
+        self.count += 1
+        while self.mins and self.mins[-1][1] >= value:
+            self.mins.pop()
+        self.mins.append((ts, value))
+        while self.maxs and self.maxs[-1][1] <= value:
+            self.maxs.pop()
+        self.maxs.append((ts, value))
+
+    def expire(self, series: "ZoneSeries", cutoff: float) -> None:
+        """Retire les mesures antérieures à cutoff"""
+        ts, temps = series.ts, series.temp
+        while self.start < len(ts) and ts[self.start] < cutoff:
+            self.total -= temps[self.start]
+            self.count -= 1
+            self.start += 1
+        while self.mins and self.mins[0][0] < cutoff:
+            self.mins.popleft()
+        while self.maxs and self.maxs[0][0] < cutoff:
+            self.maxs.popleft()
+
+    def rebuild(self, series: "ZoneSeries", cutoff: float) -> None:
+        """Recalcule la fenêtre depuis les tableaux (somme exacte)"""
+        self.start = bisect_left(series.ts, cutoff)
+        self.total, self.count = 0.0, 0
+        self.mins.clear()
+        self.maxs.clear()
+        for index in range(self.start, len(series.ts)):
+            self.push(series.ts[index], series.temp[index])
+        self.total = math.fsum(series.temp[self.start:])
+        self.stale = False
+
+    def stats(self) -> Dict:
+        return {
+            "sample_count": self.count,
+            "temp_sum": self.total if self.count else 0.0,
+            "temp_min": self.mins[0][1] if self.count else None,
+            "temp_max": self.maxs[0][1] if self.count else None
+        }
+
+
+class ZoneSeries:
+    """Mesures (triées par horodatage) et prédictions horaires d'une zone"""
+
+    def __init__(self, window_seconds: Tuple[int, ...]):
+        self.ts = array("d")
+        self.temp = array("d")
+        self.heater = array("i")
+        self.fan = array("i")
+        self.windows = {seconds: RunningWindow(seconds) for seconds in window_seconds}
+        self.retention = max(window_seconds)
+
+        self.forecast_hours = array("d")  # Début de l'heure prédite, en secondes
+        self.forecast_floats = {field: array("d") for field in FORECAST_FLOAT_FIELDS}
+        self.forecast_ints = {field: array("i") for field in FORECAST_INT_FIELDS}
+
+    # ==================== MESURES ====================
+
+    def add_reading(self, ts: float, temp: float, heater: Optional[int], fan: Optional[int]) -> None:
+        if not self.ts or ts >= self.ts[-1]:
+            self.ts.append(ts)
+            self.temp.append(temp)
+            self.heater.append(_level(heater))
+            self.fan.append(_level(fan))
+            for window in self.windows.values():
+                window.push(ts, temp)
+            return
+
+        # Mesure en retard : insertion à sa place
+        index = bisect_right(self.ts, ts)
+        self.ts.insert(index, ts)
+        self.temp.insert(index, temp)
+        self.heater.insert(index, _level(heater))
+        self.fan.insert(index, _level(fan))
+        for window in self.windows.values():
+            if index < window.start:
+                window.start += 1  # Avant la fenêtre : rien à compter
+            else:
+                window.stale = True
+
+    def advance(self, now: float) -> None:
+        """Fait glisser les fenêtres jusqu'à now et compacte les tableaux"""
+        for window in self.windows.values():
+            cutoff = now - window.seconds
+            if window.stale:
+                window.rebuild(self, cutoff)
+            else:
+                window.expire(self, cutoff)
+
+        # Mesures sorties de la plus grande fenêtre
+        dropped = self.windows[self.retention].start
+        if dropped >= max(COMPACT_MIN, len(self.ts) // 2):
+            for values in (self.ts, self.temp, self.heater, self.fan):
+                del values[:dropped]
+            for window in self.windows.values():
+                window.start -= dropped
+                window.total = math.fsum(self.temp[window.start:])  # Pas de dérive des sommes
+
+        first_hour = bisect_left(self.forecast_hours, now - self.retention)
+        if first_hour:
+            del self.forecast_hours[:first_hour]
+            for values in (*self.forecast_floats.values(), *self.forecast_ints.values()):
+                del values[:first_hour]
+
+    def readings(self, start: float, end: float) -> List[ReadingPoint]:
+        first, last = bisect_left(self.ts, start), bisect_right(self.ts, end)
+        return [
+            ReadingPoint(
+                _moment(self.ts[index]),
+                self.temp[index],
+                _level_or_none(self.heater[index]),
+                _level_or_none(self.fan[index])
+            )
+            for index in range(first, last)
+        ]
+
+    def stats(self, start: float, now: float) -> Dict:
+        """Statistiques de [start, now] : fenêtre tenue à jour si elle existe, sinon calcul sur la tranche"""
+        window = self.windows.get(round(now - start))
+        if window is not None:
+            return window.stats()
+        first, last = bisect_left(self.ts, start), bisect_right(self.ts, now)
+        temps = self.temp[first:last]
+        return {
+            "sample_count": len(temps),
+            "temp_sum": math.fsum(temps),
+            "temp_min": min(temps) if temps else None,
+            "temp_max": max(temps) if temps else None
+        }
+
+    # ==================== PRÉDICTIONS ====================
+
+    def upsert_forecast(self, row: Dict) -> None:
+        hour = _seconds(datetime(row["year"], row["month"], row["day"], row["hour"]))
+        index = bisect_left(self.forecast_hours, hour)
+        exists = index < len(self.forecast_hours) and self.forecast_hours[index] == hour
+        if not exists:
+            self.forecast_hours.insert(index, hour)
+        for field, values in self.forecast_floats.items():
+            if exists:
+                values[index] = _float(row.get(field))
+            else:
+                values.insert(index, _float(row.get(field)))
+        for field, values in self.forecast_ints.items():
+            if exists:
+                values[index] = _level(row.get(field))
+            else:
+                values.insert(index, _level(row.get(field)))
+
+    def forecasts(self, start: float, end: float, limit: Optional[int] = None) -> List[ForecastPoint]:
+        """Prédictions dont l'heure est dans [start, end["""
+        first, last = bisect_left(self.forecast_hours, start), bisect_left(self.forecast_hours, end)
+        if limit is not None:
+            last = min(last, first + limit)
+        points = []
+        for index in range(first, last):
+            hour = _moment(self.forecast_hours[index])
+            floats = {field: _float_or_none(values[index]) for field, values in self.forecast_floats.items()}
+            ints = {field: _level_or_none(values[index]) for field, values in self.forecast_ints.items()}
+            points.append(ForecastPoint(hour.year, hour.month, hour.day, hour.hour, **floats, **ints))
+        return points
+
+
+class SeriesCache:
+    """Séries récentes de toutes les zones"""
+
+    def __init__(self, hours: int, enabled: bool = True):
+        self.enabled = enabled
+        self.retention = hours * 3600
+        self.window_seconds = tuple(sorted({24 * 3600, self.retention}))
+        self._zones: Dict[str, ZoneSeries] = {}
+        self._warm = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_warm(self) -> bool:
+        return self.enabled and self._warm
+
+    def _series(self, zone_id: str) -> ZoneSeries:
+        series = self._zones.get(zone_id)
+        if series is None:
+            # Zone apparue après le chargement : aucune donnée antérieure
+            series = self._zones[zone_id] = ZoneSeries(self.window_seconds)
+        return series
+
+    # ==================== CHARGEMENT ====================
+
+    def warm(self, db: Session, now: Optional[datetime] = None) -> int:
+        """
+        Charge depuis la base les fenêtres de toutes les zones connues (appelé depuis le lifespan)
+        Retourne le nombre de mesures chargées
+        """
+        if not self.enabled:
+            return 0
+        now = now or datetime.now()
+        start = now - timedelta(seconds=self.retention)
+        p = TemperaturePrediction
+
+        zones: Dict[str, ZoneSeries] = {}
+        loaded = 0
+        for (zone_id,) in db.query(ZoneState.zone_id).all():
+            series = zones[zone_id] = ZoneSeries(self.window_seconds)
+            t = readings_source(db, start, zone_id=zone_id)
+            rows = db.query(t.timestamp, t.indoor_temp, t.heater_level, t.fan_level).filter(
+                t.zone_id == zone_id,
+                t.timestamp >= start
+            ).order_by(t.timestamp.asc()).all()
+            series.ts.extend(_seconds(row.timestamp) for row in rows)
+            series.temp.extend(row.indoor_temp for row in rows)
+            series.heater.extend(_level(row.heater_level) for row in rows)
+            series.fan.extend(_level(row.fan_level) for row in rows)
+            for window in series.windows.values():
+                window.rebuild(series, _seconds(now) - window.seconds)
+            loaded += len(rows)
+
+            forecasts = db.query(
+                *(getattr(p, field) for field in ("year", "month", "day", "hour", *FORECAST_FLOAT_FIELDS, *FORECAST_INT_FIELDS))
+            ).filter(
+                p.zone_id == zone_id,
+                p.forecast_at >= start
+            ).all()
+            for forecast in forecasts:
+                series.upsert_forecast(forecast._asdict())
+
+        with self._lock:
+            self._zones = zones
+            self._warm = True
+        print(f"📈 Cache des séries : {loaded} mesures sur {self.retention // 3600}h, {len(zones)} zone(s)")
+        return loaded
+
+    def clear(self) -> None:
+        """Vide le cache (les lectures repassent par la base)"""
+        with self._lock:
+            self._zones = {}
+            self._warm = False
+
+    # ==================== ÉCRITURES ====================
+
+    def stage_readings(self, db: Session, rows: List[Dict]) -> None:
+        """Mesures écrites dans la transaction de db : ajoutées au cache après le commit"""
+        if self.is_warm:
+            db.info.setdefault(_SESSION_PENDING_KEY, []).append(("readings", rows))
+
+    def stage_forecasts(self, db: Session, rows: List[Dict]) -> None:
+        """Prédictions écrites (toutes les colonnes) dans la transaction de db : reportées après le commit"""
+        if self.is_warm:
+            db.info.setdefault(_SESSION_PENDING_KEY, []).append(("forecasts", rows))
+
+    def apply(self, pending: List[Tuple[str, List[Dict]]]) -> None:
+        with self._lock:
+            if not self._warm:
+                return
+            for kind, rows in pending:
+                for row in rows:
+                    series = self._series(row.get("zone_id") or DEFAULT_ZONE)
+                    if kind == "readings":
+                        series.add_reading(
+                            _seconds(row["timestamp"]), row["indoor_temp"], row.get("heater_level"), row.get("fan_level")
+                        )
+                    else:
+                        series.upsert_forecast(row)
+
+    # ==================== LECTURE (None : cache non chargé, lire la base) ====================
+
+    def readings(self, zone_id: str, start: datetime, now: datetime) -> Optional[List[ReadingPoint]]:
+        """Mesures d'une zone entre start et now (None si la période dépasse la fenêtre gardée)"""
+        if not self.is_warm or now - start > timedelta(seconds=self.retention):
+            return None
+        with self._lock:
+            series = self._zones.get(zone_id)
+            if series is None:
+                return []
+            series.advance(_seconds(now))
+            return series.readings(_seconds(start), _seconds(now))
+
+    def stats(self, zone_id: str, start: datetime, now: datetime) -> Optional[Dict]:
+        """Nombre, somme, min et max des températures entre start et now (mêmes clés que get_range_stats)"""
+        if not self.is_warm or now - start > timedelta(seconds=self.retention):
+            return None
+        with self._lock:
+            series = self._zones.get(zone_id)
+            if series is None:
+                return {"sample_count": 0, "temp_sum": 0.0, "temp_min": None, "temp_max": None}
+            series.advance(_seconds(now))
+            return series.stats(_seconds(start), _seconds(now))
+
+    def forecasts(
+        self, zone_id: str, start: datetime, end: datetime, now: datetime, limit: Optional[int] = None
+    ) -> Optional[List[ForecastPoint]]:
+        """Prédictions d'une zone dont l'heure est dans [start, end[, dans l'ordre (None si start sort de la fenêtre gardée)"""
+        if not self.is_warm or now - start > timedelta(seconds=self.retention):
+            return None
+        with self._lock:
+            series = self._zones.get(zone_id)
+            if series is None:
+                return []
+            series.advance(_seconds(now))
+            return series.forecasts(_seconds(start), _seconds(end), limit)
+
+
+# Instance globale du cache
+series_cache = SeriesCache(hours=settings.SERIES_CACHE_HOURS, enabled=settings.SERIES_CACHE_ENABLED)
+
+
+# Les écritures ne sont visibles dans le cache qu'une fois validées
+@event.listens_for(Session, "after_commit")
+def _apply_session_pending(session: Session):
+    pending = session.info.pop(_SESSION_PENDING_KEY, None)
+    if not pending:
+        return
+    try:
+        series_cache.apply(pending)
+    except Exception as e:
+        # Le commit a réussi : ne pas faire échouer l'écriture, repasser par la base jusqu'au redémarrage
+        print(f"❌ Cache des séries désactivé, lectures depuis la base : {str(e)}")
+        series_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_session_pending(session: Session):
+    session.info.pop(_SESSION_PENDING_KEY, None)
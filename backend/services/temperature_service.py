@@ -2,11 +2,26 @@
 Service pour gérer les données de température
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc, or_
+from sqlalchemy import desc, insert
+from pydantic import ValidationError
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Any
+from config.settings import settings
+from database.upsert import upsert_rows
+from utils.query_counter import count_queries
+from utils.data_version import bump_data_version
+from utils.metrics import ingestion_rows_total
+from services.rollup_service import apply_rollups, day_start, get_range_stats, hour_start
+from services.archive_service import date_bounds, readings_source
+from services.alert_service import alert_engine, format_alert, get_active_alerts
+from services.accuracy_service import invalidate_accuracy
+from services.report_service import invalidate_reports
+from services.series_cache import series_cache
+from services.zone_state_service import (
+    get_zone_state, record_comfort, record_predictions, record_readings
+)
 from models.temperature import TemperaturePrediction, IndoorTemperatureData
-from models.mode import mode
+from models.zone import DEFAULT_ZONE
 from schemas.temperature_schemas import (
     TemperaturePredictionCreate,
     IndoorTemperatureDataCreate
@@ -15,44 +30,116 @@ from schemas.temperature_schemas import (
 
 # ==================== PRÉDICTIONS ====================
 
+PREDICTION_KEY_COLUMNS = ("zone_id", "year", "month", "day", "hour")
+
+
 def create_prediction(db: Session, data: TemperaturePredictionCreate) -> TemperaturePrediction:
-    """Crée une nouvelle prédiction de température"""
-    db_prediction = TemperaturePrediction(
-        year=data.year,
-        month=data.month,
-        day=data.day,
-        hour=data.hour,
-        predicted_temp=data.predicted_temp,
-        adjusted_temp=data.adjusted_temp,
-        outdoor_temp=data.outdoor_temp,
-        heater_level=data.heater_level,
-        fan_speed=data.fan_speed,
-        comfort_temp=data.comfort_temp
-    )
-    db.add(db_prediction)
+    """
+    Crée (ou remplace) la prédiction de température pour une heure donnée
+    Une seule prédiction est conservée par (zone_id, year, month, day, hour)
+    """
+    row = _prediction_row(data)
+    upsert_prediction_rows(db, [row])
+    prediction = db.query(TemperaturePrediction).filter(
+        TemperaturePrediction.zone_id == data.zone_id,
+        TemperaturePrediction.year == data.year,
+        TemperaturePrediction.month == data.month,
+        TemperaturePrediction.day == data.day,
+        TemperaturePrediction.hour == data.hour
+    ).first()
+    record_predictions(db, [{**row, "id": prediction.id}])
+    alert_engine.on_predictions(db, [row])
+    series_cache.stage_forecasts(db, [row])
+    _invalidate_written_days(db, [row])
     db.commit()
-    db.refresh(db_prediction)
-    return db_prediction
+    bump_data_version("prediction", zones=[data.zone_id])
+    return prediction
 
 
-def get_latest_prediction(db: Session) -> Optional[TemperaturePrediction]:
-    """Récupère la dernière prédiction"""
-    return db.query(TemperaturePrediction).order_by(desc(TemperaturePrediction.id)).first()
+def _prediction_row(data: TemperaturePredictionCreate, prediction_date: Optional[datetime] = None) -> Dict:
+    """Convertit une prédiction validée en ligne prête pour l'upsert"""
+    row = data.model_dump()
+    row["forecast_at"] = data.forecast_at
+    row["prediction_date"] = prediction_date or datetime.now()
+    return row
 
 
-def get_all_predictions(db: Session, limit: int = 100) -> List[TemperaturePrediction]:
-    """Récupère toutes les prédictions (limité)"""
-    return db.query(TemperaturePrediction).order_by(desc(TemperaturePrediction.id)).limit(limit).all()
+def upsert_prediction_rows(db: Session, rows: List[Dict]) -> int:
+    """
+    Upsert des prédictions par paquets, clé = (zone_id, year, month, day, hour)
+    Ne fait PAS de commit : l'appelant gère la transaction
+    """
+    chunk_size = settings.BATCH_CHUNK_SIZE
+    for start in range(0, len(rows), chunk_size):
+        upsert_rows(db, TemperaturePrediction, rows[start:start + chunk_size], PREDICTION_KEY_COLUMNS)
+    return len(rows)
+
+
+def upsert_predictions_bulk(db: Session, items: List[TemperaturePredictionCreate]) -> Dict:
+    """
+    Enregistre un horizon complet de prédictions en une seule transaction
+    Les doublons d'une même zone et heure dans le lot sont fusionnés (le dernier gagne)
+    """
+    now = datetime.now()
+    rows_by_hour = {}
+    for item in items:
+        key = tuple(getattr(item, col) for col in PREDICTION_KEY_COLUMNS)
+        rows_by_hour[key] = _prediction_row(item, now)
+    
+    keys = sorted(rows_by_hour.keys())
+    rows = [rows_by_hour[key] for key in keys]
+    hours = sorted(key[1:] for key in keys)
+    
+    try:
+        upsert_prediction_rows(db, rows)
+        record_predictions(db, rows)
+        alert_engine.on_predictions(db, rows)
+        series_cache.stage_forecasts(db, rows)
+        _invalidate_written_days(db, rows)
+        db.commit()
+        bump_data_version("prediction", zones=_row_zones(rows))
+    except Exception as e:
+        print(f"❌ ERREUR dans upsert_predictions_bulk: {str(e)}")
+        db.rollback()
+        return {
+            "success": False,
+            "received": len(items),
+            "upserted": 0
+        }
+    
+    return {
+        "success": True,
+        "received": len(items),
+        "upserted": len(rows),
+        "horizon_start": "{:04d}-{:02d}-{:02d} {:02d}:00".format(*hours[0]),
+        "horizon_end": "{:04d}-{:02d}-{:02d} {:02d}:00".format(*hours[-1])
+    }
+
+
+def get_latest_prediction(db: Session, zone_id: str = DEFAULT_ZONE) -> Optional[TemperaturePrediction]:
+    """Récupère la dernière prédiction écrite d'une zone (via l'état courant : accès par clé primaire)"""
+    state = get_zone_state(db, zone_id)
+    if state is None or state.prediction_id is None:
+        return None
+    return db.get(TemperaturePrediction, state.prediction_id)
+
+
+def get_all_predictions(db: Session, limit: int = 100, zone_id: str = DEFAULT_ZONE) -> List[TemperaturePrediction]:
+    """Récupère toutes les prédictions d'une zone (limité)"""
+    return db.query(TemperaturePrediction).filter(
+        TemperaturePrediction.zone_id == zone_id
+    ).order_by(desc(TemperaturePrediction.id)).limit(limit).all()
 
 
 def get_predictions_by_date(
     db: Session,
     year: Optional[int] = None,
     month: Optional[int] = None,
-    day: Optional[int] = None
+    day: Optional[int] = None,
+    zone_id: str = DEFAULT_ZONE
 ) -> List[TemperaturePrediction]:
-    """Récupère les prédictions filtrées par date"""
-    query = db.query(TemperaturePrediction)
+    """Récupère les prédictions d'une zone filtrées par date"""
+    query = db.query(TemperaturePrediction).filter(TemperaturePrediction.zone_id == zone_id)
     
     if year:
         query = query.filter(TemperaturePrediction.year == year)
@@ -64,98 +151,137 @@ def get_predictions_by_date(
     return query.order_by(desc(TemperaturePrediction.id)).all()
 
 
-def get_predictions_24h(db: Session) -> List[Dict]:
-    """Récupère les prédictions des 24 prochaines heures - VERSION CORRIGÉE"""
-    now = datetime.now()
-    
-    # Calculer la date et heure de fin (24h dans le futur)
-    end_datetime = now + timedelta(hours=24)
-    
-    # Pour MySQL, nous devons comparer manuellement les dates
-    # Nous allons chercher toutes les prédictions et filtrer après
-    
-    # Récupérer toutes les prédictions récentes (derniers 2 jours pour être sûr)
-    all_recent_predictions = db.query(TemperaturePrediction).filter(
-        or_(
-            # Aujourd'hui
-            and_(
-                TemperaturePrediction.year == now.year,
-                TemperaturePrediction.month == now.month,
-                TemperaturePrediction.day == now.day,
-                TemperaturePrediction.hour >= now.hour
-            ),
-            # Demain (si on dépasse minuit)
-            and_(
-                TemperaturePrediction.year == end_datetime.year,
-                TemperaturePrediction.month == end_datetime.month,
-                TemperaturePrediction.day == end_datetime.day,
-                TemperaturePrediction.hour < end_datetime.hour
-            )
-        )
-    ).order_by(
-        TemperaturePrediction.year,
-        TemperaturePrediction.month,
-        TemperaturePrediction.day,
-        TemperaturePrediction.hour
-    ).all()
-    
-    # Filtrer manuellement pour obtenir seulement les 24 prochaines heures
-    result = []
-    for pred in all_recent_predictions:
-        pred_datetime = datetime(pred.year, pred.month, pred.day, pred.hour)
-        
-        # Vérifier si la prédiction est dans les 24 prochaines heures
-        if now <= pred_datetime <= end_datetime:
-            result.append({
-                "timestamp": f"{pred.year}-{pred.month:02d}-{pred.day:02d} {pred.hour:02d}:00",
-                "predicted_temp": pred.predicted_temp,
-                "adjusted_temp": pred.adjusted_temp,
-                "outdoor_temp": pred.outdoor_temp,
-                "heater_level": pred.heater_level or 0,
-                "fan_speed": pred.fan_speed or 0,
-                "comfort_temp": pred.comfort_temp
-            })
-        
-        # Limiter à 24 entrées maximum
-        if len(result) >= 24:
-            break
+def get_forecast_window(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    zone_id: str = DEFAULT_ZONE,
+    limit: Optional[int] = None,
+    now: Optional[datetime] = None
+) -> List[TemperaturePrediction]:
+    """
+    Prédictions d'une zone dont l'heure prédite est dans [start, end[, dans l'ordre
+    Cache des séries s'il couvre la période, sinon un seul parcours de l'index (zone_id, forecast_at)
+    """
+    cached = series_cache.forecasts(zone_id, start, end, now or datetime.now(), limit)
+    if cached is not None:
+        return cached
     
+    query = db.query(TemperaturePrediction).filter(
+        TemperaturePrediction.zone_id == zone_id,
+        TemperaturePrediction.forecast_at >= start,
+        TemperaturePrediction.forecast_at < end
+    ).order_by(TemperaturePrediction.forecast_at)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def _predictions_window(db: Session, now: datetime, zone_id: str = DEFAULT_ZONE) -> List[TemperaturePrediction]:
+    """Prédictions d'une zone à partir de maintenant, avant l'heure pleine de +24h (24 au maximum)"""
+    return get_forecast_window(db, now, hour_start(now + timedelta(hours=24)), zone_id, limit=24, now=now)
+
+
+def _format_prediction_24h(pred: TemperaturePrediction) -> Dict:
+    """Formate une prédiction pour la série 24h"""
+    return {
+        "timestamp": f"{pred.year}-{pred.month:02d}-{pred.day:02d} {pred.hour:02d}:00",
+        "predicted_temp": pred.predicted_temp,
+        "adjusted_temp": pred.adjusted_temp,
+        "outdoor_temp": pred.outdoor_temp,
+        "heater_level": pred.heater_level or 0,
+        "fan_speed": pred.fan_speed or 0,
+        "comfort_temp": pred.comfort_temp
+    }
+
+
+def _format_next_hour_prediction(pred: TemperaturePrediction) -> Dict:
+    """Formate la prédiction de la prochaine heure"""
+    return {
+        "timestamp": f"{pred.year}-{pred.month:02d}-{pred.day:02d} {pred.hour:02d}:00",
+        "predicted_temp": pred.predicted_temp,
+        "adjusted_temp": pred.adjusted_temp,
+        "outdoor_temp": pred.outdoor_temp,
+        "heater_level": pred.heater_level,
+        "fan_speed": pred.fan_speed,
+        "comfort_temp": pred.comfort_temp
+    }
+
+
+def get_predictions_24h(db: Session, zone_id: str = DEFAULT_ZONE) -> List[Dict]:
+    """Récupère les prédictions des 24 prochaines heures - VERSION CORRIGÉE"""
     # NE PAS générer de données factices - retourner seulement ce qui existe
-    return result
+    return [_format_prediction_24h(pred) for pred in _predictions_window(db, datetime.now(), zone_id)]
 
 
-def get_next_hour_prediction(db: Session) -> Optional[Dict]:
+def get_next_hour_prediction(db: Session, zone_id: str = DEFAULT_ZONE) -> Optional[Dict]:
     """Récupère la prédiction pour la prochaine heure"""
-    now = datetime.now()
-    next_hour_time = now + timedelta(hours=1)
-    
-    # Chercher la prédiction exacte pour la prochaine heure
-    pred = db.query(TemperaturePrediction).filter(
-        TemperaturePrediction.year == next_hour_time.year,
-        TemperaturePrediction.month == next_hour_time.month,
-        TemperaturePrediction.day == next_hour_time.day,
-        TemperaturePrediction.hour == next_hour_time.hour
-    ).first()
-    
-    if pred:
-        return {
-            "timestamp": f"{pred.year}-{pred.month:02d}-{pred.day:02d} {pred.hour:02d}:00",
-            "predicted_temp": pred.predicted_temp,
-            "adjusted_temp": pred.adjusted_temp,
-            "outdoor_temp": pred.outdoor_temp,
-            "heater_level": pred.heater_level,
-            "fan_speed": pred.fan_speed,
-            "comfort_temp": pred.comfort_temp
-        }
-    
-    return None
+    next_hour = hour_start(datetime.now() + timedelta(hours=1))
+    predictions = get_forecast_window(db, next_hour, next_hour + timedelta(hours=1), zone_id, limit=1)
+    return _format_next_hour_prediction(predictions[0]) if predictions else None
+
+
+def get_forecast(
+    db: Session,
+    start: Optional[datetime] = None,
+    hours: int = 24,
+    zone_id: str = DEFAULT_ZONE
+) -> Dict:
+    """
+    Prédictions d'une zone sur un horizon quelconque : heures prédites dans [start, start + hours[
+    start : par défaut l'heure en cours (une date avec fuseau est ramenée à l'heure locale, comme les données)
+    """
+    if start is None:
+        start = hour_start(datetime.now())
+    elif start.tzinfo is not None:
+        start = start.astimezone().replace(tzinfo=None)
+    end = start + timedelta(hours=hours)
+    data = [_format_prediction_24h(pred) for pred in get_forecast_window(db, start, end, zone_id)]
+    return {
+        "success": True,
+        "zone_id": zone_id,
+        "from": start.strftime("%Y-%m-%d %H:%M"),
+        "to": end.strftime("%Y-%m-%d %H:%M"),
+        "data": data,
+        "count": len(data)
+    }
 
 
 # ==================== TEMPÉRATURE RÉELLE ====================
 
+def _record_written_readings(db: Session, rows: List[Dict]) -> None:
+    """
+    Met à jour, dans la transaction de l'écriture, ce qui dérive des mesures :
+    agrégats horaires / journaliers, alertes, état courant des zones,
+    cache des séries, rapports et précision des prévisions des jours écrits (après le commit)
+    (alertes avant l'état courant : elles ignorent les mesures plus anciennes que la dernière)
+    """
+    apply_rollups(db, rows)
+    alert_engine.on_readings(db, rows)
+    record_readings(db, rows)
+    series_cache.stage_readings(db, rows)
+    _invalidate_written_days(db, rows)
+
+
+def _row_zones(rows: List[Dict]) -> set:
+    """Zones des lignes écrites"""
+    return {row.get("zone_id") or DEFAULT_ZONE for row in rows}
+
+
+def _invalidate_written_days(db: Session, rows: List[Dict]) -> None:
+    """Rapports et précision des prévisions des jours des mesures (timestamp) ou prédictions (forecast_at) écrites"""
+    zone_days = {
+        (row.get("zone_id") or DEFAULT_ZONE, day_start(row.get("timestamp") or row["forecast_at"]))
+        for row in rows
+    }
+    invalidate_reports(db, zone_days)
+    invalidate_accuracy(db, zone_days)
+
+
 def create_temperature_data(db: Session, data: IndoorTemperatureDataCreate) -> IndoorTemperatureData:
     """Crée une nouvelle mesure de température"""
     db_data = IndoorTemperatureData(
+        zone_id=data.zone_id,
         timestamp=data.timestamp,
         year=data.year,
         month=data.month,
@@ -166,50 +292,143 @@ def create_temperature_data(db: Session, data: IndoorTemperatureDataCreate) -> I
         fan_level=data.fan_level
     )
     db.add(db_data)
+    db.flush()
+    _record_written_readings(db, [{**data.model_dump(), "id": db_data.id}])
     db.commit()
+    bump_data_version("temperature", zones=[data.zone_id])
+    ingestion_rows_total.inc(1, "single")
     db.refresh(db_data)
     return db_data
 
 
-def get_latest_temperature(db: Session) -> Optional[IndoorTemperatureData]:
-    """Récupère la dernière mesure de température"""
-    return db.query(IndoorTemperatureData).order_by(desc(IndoorTemperatureData.id)).first()
+def insert_temperature_rows(db: Session, rows: List[Dict], chunk_size: Optional[int] = None) -> int:
+    """
+    Insère des mesures avec un INSERT multi-lignes par paquet
+    et met à jour les agrégats horaires / journaliers, les alertes et l'état courant des zones
+    Ne fait PAS de commit : l'appelant gère la transaction
+    """
+    chunk_size = chunk_size or settings.BATCH_CHUNK_SIZE
+    for start in range(0, len(rows), chunk_size):
+        db.execute(insert(IndoorTemperatureData).values(rows[start:start + chunk_size]))
+    _record_written_readings(db, rows)
+    return len(rows)
 
 
-def get_all_temperature_data(db: Session, limit: int = 100) -> List[IndoorTemperatureData]:
-    """Récupère toutes les mesures de température (limité)"""
-    return db.query(IndoorTemperatureData).order_by(desc(IndoorTemperatureData.id)).limit(limit).all()
+def create_temperature_data_batch(db: Session, items: List[Dict[str, Any]]) -> Dict:
+    """
+    Crée un lot de mesures de température en une seule transaction
+    Retourne le statut de chaque élément (inserted / rejected / failed)
+    """
+    results = []
+    rows = []
+    row_indexes = []
+    
+    # Validation élément par élément : une mesure invalide n'invalide pas le lot
+    for index, item in enumerate(items):
+        try:
+            data = IndoorTemperatureDataCreate.model_validate(item)
+        except ValidationError as ve:
+            errors = "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+                for err in ve.errors()
+            )
+            results.append({"index": index, "status": "rejected", "error": errors})
+            continue
+        rows.append(data.model_dump())
+        row_indexes.append(index)
+    
+    inserted = 0
+    if rows:
+        try:
+            insert_temperature_rows(db, rows)
+            db.commit()
+            bump_data_version("temperature", zones=_row_zones(rows))
+            ingestion_rows_total.inc(len(rows), "batch")
+            inserted = len(rows)
+            results.extend({"index": index, "status": "inserted", "error": None} for index in row_indexes)
+        except Exception as e:
+            print(f"❌ ERREUR dans create_temperature_data_batch: {str(e)}")
+            db.rollback()
+            results.extend(
+                {"index": index, "status": "failed", "error": str(e)[:200]} for index in row_indexes
+            )
+    
+    results.sort(key=lambda r: r["index"])
+    rejected = len(items) - len(rows)
+    
+    return {
+        "success": inserted == len(items),
+        "received": len(items),
+        "inserted": inserted,
+        "rejected": rejected,
+        "results": results
+    }
+
+
+def get_latest_temperature(db: Session, zone_id: str = DEFAULT_ZONE) -> Optional[IndoorTemperatureData]:
+    """Récupère la dernière mesure de température d'une zone (via l'état courant : accès par clé primaire)"""
+    state = get_zone_state(db, zone_id)
+    if state is None or state.reading_id is None:
+        return None
+    return db.get(IndoorTemperatureData, state.reading_id)
+
+
+def get_all_temperature_data(db: Session, limit: int = 100, zone_id: str = DEFAULT_ZONE) -> List[IndoorTemperatureData]:
+    """Récupère toutes les mesures de température d'une zone (limité)"""
+    return db.query(IndoorTemperatureData).filter(
+        IndoorTemperatureData.zone_id == zone_id
+    ).order_by(desc(IndoorTemperatureData.id)).limit(limit).all()
 
 
 def get_temperature_by_date(
     db: Session,
     year: Optional[int] = None,
     month: Optional[int] = None,
-    day: Optional[int] = None
+    day: Optional[int] = None,
+    zone_id: str = DEFAULT_ZONE
 ) -> List[IndoorTemperatureData]:
-    """Récupère les mesures filtrées par date"""
-    query = db.query(IndoorTemperatureData)
+    """Récupère les mesures d'une zone filtrées par date (table chaude et archive si besoin)"""
+    t = readings_source(db, *date_bounds(year, month, day), zone_id=zone_id)
+    query = db.query(t).filter(t.zone_id == zone_id)
     
     if year:
-        query = query.filter(IndoorTemperatureData.year == year)
+        query = query.filter(t.year == year)
     if month:
-        query = query.filter(IndoorTemperatureData.month == month)
+        query = query.filter(t.month == month)
     if day:
-        query = query.filter(IndoorTemperatureData.day == day)
+        query = query.filter(t.day == day)
     
-    return query.order_by(desc(IndoorTemperatureData.id)).all()
+    return query.order_by(desc(t.id)).all()
 
 
-def get_temperature_24h(db: Session) -> List[Dict]:
-    """Récupère les données de température des dernières 24 heures"""
-    now = datetime.now()
-    yesterday = now - timedelta(hours=24)
-    
-    data = db.query(IndoorTemperatureData).filter(
-        IndoorTemperatureData.timestamp >= yesterday,
-        IndoorTemperatureData.timestamp <= now
-    ).order_by(IndoorTemperatureData.timestamp.asc()).all()
-    
+def _temperature_window(
+    db: Session,
+    start_time: datetime,
+    end_time: datetime,
+    zone_id: str = DEFAULT_ZONE
+) -> List:
+    """
+    Mesures d'une zone entre deux dates (colonnes utiles uniquement, servies par l'index couvrant)
+    end_time : maintenant (lecture dans le cache des séries si la période tient dans sa fenêtre)
+    """
+    cached = series_cache.readings(zone_id, start_time, end_time)
+    if cached is not None:
+        return cached
+    t = readings_source(db, start_time, zone_id=zone_id)
+    return db.query(
+        t.timestamp,
+        t.indoor_temp,
+        t.heater_level,
+        t.fan_level
+    ).filter(
+        t.zone_id == zone_id,
+        t.timestamp >= start_time,
+        t.timestamp <= end_time
+    ).order_by(t.timestamp.asc()).all()
+
+
+def _format_temperature_rows(rows: List) -> List[Dict]:
+    """Formate les mesures pour les graphiques"""
     return [
         {
             "timestamp": item.timestamp.strftime("%Y-%m-%d %H:%M"),
@@ -217,56 +436,90 @@ def get_temperature_24h(db: Session) -> List[Dict]:
             "heater_level": item.heater_level or 0,
             "fan_level": item.fan_level or 0
         }
-        for item in data
+        for item in rows
     ]
 
 
-def get_avg_temperature_24h(db: Session) -> Optional[float]:
+def get_temperature_24h(db: Session, zone_id: str = DEFAULT_ZONE) -> List[Dict]:
+    """Récupère les données de température des dernières 24 heures"""
+    now = datetime.now()
+    yesterday = now - timedelta(hours=24)
+    return _format_temperature_rows(_temperature_window(db, yesterday, now, zone_id))
+
+
+def get_avg_temperature_24h(db: Session, zone_id: str = DEFAULT_ZONE) -> Optional[float]:
     """Calcule la température moyenne sur les dernières 24 heures"""
     now = datetime.now()
     yesterday = now - timedelta(hours=24)
-    result = db.query(func.avg(IndoorTemperatureData.indoor_temp)).filter(
-        IndoorTemperatureData.timestamp >= yesterday,
-        IndoorTemperatureData.timestamp <= now
-    ).scalar()
-    return round(result, 2) if result else None
+    stats = series_cache.stats(zone_id, yesterday, now) or get_range_stats(db, yesterday, now, zone_id)
+    return round(stats["temp_sum"] / stats["sample_count"], 2) if stats["sample_count"] else None
+
+
+def get_outdoor_temperature(db: Session, zone_id: str = DEFAULT_ZONE) -> Optional[float]:
+    """Récupère la dernière température extérieure connue (état courant de la zone)"""
+    state = get_zone_state(db, zone_id)
+    return state.outdoor_temp if state else None
 
 
-def get_outdoor_temperature(db: Session) -> Optional[float]:
-    """Récupère la dernière température extérieure depuis les prédictions"""
-    latest_pred = get_latest_prediction(db)
-    return latest_pred.outdoor_temp if latest_pred else None
+def get_comfort_temperature(db: Session, zone_id: str = DEFAULT_ZONE) -> Optional[float]:
+    """Récupère la consigne de confort actuelle (état courant de la zone)"""
+    state = get_zone_state(db, zone_id)
+    return state.comfort_temp if state else None
 
 
-def get_current_mode_direct(db: Session) -> int:
+def get_current_mode_direct(db: Session, zone_id: str = DEFAULT_ZONE) -> int:
     """
-    Récupère le mode actuel directement depuis la table mode
+    Récupère le mode actuel d'une zone depuis l'état courant
     """
-    latest = db.query(mode).order_by(desc(mode.created_at)).first()
-    return latest.mode_value if latest else 1  # Correction ici: mode_value au lieu de mode
+    state = get_zone_state(db, zone_id)
+    if state is None or state.mode_value is None:
+        return 1  # Par défaut AUTO (1)
+    return state.mode_value
 
 
 # ==================== DASHBOARD ====================
 
-def get_dashboard_data(db: Session) -> Dict:
-    """Récupère toutes les données nécessaires pour le dashboard - VERSION CORRIGÉE"""
+def load_dashboard_snapshot(db: Session, now: Optional[datetime] = None, zone_id: str = DEFAULT_ZONE) -> Dict:
+    """
+    Charge en une passe toutes les données brutes du dashboard d'une zone
+    4 requêtes : état courant (dernière mesure, extérieur, confort, mode), alertes actives,
+    mesures 24h, prédictions 24h (ces deux dernières lues en mémoire quand le cache des séries est chargé)
+    La prédiction de la prochaine heure est dérivée de ces résultats
+    """
+    now = now or datetime.now()
+    return {
+        "now": now,
+        "state": get_zone_state(db, zone_id),
+        "alerts": get_active_alerts(db, zone_id),
+        "readings_24h": _temperature_window(db, now - timedelta(hours=24), now, zone_id),
+        "predictions_24h": _predictions_window(db, now, zone_id)
+    }
+
+
+def get_dashboard_data(db: Session, zone_id: str = DEFAULT_ZONE) -> Dict:
+    """Récupère toutes les données nécessaires pour le dashboard d'une zone - VERSION CORRIGÉE"""
     try:
-        latest_temp = get_latest_temperature(db)
+        with count_queries(db) as counter:
+            snapshot = load_dashboard_snapshot(db, zone_id=zone_id)
+        
+        now = snapshot["now"]
+        state = snapshot["state"]
+        # L'état courant porte les colonnes de la dernière mesure (timestamp, indoor_temp, niveaux)
+        latest_temp = state if state is not None and state.reading_id is not None else None
         
         # Vérifier si la base est vide
         current_temperature = latest_temp.indoor_temp if latest_temp else None
         
-        outdoor_temperature = get_outdoor_temperature(db)
+        outdoor_temperature = state.outdoor_temp if state else None
         
         # État des équipements avec vérification de null
-        heater_level = latest_temp.heater_level if latest_temp else 0
-        fan_level = latest_temp.fan_level if latest_temp else 0
+        heater_level = (latest_temp.heater_level or 0) if latest_temp else 0
+        fan_level = (latest_temp.fan_level or 0) if latest_temp else 0
         
         heater_status = "ON" if heater_level > 0 else "OFF"
         fan_status = "ON" if fan_level > 0 else "OFF"
         
-        latest_pred = get_latest_prediction(db)
-        comfort_temperature = latest_pred.comfort_temp if latest_pred else None
+        comfort_temperature = state.comfort_temp if state else None
         
         # Format complet de la date avec vérification
         last_update = "Aucune donnée disponible"
@@ -276,23 +529,37 @@ def get_dashboard_data(db: Session) -> Dict:
             except:
                 last_update = str(latest_temp.timestamp)
         
-        temperature_24h = get_temperature_24h(db)
+        temperature_24h = _format_temperature_rows(snapshot["readings_24h"])
         
         # IMPORTANT: Le nom DOIT être "prediction_24h" (singulier) pour correspondre au schéma
-        prediction_24h = get_predictions_24h(db)
+        prediction_24h = [_format_prediction_24h(pred) for pred in snapshot["predictions_24h"]]
         
-        # Prédiction pour la prochaine heure
-        next_hour_prediction = get_next_hour_prediction(db)
+        # Prédiction pour la prochaine heure (déjà présente dans la fenêtre 24h)
+        next_hour_time = now + timedelta(hours=1)
+        next_hour_key = (next_hour_time.year, next_hour_time.month, next_hour_time.day, next_hour_time.hour)
+        next_hour_prediction = next(
+            (
+                _format_next_hour_prediction(pred) for pred in snapshot["predictions_24h"]
+                if (pred.year, pred.month, pred.day, pred.hour) == next_hour_key
+            ),
+            None
+        )
         
-        # ✅ Utilise la fonction directe (corrigée)
-        current_mode = get_current_mode_direct(db)
+        current_mode = state.mode_value if state is not None and state.mode_value is not None else 1
         current_mode_name = "AUTO" if current_mode == 1 else "MANUEL"
         
-        # Vérifier s'il y a des alertes
-        alerts = check_system_alerts(db)
+        # Alertes actives, levées à l'écriture des mesures (journal AlertLog)
+        alerts = [format_alert(alert) for alert in snapshot["alerts"]]
+        if not latest_temp:
+            alerts.insert(0, {
+                "type": "CRITICAL",
+                "message": "⚠️ Aucune donnée de capteur disponible",
+                "timestamp": now.strftime("%Y-%m-%d %H:%M:%S")
+            })
         
         # Construction du résultat avec les noms EXACTS attendus par le schéma
         result = {
+            "zone_id": zone_id,
             "current_temperature": current_temperature,
             "outdoor_temperature": outdoor_temperature,
             "heater_status": heater_status,
@@ -304,7 +571,8 @@ def get_dashboard_data(db: Session) -> Dict:
             "last_update": last_update,
             "temperature_24h": temperature_24h,
             "prediction_24h": prediction_24h,  # ⚠️ IMPORTANT: SINGULIER "prediction_24h"
-            "alerts": alerts
+            "alerts": alerts,
+            "query_count": counter["count"]
         }
         
         # Optionnel: ajouter la prédiction prochaine heure si disponible
@@ -320,6 +588,7 @@ def get_dashboard_data(db: Session) -> Dict:
         
         # Retourner une structure minimale en cas d'erreur
         return {
+            "zone_id": zone_id,
             "current_temperature": None,
             "outdoor_temperature": None,
             "heater_status": "OFF",
@@ -341,9 +610,9 @@ def get_dashboard_data(db: Session) -> Dict:
         }
 
 
-def update_comfort_temperature(db: Session, comfort_temp: float) -> bool:
+def update_comfort_temperature(db: Session, comfort_temp: float, zone_id: str = DEFAULT_ZONE) -> bool:
     """
-    Met à jour la température de confort dans la table TemperaturePredictions
+    Met à jour la température de confort d'une zone dans la table TemperaturePredictions
     """
     try:
         # Validation de la température
@@ -354,6 +623,7 @@ def update_comfort_temperature(db: Session, comfort_temp: float) -> bool:
         
         # Vérifier s'il existe déjà une prédiction pour cette heure
         existing_pred = db.query(TemperaturePrediction).filter(
+            TemperaturePrediction.zone_id == zone_id,
             TemperaturePrediction.year == now.year,
             TemperaturePrediction.month == now.month,
             TemperaturePrediction.day == now.day,
@@ -363,20 +633,29 @@ def update_comfort_temperature(db: Session, comfort_temp: float) -> bool:
         if existing_pred:
             # Mettre à jour la prédiction existante
             existing_pred.comfort_temp = comfort_temp
+            prediction = existing_pred
         else:
             # Créer une nouvelle entrée
             new_prediction = TemperaturePrediction(
+                zone_id=zone_id,
                 year=now.year,
                 month=now.month,
                 day=now.day,
                 hour=now.hour,
+                forecast_at=hour_start(now),
                 predicted_temp=22.0,
                 comfort_temp=comfort_temp,
                 prediction_date=now
             )
             db.add(new_prediction)
+            prediction = new_prediction
         
+        record_comfort(db, comfort_temp, zone_id)
+        series_cache.stage_forecasts(db, [{
+            column.name: getattr(prediction, column.name) for column in TemperaturePrediction.__table__.columns
+        }])
         db.commit()
+        bump_data_version("prediction", zones=[zone_id])
         return True
         
     except ValueError as ve:
@@ -394,9 +673,10 @@ def update_manual_controls(
     heater_on: bool, 
     fan_on: bool, 
     heater_level: int, 
-    fan_level: int
+    fan_level: int,
+    zone_id: str = DEFAULT_ZONE
 ) -> bool:
-    """Met à jour les contrôles manuels dans la dernière mesure de température"""
+    """Met à jour les contrôles manuels d'une zone dans la dernière mesure de température"""
     try:
         # Validation des niveaux
         if heater_level < 0 or heater_level > 5:
@@ -408,6 +688,7 @@ def update_manual_controls(
         
         # Créer toujours une nouvelle entrée pour garder un historique
         new_temp = IndoorTemperatureData(
+            zone_id=zone_id,
             timestamp=now,
             year=now.year,
             month=now.month,
@@ -418,8 +699,19 @@ def update_manual_controls(
             fan_level=fan_level if fan_on else 0
         )
         db.add(new_temp)
+        db.flush()
+        row = {
+            "id": new_temp.id,
+            "zone_id": zone_id,
+            "timestamp": new_temp.timestamp,
+            "indoor_temp": new_temp.indoor_temp,
+            "heater_level": new_temp.heater_level,
+            "fan_level": new_temp.fan_level
+        }
+        _record_written_readings(db, [row])
         
         db.commit()
+        bump_data_version("temperature", zones=[zone_id])
         return True
         
     except ValueError as ve:
@@ -432,64 +724,6 @@ def update_manual_controls(
         return False
 
 
-# ==================== SYSTÈME D'ALERTES ====================
-
-def check_system_alerts(db: Session) -> List[Dict]:
-    """Vérifie les alertes système"""
-    alerts = []
-    
-    # 1. Vérifier capteur silencieux
-    latest_temp = get_latest_temperature(db)
-    if not latest_temp:
-        alerts.append({
-            "type": "CRITICAL",
-            "message": "⚠️ Aucune donnée de capteur disponible",
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
-        return alerts  # Retourner immédiatement si pas de données
-    
-    # Vérifier si la dernière mesure est récente (< 15 minutes)
-    time_diff = datetime.now() - latest_temp.timestamp
-    if time_diff > timedelta(minutes=15):
-        alerts.append({
-            "type": "WARNING",
-            "message": f"⚠️ Dernière mesure il y a {int(time_diff.total_seconds()/60)} minutes",
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
-    
-    # 2. Vérifier température anormale
-    temp = latest_temp.indoor_temp
-    if temp is not None:
-        if temp < 10.0:
-            alerts.append({
-                "type": "WARNING",
-                "message": f"⚠️ Température trop basse: {temp}°C",
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            })
-        elif temp > 30.0:
-            alerts.append({
-                "type": "WARNING",
-                "message": f"⚠️ Température trop élevée: {temp}°C",
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            })
-    
-    # 3. Vérifier équipements allumés trop longtemps
-    hour_ago = datetime.now() - timedelta(hours=1)
-    long_running = db.query(IndoorTemperatureData).filter(
-        IndoorTemperatureData.timestamp >= hour_ago,
-        IndoorTemperatureData.heater_level > 3
-    ).count()
-    
-    if long_running > 6:  # Plus de 30 minutes à niveau élevé
-        alerts.append({
-            "type": "INFO",
-            "message": "ℹ️ Chauffage fonctionne à haut niveau depuis plus de 30 minutes",
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
-    
-    return alerts
-
-
 # ==================== FONCTIONS UTILITAIRES ====================
 
 def format_timestamp_for_display(timestamp: datetime) -> str:
@@ -499,46 +733,29 @@ def format_timestamp_for_display(timestamp: datetime) -> str:
     return timestamp.strftime("%Y-%m-%d %H:%M:%S")
 
 
-def calculate_temperature_stats(db: Session, hours: int = 24) -> Dict:
-    """Calcule les statistiques de température sur une période donnée"""
+def calculate_temperature_stats(db: Session, hours: int = 24, zone_id: str = DEFAULT_ZONE) -> Dict:
+    """
+    Calcule les statistiques de température d'une zone sur une période donnée
+    Depuis le cache des séries si la période y tient, sinon les heures et jours entiers
+    sont lus depuis les rollups
+    """
     now = datetime.now()
     start_time = now - timedelta(hours=hours)
     
-    stats = db.query(
-        func.min(IndoorTemperatureData.indoor_temp).label('min_temp'),
-        func.max(IndoorTemperatureData.indoor_temp).label('max_temp'),
-        func.avg(IndoorTemperatureData.indoor_temp).label('avg_temp'),
-        func.count(IndoorTemperatureData.id).label('data_points')
-    ).filter(
-        IndoorTemperatureData.timestamp >= start_time,
-        IndoorTemperatureData.timestamp <= now
-    ).first()
+    stats = series_cache.stats(zone_id, start_time, now) or get_range_stats(db, start_time, now, zone_id)
+    count = stats["sample_count"]
     
     return {
-        "min_temperature": round(stats.min_temp, 2) if stats.min_temp else None,
-        "max_temperature": round(stats.max_temp, 2) if stats.max_temp else None,
-        "avg_temperature": round(stats.avg_temp, 2) if stats.avg_temp else None,
-        "data_points": stats.data_points or 0,
+        "min_temperature": round(stats["temp_min"], 2) if stats["temp_min"] is not None else None,
+        "max_temperature": round(stats["temp_max"], 2) if stats["temp_max"] is not None else None,
+        "avg_temperature": round(stats["temp_sum"] / count, 2) if count else None,
+        "data_points": count,
         "period_hours": hours
     }
 
 
-def get_recent_temperature_data(db: Session, hours: int = 48) -> List[Dict]:
+def get_recent_temperature_data(db: Session, hours: int = 48, zone_id: str = DEFAULT_ZONE) -> List[Dict]:
     """Récupère les données récentes pour les graphiques"""
     now = datetime.now()
     start_time = now - timedelta(hours=hours)
-    
-    data = db.query(IndoorTemperatureData).filter(
-        IndoorTemperatureData.timestamp >= start_time,
-        IndoorTemperatureData.timestamp <= now
-    ).order_by(IndoorTemperatureData.timestamp.asc()).all()
-    
-    return [
-        {
-            "timestamp": item.timestamp.strftime("%Y-%m-%d %H:%M"),
-            "temperature": item.indoor_temp,
-            "heater_level": item.heater_level or 0,
-            "fan_level": item.fan_level or 0
-        }
-        for item in data
-    ]
\ No newline at end of file
+    return _format_temperature_rows(_temperature_window(db, start_time, now, zone_id))
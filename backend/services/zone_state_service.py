@@ -0,0 +1,183 @@
+"""
+Service de l'état courant des zones (table ZoneCurrentState)
+- mis à jour dans la transaction de chaque écriture (mesures, prédictions, confort, mode)
+- lu par clé primaire pour toutes les valeurs "dernière mesure / prédiction / mode courant"
+- reconstruit depuis l'historique par la migration 0007
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+from database.upsert import upsert_rows
+from models.mode import mode
+from models.temperature import IndoorTemperatureData, TemperaturePrediction
+from models.zone import DEFAULT_ZONE, ZoneState
+
+READING_STATE_COLUMNS = ("reading_id", "indoor_temp", "heater_level", "fan_level", "timestamp")
+
+
+# ==================== LECTURE ====================
+
+def get_zone_state(db: Session, zone_id: str = DEFAULT_ZONE) -> Optional[ZoneState]:
+    """État courant d'une zone (None si rien n'a encore été écrit)"""
+    return db.get(ZoneState, zone_id)
+
+
+def get_zone_states(db: Session) -> List[ZoneState]:
+    """États de toutes les zones connues"""
+    return db.query(ZoneState).order_by(ZoneState.zone_id).all()
+
+
+# ==================== MISE À JOUR (sans commit) ====================
+
+def _newer_reading_merge(table, incoming, dialect: str) -> Dict:
+    """Ne remplace la dernière mesure que par une mesure au moins aussi récente"""
+    newer = or_(table.c.timestamp.is_(None), incoming["timestamp"] >= table.c.timestamp)
+    values = {col: case((newer, incoming[col]), else_=table.c[col]) for col in READING_STATE_COLUMNS}
+    values["updated_at"] = incoming["updated_at"]
+    return values
+
+
+def record_readings(db: Session, rows: List[Dict]) -> None:
+    """
+    Reporte la mesure la plus récente de chaque zone dans l'état courant
+    rows : mesures écrites (l'id est retrouvé par l'index (zone_id, timestamp) s'il est absent)
+    """
+    latest: Dict[str, Dict] = {}
+    for row in rows:
+        zone_id = row.get("zone_id") or DEFAULT_ZONE
+        if zone_id not in latest or row["timestamp"] >= latest[zone_id]["timestamp"]:
+            latest[zone_id] = row
+    if not latest:
+        return
+
+    now = datetime.now()
+    states = []
+    for zone_id, row in sorted(latest.items()):
+        reading_id = row.get("id")
+        if reading_id is None:
+            reading_id = db.query(func.max(IndoorTemperatureData.id)).filter(
+                IndoorTemperatureData.zone_id == zone_id,
+                IndoorTemperatureData.timestamp == row["timestamp"]
+            ).scalar()
+        states.append({
+            "zone_id": zone_id,
+            "reading_id": reading_id,
+            "indoor_temp": row["indoor_temp"],
+            "heater_level": row.get("heater_level"),
+            "fan_level": row.get("fan_level"),
+            "timestamp": row["timestamp"],
+            "updated_at": now
+        })
+    upsert_rows(db, ZoneState, states, ("zone_id",), merge=_newer_reading_merge)
+
+
+def _prediction_merge(table, incoming, dialect: str) -> Dict:
+    """Dernière prédiction écrite ; extérieur et confort conservés si la prédiction ne les fournit pas"""
+    return {
+        "prediction_id": incoming["prediction_id"],
+        "outdoor_temp": func.coalesce(incoming["outdoor_temp"], table.c.outdoor_temp),
+        "comfort_temp": func.coalesce(incoming["comfort_temp"], table.c.comfort_temp),
+        "updated_at": incoming["updated_at"]
+    }
+
+
+def record_predictions(db: Session, rows: List[Dict]) -> None:
+    """
+    Reporte la dernière prédiction écrite de chaque zone dans l'état courant
+    rows : prédictions écrites, dans l'ordre d'écriture (id retrouvé par la clé unique s'il est absent)
+    """
+    latest: Dict[str, Dict] = {}
+    for row in rows:
+        latest[row.get("zone_id") or DEFAULT_ZONE] = row
+    if not latest:
+        return
+
+    now = datetime.now()
+    states = []
+    for zone_id, row in sorted(latest.items()):
+        prediction_id = row.get("id")
+        if prediction_id is None:
+            prediction_id = db.query(TemperaturePrediction.id).filter(
+                TemperaturePrediction.zone_id == zone_id,
+                TemperaturePrediction.year == row["year"],
+                TemperaturePrediction.month == row["month"],
+                TemperaturePrediction.day == row["day"],
+                TemperaturePrediction.hour == row["hour"]
+            ).scalar()
+        states.append({
+            "zone_id": zone_id,
+            "prediction_id": prediction_id,
+            "outdoor_temp": row.get("outdoor_temp"),
+            "comfort_temp": row.get("comfort_temp"),
+            "updated_at": now
+        })
+    upsert_rows(db, ZoneState, states, ("zone_id",), merge=_prediction_merge)
+
+
+def record_comfort(db: Session, comfort_temp: float, zone_id: str = DEFAULT_ZONE) -> None:
+    """Nouvelle consigne de confort d'une zone"""
+    upsert_rows(
+        db, ZoneState,
+        [{"zone_id": zone_id, "comfort_temp": comfort_temp, "updated_at": datetime.now()}],
+        ("zone_id",)
+    )
+
+
+def record_mode(db: Session, mode_value: int, changed_at: datetime, zone_id: str = DEFAULT_ZONE) -> None:
+    """Nouveau mode courant d'une zone"""
+    upsert_rows(
+        db, ZoneState,
+        [{"zone_id": zone_id, "mode_value": mode_value, "mode_changed_at": changed_at, "updated_at": datetime.now()}],
+        ("zone_id",)
+    )
+
+
+# ==================== RECONSTRUCTION ====================
+
+def rebuild_zone_states(db: Session) -> int:
+    """
+    Recalcule l'état courant de toutes les zones depuis l'historique
+    (dernière mesure par timestamp, dernière prédiction par id, dernier mode)
+    Ne fait PAS de commit ; retourne le nombre de zones
+    """
+    states: Dict[str, Dict] = {}
+
+    def state(zone_id: str) -> Dict:
+        return states.setdefault(zone_id, {"zone_id": zone_id})
+
+    t = IndoorTemperatureData
+    for zone_id, last_timestamp in db.query(t.zone_id, func.max(t.timestamp)).group_by(t.zone_id).all():
+        reading = db.query(t).filter(
+            t.zone_id == zone_id,
+            t.timestamp == last_timestamp
+        ).order_by(t.id.desc()).first()
+        state(zone_id).update({
+            "reading_id": reading.id,
+            "indoor_temp": reading.indoor_temp,
+            "heater_level": reading.heater_level,
+            "fan_level": reading.fan_level,
+            "timestamp": reading.timestamp
+        })
+
+    p = TemperaturePrediction
+    for zone_id, prediction_id in db.query(p.zone_id, func.max(p.id)).group_by(p.zone_id).all():
+        prediction = db.get(p, prediction_id)
+        state(zone_id).update({"prediction_id": prediction.id, "outdoor_temp": prediction.outdoor_temp})
+    for zone_id, prediction_id in db.query(p.zone_id, func.max(p.id)).filter(
+        p.comfort_temp.isnot(None)
+    ).group_by(p.zone_id).all():
+        state(zone_id)["comfort_temp"] = db.get(p, prediction_id).comfort_temp
+
+    for (zone_id,) in db.query(mode.zone_id).distinct().all():
+        latest = db.query(mode).filter(mode.zone_id == zone_id).order_by(mode.created_at.desc()).first()
+        state(zone_id).update({"mode_value": latest.mode_value, "mode_changed_at": latest.created_at})
+
+    now = datetime.now()
+    columns = [col.name for col in ZoneState.__table__.columns]
+    rows = [{**{col: values.get(col) for col in columns}, "updated_at": now} for values in states.values()]
+
+    db.query(ZoneState).delete(synchronize_session=False)
+    if rows:
+        db.execute(ZoneState.__table__.insert(), rows)
+    return len(rows)
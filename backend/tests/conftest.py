@@ -0,0 +1,8 @@
+"""
+Tests unitaires des fonctions sans base de données (lancer `python -m pytest` depuis backend/)
+"""
+import os
+import sys
+
+# Mêmes imports que l'application (services.*, utils.*) : backend/ dans le chemin
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,57 @@
+"""
+Tests des règles de température du moteur d'alertes (services/alert_service.py)
+"""
+from datetime import datetime, timedelta
+from config.settings import settings
+from services.alert_service import RULE_HIGH_TEMP, RULE_LOW_TEMP, AlertEngine, ZoneAlerts
+
+START = datetime(2026, 1, 1)
+
+
+class Sensor:
+    """Envoie des mesures successives (une par minute) à une zone et garde les transitions"""
+
+    def __init__(self):
+        self.engine = AlertEngine(check_seconds=settings.ALERT_CHECK_SECONDS)
+        self.zone = ZoneAlerts({}, None)
+        self.minutes = 0
+
+    def read(self, temp, at=None):
+        if at is None:
+            self.minutes += 1
+            at = START + timedelta(minutes=self.minutes)
+        transitions = []
+        self.engine._evaluate_reading(
+            self.zone, {"timestamp": at, "indoor_temp": temp, "heater_level": 0}, transitions
+        )
+        return [(kind, rule) for kind, rule, *_ in transitions]
+
+
+def test_low_temperature_clears_only_past_the_hysteresis_band():
+    low, margin = settings.ALERT_LOW_TEMP, settings.ALERT_HYSTERESIS
+    sensor = Sensor()
+    assert sensor.read(low + 2) == []
+    assert sensor.read(low - 1) == [("raise", RULE_LOW_TEMP)]
+    assert sensor.read(low - 2) == []  # Pas de doublon tant que l'alerte est active
+    assert sensor.read(low) == []
+    assert sensor.read(low + margin / 2) == []
+    assert sensor.read(low + margin) == [("clear", RULE_LOW_TEMP)]
+    assert sensor.read(low - 1) == [("raise", RULE_LOW_TEMP)]
+
+
+def test_high_temperature_clears_only_past_the_hysteresis_band():
+    high, margin = settings.ALERT_HIGH_TEMP, settings.ALERT_HYSTERESIS
+    sensor = Sensor()
+    assert sensor.read(high) == []
+    assert sensor.read(high + 1) == [("raise", RULE_HIGH_TEMP)]
+    assert sensor.read(high) == []
+    assert sensor.read(high - margin / 2) == []
+    assert sensor.read(high - margin) == [("clear", RULE_HIGH_TEMP)]
+
+
+def test_late_reading_does_not_change_the_state():
+    low = settings.ALERT_LOW_TEMP
+    sensor = Sensor()
+    assert sensor.read(low - 1) == [("raise", RULE_LOW_TEMP)]
+    assert sensor.read(low + 5, at=START) == []
+    assert RULE_LOW_TEMP in sensor.zone.active
@@ -0,0 +1,38 @@
+"""
+Tests de la réduction LTTB (utils/downsampling.py)
+"""
+import math
+from utils.downsampling import lttb
+
+
+def _series(count):
+    return [(float(x), math.sin(x / 10)) for x in range(count)]
+
+
+def test_short_series_is_returned_unchanged():
+    data = _series(10)
+    assert lttb(data, 10) == data
+    assert lttb(data, 50) == data
+
+
+def test_threshold_below_three_returns_all_points():
+    data = _series(10)
+    assert lttb(data, 2) == data
+
+
+def test_keeps_threshold_points_with_both_endpoints():
+    data = _series(1000)
+    sampled = lttb(data, 100)
+    assert len(sampled) == 100
+    assert sampled[0] == data[0]
+    assert sampled[-1] == data[-1]
+    assert [x for x, _ in sampled] == sorted(x for x, _ in sampled)
+
+
+def test_keeps_isolated_peak_and_trough():
+    data = [(float(x), 20.0) for x in range(500)]
+    data[123] = (123.0, 35.0)
+    data[321] = (321.0, 5.0)
+    sampled = lttb(data, 20)
+    assert (123.0, 35.0) in sampled
+    assert (321.0, 5.0) in sampled
@@ -0,0 +1,96 @@
+"""
+Tests des fenêtres glissantes du cache des séries (services/series_cache.py)
+Les valeurs sont des multiples de 0,5 : sommes exactes en flottants, comparées avec ==
+"""
+import random
+from services.series_cache import COMPACT_MIN, ZoneSeries
+
+DAY = 24 * 3600
+WINDOWS = (DAY, 2 * DAY)
+
+
+def _expected(readings, cutoff):
+    values = [value for ts, value in readings if ts >= cutoff]
+    return {
+        "sample_count": len(values),
+        "temp_sum": sum(values),
+        "temp_min": min(values) if values else None,
+        "temp_max": max(values) if values else None
+    }
+
+
+def _check(series, readings, now):
+    series.advance(now)
+    for seconds, window in series.windows.items():
+        assert window.stats() == _expected(readings, now - seconds), seconds
+
+
+def _value(rng):
+    return rng.randint(0, 80) / 2
+
+
+def test_in_order_readings_slide_out_of_the_windows():
+    rng = random.Random(1)
+    series, readings = ZoneSeries(WINDOWS), []
+    for ts in range(0, 4 * DAY, 600):
+        value = _value(rng)
+        series.add_reading(ts, value, 1, 0)
+        readings.append((ts, value))
+        if ts % 7200 == 0:
+            _check(series, readings, ts)
+
+
+def test_late_readings_inside_and_before_the_window():
+    rng = random.Random(2)
+    series, readings = ZoneSeries(WINDOWS), []
+    for ts in range(0, 3 * DAY, 900):
+        value = _value(rng)
+        series.add_reading(ts, value, None, None)
+        readings.append((ts, value))
+    now = 3 * DAY
+    _check(series, readings, now)
+
+    # Dans la fenêtre 24h, dans la fenêtre 48h seulement, avant les deux fenêtres
+    for ts in (now - 3600 + 1, now - 30 * 3600 + 7, now - 60 * 3600 + 3):
+        value = _value(rng)
+        series.add_reading(ts, value, 2, 1)
+        readings.append((ts, value))
+        _check(series, readings, now)
+    assert list(series.ts) == sorted(series.ts)
+
+
+def test_extreme_late_reading_becomes_window_min_and_max():
+    series, readings = ZoneSeries(WINDOWS), []
+    for ts in range(0, DAY, 600):
+        series.add_reading(ts, 20.0, None, None)
+        readings.append((ts, 20.0))
+    for ts, value in ((DAY - 5000, -4.5), (DAY - 4000, 41.0)):
+        series.add_reading(ts, value, None, None)
+        readings.append((ts, value))
+    _check(series, readings, DAY)
+    stats = series.windows[DAY].stats()
+    assert (stats["temp_min"], stats["temp_max"]) == (-4.5, 41.0)
+
+
+def test_compaction_keeps_windows_exact():
+    rng = random.Random(3)
+    windows = (600, 1200)
+    series, readings = ZoneSeries(windows), []
+    ts = 0
+    for _ in range(10):
+        for _ in range(COMPACT_MIN):
+            ts += 1
+            value = _value(rng)
+            series.add_reading(ts, value, 0, 0)
+            readings.append((ts, value))
+        # Quelques mesures en retard, dans la fenêtre et avant
+        for late in (ts - rng.randint(1, 500), ts - rng.randint(900, 1100), ts - rng.randint(1300, 2000)):
+            value = _value(rng)
+            series.add_reading(late, value, 0, 0)
+            readings.append((late, value))
+        _check(series, readings, ts)
+
+    # Les mesures sorties de la plus grande fenêtre ont été retirées des tableaux
+    assert len(series.ts) < len(readings)
+    assert len(series.ts) <= 2 * (max(windows) + 3) + COMPACT_MIN
+    assert list(series.ts) == sorted(series.ts)
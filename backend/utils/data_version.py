@@ -0,0 +1,66 @@
+"""
+Version monotone des données, incrémentée à chaque écriture
+Sert à calculer les ETag des endpoints de lecture sans interroger la base
+
+Portées : "temperature" (mesures), "prediction" (prédictions / confort), "mode",
+"alert" (alertes levées hors écriture de mesures : capteurs silencieux)
+Les versions sont propres au processus : chaque écriture doit passer par les services de cette API
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+DATA_SCOPES = ("temperature", "prediction", "mode", "alert")
+
+# Identifiant de démarrage : deux processus ne produisent jamais le même ETag
+BOOT_ID = format(int(time.time() * 1000), "x")
+
+_lock = threading.Lock()
+_boot_time = datetime.utcnow().replace(microsecond=0)
+_versions: Dict[str, int] = {scope: 0 for scope in DATA_SCOPES}
+_last_modified: Dict[str, datetime] = {scope: _boot_time for scope in DATA_SCOPES}
+# Listener : (portées modifiées, zones écrites ou None si elles ne sont pas connues)
+VersionListener = Callable[[Tuple[str, ...], Optional[FrozenSet[str]]], None]
+_listeners: List[VersionListener] = []
+
+
+def add_version_listener(callback: VersionListener) -> None:
+    """Enregistre une fonction appelée après chaque écriture (avec les portées et zones modifiées)"""
+    _listeners.append(callback)
+
+
+def remove_version_listener(callback: VersionListener) -> None:
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def bump_data_version(*scopes: str, zones: Optional[Iterable[str]] = None) -> None:
+    """
+    Signale une écriture sur une ou plusieurs portées
+    zones : zones écrites, transmises aux listeners (None : toutes les zones peuvent avoir changé)
+    """
+    written_zones = frozenset(zones) if zones is not None else None
+    now = datetime.utcnow().replace(microsecond=0)
+    with _lock:
+        for scope in scopes:
+            _versions[scope] += 1
+            _last_modified[scope] = now
+    
+    for callback in list(_listeners):
+        try:
+            callback(scopes, written_zones)
+        except Exception as e:
+            print(f"❌ ERREUR dans un listener de version: {str(e)}")
+
+
+def get_data_version(*scopes: str) -> Tuple[str, datetime]:
+    """
+    Retourne (version, last_modified) combinés pour les portées demandées
+    last_modified est en UTC
+    """
+    scopes = scopes or DATA_SCOPES
+    with _lock:
+        version = ".".join(str(_versions[scope]) for scope in scopes)
+        last_modified = max(_last_modified[scope] for scope in scopes)
+    return version, last_modified
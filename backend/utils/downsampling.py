@@ -0,0 +1,49 @@
+"""
+Réduction du nombre de points d'une série pour les graphiques
+"""
+from typing import List, Sequence, Tuple
+
+Point = Tuple[float, float]
+
+
+def lttb(points: Sequence[Point], threshold: int) -> List[Point]:
+    """
+    Largest-Triangle-Three-Buckets : garde au plus `threshold` points
+    en conservant la forme visuelle de la série (pics et creux)
+    points : liste de (x, y) triée par x
+    """
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(points)
+    
+    sampled = [points[0]]
+    # Le premier et le dernier point sont toujours conservés
+    bucket_size = (count - 2) / (threshold - 2)
+    previous = 0
+    
+    for i in range(threshold - 2):
+        # Moyenne du seau suivant (troisième sommet du triangle)
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, count)
+        next_bucket = points[next_start:next_end]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+        
+        # Point du seau courant formant le plus grand triangle
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[previous]
+        best_area = -1.0
+        best_index = start
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best_index = j
+        
+        sampled.append(points[best_index])
+        previous = best_index
+    
+    sampled.append(points[-1])
+    return sampled
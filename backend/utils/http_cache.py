@@ -0,0 +1,73 @@
+"""
+Requêtes conditionnelles (ETag / If-None-Match, Last-Modified / If-Modified-Since)
+pour les endpoints de lecture
+"""
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import HTTPException, Request, Response, status
+from config.settings import settings
+from utils.data_version import BOOT_ID, get_data_version
+from utils.metrics import record_cache
+
+
+def _build_etag(version: str, bucket: Optional[int]) -> str:
+    suffix = f"-{bucket}" if bucket is not None else ""
+    return f'W/"{BOOT_ID}-{version}{suffix}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Comparaison faible : W/"x" et "x" sont équivalents
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def conditional_get(*scopes: str, time_bucket_seconds: Optional[int] = None):
+    """
+    Fabrique une dépendance FastAPI qui répond 304 sans exécuter l'endpoint
+    quand les données des portées `scopes` n'ont pas changé
+    time_bucket_seconds : pour les réponses qui dépendent aussi de l'heure courante
+    (fenêtre glissante 24h, alertes de fraîcheur), l'ETag change à chaque période
+    """
+    # async : pas d'accès à la base, exécutée directement dans la boucle (pas de thread)
+    async def dependency(request: Request, response: Response):
+        if not settings.HTTP_CACHE_ENABLED:
+            return
+        
+        version, last_modified = get_data_version(*scopes)
+        bucket = None
+        if time_bucket_seconds:
+            bucket = int(time.time()) // time_bucket_seconds
+            bucket_start = datetime.utcfromtimestamp(bucket * time_bucket_seconds)
+            last_modified = max(last_modified, bucket_start)
+        
+        etag = _build_etag(version, bucket)
+        headers = {
+            "ETag": etag,
+            "Last-Modified": format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True),
+            "Cache-Control": "no-cache"
+        }
+        
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        not_modified = False
+        
+        if if_none_match:
+            not_modified = _etag_matches(if_none_match, etag)
+        elif if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+                not_modified = last_modified.replace(tzinfo=timezone.utc) <= since
+            except (TypeError, ValueError):
+                not_modified = False
+        
+        record_cache("http_etag", not_modified)
+        if not_modified:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        response.headers.update(headers)
+    
+    return dependency
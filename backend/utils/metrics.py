@@ -0,0 +1,268 @@
+"""
+Métriques de l'application au format texte Prometheus (endpoint /metrics)
+- compteurs, jauges et histogrammes en mémoire, sans dépendance externe
+- middleware ASGI : nombre de requêtes, latence et taille des réponses par route
+- événements SQLAlchemy : nombre de requêtes SQL et temps passé en base par requête HTTP
+Coût par requête : quelques incréments sous verrou, pas d'allocation par observation
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+
+# Intervalles par défaut des histogrammes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Compteur croissant, par combinaison de labels"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """Jauge lue au moment de la collecte : callback -> {labels: valeur}"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        try:
+            values = self.callback() if self.callback else {}
+        except Exception as e:
+            print(f"❌ ERREUR lors de la collecte de {self.name}: {str(e)}")
+            values = {}
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in values.items()
+        ]
+
+
+class Histogram(_Metric):
+    """Histogramme à intervalles fixes (compteurs par intervalle, somme, nombre)"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}  # labels -> [compteurs..., somme, nombre]
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        lines = self.header()
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+# ==================== MÉTRIQUES DE L'APPLICATION ====================
+
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "Requêtes HTTP traitées", ("method", "route", "status")
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Latence des requêtes HTTP", ("method", "route")
+))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Taille du corps des réponses HTTP", ("route",), SIZE_BUCKETS
+))
+db_queries_per_request = registry.register(Histogram(
+    "http_request_db_queries", "Requêtes SQL exécutées par requête HTTP", ("route",), COUNT_BUCKETS
+))
+db_time_per_request = registry.register(Histogram(
+    "http_request_db_seconds", "Temps passé en base par requête HTTP", ("route",)
+))
+db_queries_total = registry.register(Counter(
+    "db_queries_total", "Requêtes SQL exécutées (toutes origines)"
+))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Durée des requêtes SQL"
+))
+ingestion_rows_total = registry.register(Counter(
+    "ingestion_rows_total", "Mesures écrites en base, par voie d'ingestion", ("source",)
+))
+cache_requests_total = registry.register(Counter(
+    "cache_requests_total", "Consultations des caches (hit / miss)", ("cache", "result")
+))
+
+
+def record_cache(cache: str, hit: bool):
+    """Enregistre une consultation de cache (ratio = hit / (hit + miss))"""
+    cache_requests_total.inc(1, cache, "hit" if hit else "miss")
+
+
+def register_gauge(name: str, documentation: str, labelnames: Iterable[str],
+                   callback: Callable[[], Dict[Tuple[str, ...], float]]) -> Gauge:
+    """Jauge calculée à chaque collecte (pool de connexions, file d'ingestion...)"""
+    return registry.register(Gauge(name, documentation, labelnames, callback))
+
+
+def render_metrics() -> str:
+    return registry.render()
+
+
+# ==================== TEMPS EN BASE PAR REQUÊTE ====================
+
+# Compteurs de la requête HTTP en cours : [nombre de requêtes SQL, secondes]
+# L'objet est partagé par les copies du contexte (threads, run_sync) : les ajouts remontent
+_request_db_stats: ContextVar[Optional[list]] = ContextVar("request_db_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    db_queries_total.inc(1)
+    db_query_duration.observe(elapsed)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+def instrument_engine(engine) -> None:
+    """Mesure chaque requête SQL d'un moteur (synchrone, ou async_engine.sync_engine)"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ==================== MIDDLEWARE HTTP ====================
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI : latence, statut, taille de réponse, requêtes SQL et temps en base
+    par route (gabarit de chemin, ex. /history/report, pour borner le nombre de séries)
+    """
+
+    def __init__(self, app, excluded_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.excluded_paths = set(excluded_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluded_paths:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        db_stats = [0, 0.0]
+        token = _request_db_stats.set(db_stats)
+        response = {"status": 500, "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_db_stats.reset(token)
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+
+            http_requests_total.inc(1, method, route_path, str(response["status"]))
+            http_request_duration.observe(elapsed, method, route_path)
+            http_response_size.observe(response["size"], route_path)
+            db_queries_per_request.observe(db_stats[0], route_path)
+            db_time_per_request.observe(db_stats[1], route_path)
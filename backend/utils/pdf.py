@@ -0,0 +1,69 @@
+"""
+Génération d'un PDF texte minimal (sans dépendance externe)
+Polices standard Helvetica / Courier, encodage WinAnsi (accents et ° pris en charge)
+"""
+from typing import List
+
+PAGE_WIDTH = 595  # A4 en points
+PAGE_HEIGHT = 842
+MARGIN = 50
+LINE_HEIGHT = 14
+FONT_SIZE = 10
+TITLE_SIZE = 16
+
+
+def _escape(text: str) -> bytes:
+    encoded = text.encode("cp1252", errors="replace")
+    return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def render_text_pdf(title: str, lines: List[str]) -> bytes:
+    """Construit un document PDF : titre en Helvetica gras, lignes en Courier (colonnes alignées)"""
+    lines_per_page = (PAGE_HEIGHT - 2 * MARGIN - 2 * LINE_HEIGHT) // LINE_HEIGHT
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    
+    objects: List[bytes] = []
+    # 1 : catalogue, 2 : arbre des pages, 3 : police Helvetica, 4 : police Courier
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(b"")  # rempli après la création des pages
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>")
+    
+    page_ids = []
+    for number, page_lines in enumerate(pages, start=1):
+        content = [b"BT"]
+        y = PAGE_HEIGHT - MARGIN
+        content.append(b"/F1 %d Tf %d %d Td (%s) Tj" % (TITLE_SIZE, MARGIN, y, _escape(title)))
+        content.append(b"/F2 %d Tf %d TL" % (FONT_SIZE, LINE_HEIGHT))
+        content.append(b"0 %d Td" % (-2 * LINE_HEIGHT))
+        for line in page_lines:
+            content.append(b"(%s) Tj T*" % _escape(line))
+        content.append(b"ET")
+        footer = f"Page {number}/{len(pages)}"
+        content.append(b"BT /F2 8 Tf %d %d Td (%s) Tj ET" % (MARGIN, MARGIN // 2, _escape(footer)))
+        stream = b"\n".join(content)
+        
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, content_id)
+        )
+        page_ids.append(len(objects))
+    
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for index, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (index, body)
+    
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(output)
@@ -0,0 +1,29 @@
+"""
+Comptage des requêtes SQL exécutées sur une session
+"""
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+@contextmanager
+def count_queries(db: Session):
+    """
+    Compte les requêtes exécutées sur la connexion de la session
+    La connexion est épinglée pour toute la durée du bloc (une seule connexion)
+    Utilisation :
+        with count_queries(db) as counter:
+            ...
+        counter["count"]
+    """
+    counter = {"count": 0}
+    connection = db.connection()
+    
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter["count"] += 1
+    
+    event.listen(connection, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(connection, "before_cursor_execute", _before_cursor_execute)
@@ -0,0 +1,215 @@
+"""
+Profileur SQL par requête HTTP (optionnel : SQL_PROFILER_ENABLED)
+- enregistre chaque requête SQL de la requête HTTP avec sa durée
+- signale les requêtes identiques répétées (même SQL, mêmes paramètres)
+  et les requêtes répétées avec des paramètres différents (motif N+1)
+- journalise les requêtes lentes avec leur plan EXPLAIN
+Résultat : en-têtes X-SQL-* de la réponse et endpoint /debug/sql
+"""
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from config.settings import settings
+
+
+class RequestProfile:
+    """Requêtes SQL exécutées pendant une requête HTTP"""
+
+    def __init__(self, profile_id: int, method: str, path: str):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.statements: List[Dict] = []
+        self.slow_parameters: Dict[int, object] = {}  # index -> paramètres bruts pour EXPLAIN
+        self.duration_ms = 0.0
+        self.status: Optional[int] = None
+
+    @property
+    def total_ms(self) -> float:
+        return sum(item["duration_ms"] for item in self.statements)
+
+    def analyze(self) -> Dict:
+        """Doublons (SQL + paramètres identiques) et répétitions (même SQL, motif N+1)"""
+        by_statement: Dict[str, List[Dict]] = {}
+        for item in self.statements:
+            by_statement.setdefault(item["statement"], []).append(item)
+
+        duplicates = []
+        repeated = []
+        for statement, items in by_statement.items():
+            by_params: Dict[str, int] = {}
+            for item in items:
+                by_params[item["parameters"]] = by_params.get(item["parameters"], 0) + 1
+            duplicate_count = sum(count - 1 for count in by_params.values() if count > 1)
+            if duplicate_count:
+                duplicates.append({"statement": statement, "extra_executions": duplicate_count})
+            if len(by_params) >= settings.SQL_REPEAT_THRESHOLD:
+                repeated.append({"statement": statement, "executions": len(items), "distinct_parameters": len(by_params)})
+
+        return {
+            "duplicates": duplicates,
+            "repeated": repeated,
+            "slow": [item for item in self.statements if item["slow"]]
+        }
+
+    def as_dict(self, with_statements: bool = True) -> Dict:
+        analysis = self.analyze()
+        result = {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "query_count": len(self.statements),
+            "sql_ms": round(self.total_ms, 3),
+            "duplicate_count": sum(item["extra_executions"] for item in analysis["duplicates"]),
+            "slow_count": len(analysis["slow"]),
+            **analysis
+        }
+        if with_statements:
+            result["statements"] = self.statements
+        return result
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("sql_profile", default=None)
+_profile_ids = itertools.count(1)
+_recent_profiles: deque = deque(maxlen=settings.SQL_PROFILER_HISTORY)
+_recent_lock = threading.Lock()
+# Moteur synchrone utilisé pour EXPLAIN (aussi pour les requêtes du moteur asynchrone :
+# même base, même style de paramètres)
+_explain_engine = None
+
+
+# ==================== ÉVÉNEMENTS SQLALCHEMY ====================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("profiler_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    starts = conn.info.get("profiler_query_start")
+    if profile is None or not starts:
+        return
+    duration_ms = (time.perf_counter() - starts.pop()) * 1000
+    slow = duration_ms >= settings.SQL_SLOW_QUERY_MS
+    profile.statements.append({
+        "statement": statement,
+        "parameters": repr(parameters)[:500],
+        "executemany": executemany,
+        "duration_ms": round(duration_ms, 3),
+        "slow": slow
+    })
+    if slow and not executemany:
+        profile.slow_parameters[len(profile.statements) - 1] = parameters
+
+
+def instrument_engine(engine, explain_engine=None) -> None:
+    """
+    Enregistre les requêtes d'un moteur (synchrone, ou async_engine.sync_engine)
+    explain_engine : moteur synchrone qui exécute les EXPLAIN des requêtes lentes
+    """
+    global _explain_engine
+    if explain_engine is not None:
+        _explain_engine = explain_engine
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ==================== EXPLAIN DES REQUÊTES LENTES ====================
+
+def _explain(explain_engine, statement: str, parameters) -> List[str]:
+    """Plan d'exécution d'une requête SELECT (EXPLAIN QUERY PLAN sous SQLite)"""
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return []
+    prefix = "EXPLAIN QUERY PLAN" if explain_engine.dialect.name == "sqlite" else "EXPLAIN"
+    try:
+        with explain_engine.connect() as conn:
+            rows = conn.exec_driver_sql(f"{prefix} {statement}", parameters).mappings().all()
+        return [str(dict(row)) for row in rows]
+    except Exception as e:
+        return [f"EXPLAIN impossible : {str(e)[:200]}"]
+
+
+def _log_slow_statements(profile: RequestProfile) -> None:
+    for index, parameters in profile.slow_parameters.items():
+        item = profile.statements[index]
+        if _explain_engine is not None:
+            item["plan"] = _explain(_explain_engine, item["statement"], parameters)
+        print(f"🐢 Requête SQL lente ({item['duration_ms']} ms) sur {profile.method} {profile.path} :")
+        print(f"   {item['statement']}")
+        for line in item.get("plan", []):
+            print(f"     {line}")
+
+
+# ==================== MIDDLEWARE ====================
+
+class SQLProfilerMiddleware:
+    """
+    Middleware ASGI : profil SQL de chaque requête HTTP
+    En-têtes : X-SQL-Profile-Id, X-SQL-Query-Count, X-SQL-Time-Ms, X-SQL-Duplicates, X-SQL-Slow
+    (ajoutés au début de la réponse : partiels pour les réponses en flux)
+    """
+
+    def __init__(self, app, excluded_prefixes=("/debug/sql", "/metrics")):
+        self.app = app
+        self.excluded_prefixes = tuple(excluded_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(next(_profile_ids), scope["method"], scope["path"])
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                summary = profile.as_dict(with_statements=False)
+                headers = list(message.get("headers", []))
+                headers.extend([
+                    (b"x-sql-profile-id", str(profile.id).encode()),
+                    (b"x-sql-query-count", str(summary["query_count"]).encode()),
+                    (b"x-sql-time-ms", str(summary["sql_ms"]).encode()),
+                    (b"x-sql-duplicates", str(summary["duplicate_count"]).encode()),
+                    (b"x-sql-slow", str(summary["slow_count"]).encode()),
+                ])
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            profile.duration_ms = (time.perf_counter() - started) * 1000
+            if profile.slow_parameters:
+                await asyncio.to_thread(_log_slow_statements, profile)
+            with _recent_lock:
+                _recent_profiles.append(profile)
+
+
+def get_recent_profiles(limit: int = 20) -> List[Dict]:
+    """Derniers profils, du plus récent au plus ancien (sans le détail des requêtes)"""
+    with _recent_lock:
+        profiles = list(_recent_profiles)[-limit:]
+    return [profile.as_dict(with_statements=False) for profile in reversed(profiles)]
+
+
+def get_profile(profile_id: int) -> Optional[Dict]:
+    """Profil complet (requêtes, durées, plans EXPLAIN) d'une requête HTTP"""
+    with _recent_lock:
+        for profile in _recent_profiles:
+            if profile.id == profile_id:
+                return profile.as_dict(with_statements=True)
+    return None
@@ -1,7 +1,29 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
+import { getAlerts } from '../services/api';
 
-// Composant NotificationPanel
+// Titres des règles du moteur d'alertes (backend : services/alert_service.py)
+const RULE_TITLES = {
+  stale: 'Capteur Température Silencieux',
+  low_temp: 'Température Trop Basse',
+  high_temp: 'Température Trop Élevée',
+  heater_sustained: 'Chauffage Actif Depuis Longtemps',
+  forecast_divergence: 'Écart avec la Prédiction',
+};
+
+// Durée écoulée depuis une date ISO ("Il y a 5 min")
+const formatElapsed = (isoDate) => {
+  const minutes = Math.max(0, Math.round((Date.now() - new Date(isoDate).getTime()) / 60000));
+  if (minutes < 60) return `Il y a ${minutes} min`;
+  const hours = Math.round(minutes / 60);
+  if (hours < 24) return `Il y a ${hours} heure${hours > 1 ? 's' : ''}`;
+  const days = Math.round(hours / 24);
+  return `Il y a ${days} jour${days > 1 ? 's' : ''}`;
+};
+
+// Composant NotificationPanel : journal des alertes servi par /alerts
 const NotificationPanel = ({ onClose }) => {
+  const [notifications, setNotifications] = useState([]);
+
   // Obtenir la date d'aujourd'hui
   const today = new Date();
   const formattedDate = today.toLocaleDateString('fr-FR', {
@@ -11,26 +33,20 @@ const NotificationPanel = ({ onClose }) => {
     day: 'numeric'
   });
 
-  const notifications = [
-    { 
-      id: 1, 
-      title: 'Capteur Température Déconnecté',
-      message: 'Aucune donnée reçue depuis 15 minutes. Vérifiez la connexion du capteur ou son alimentation.',
-      time: 'Il y a 5 min'
-    },
-    { 
-      id: 2, 
-      title: 'Variation de Température Rapide',
-      message: 'La température a chuté de 4.2°C en 1 heure. Vérifiez les fenêtres ou portes ouvertes.',
-      time: 'Il y a 1 heure'
-    },
-    { 
-      id: 3, 
-      title: 'Chauffage Actif Depuis Longtemps',
-      message: 'Le chauffage fonctionne depuis 7h à niveau 4. Consommation énergétique élevée.',
-      time: 'Il y a 2 heures'
-    }
-  ];
+  useEffect(() => {
+    let cancelled = false;
+    getAlerts(20).then((result) => {
+      if (cancelled || !result.success) return;
+      setNotifications(result.data.map((alert) => ({
+        id: alert.id,
+        title: RULE_TITLES[alert.rule] || alert.rule,
+        message: alert.message,
+        time: formatElapsed(alert.raised_at),
+        active: alert.cleared_at === null
+      })));
+    });
+    return () => { cancelled = true; };
+  }, []);
 
   return (
     <>
@@ -121,7 +137,8 @@ const NotificationPanel = ({ onClose }) => {
                   marginBottom: '8px',
                   borderRadius: '6px',
                   background: '#f9f9f9',
-                  borderLeft: '4px solid #d1adc7',
+                  borderLeft: `4px solid ${notif.active ? '#d1adc7' : '#ccc'}`,
+                  opacity: notif.active ? 1 : 0.7,
                   cursor: 'pointer'
                 }}
               >
@@ -138,7 +155,7 @@ const NotificationPanel = ({ onClose }) => {
                     fontSize: '11px',
                     color: '#888'
                   }}>
-                    {notif.time}
+                    {notif.active ? notif.time : `${notif.time} · résolue`}
                   </span>
                 </div>
                 
@@ -181,85 +198,4 @@ const NotificationPanel = ({ onClose }) => {
   );
 };
 
-// Composant Layout avec notifications
-const LayoutWithNotifications = ({ children }) => {
-  const [showNotifications, setShowNotifications] = useState(false);
-  const unreadCount = 3;
-
-  return (
-    <div className="app-root">
-      <header className="header">
-        <div className="logo">Tableau de Bord Climatique</div>
-        <nav className="nav">
-          <a href="/dashboard" className="nav-link active">Dashboard</a>
-          <a href="/history" className="nav-link">Historique</a>
-          <a href="/profile" className="nav-link">Profil</a>
-          
-          <button 
-            onClick={() => setShowNotifications(!showNotifications)}
-            style={{
-              background: 'none',
-              border: 'none',
-              cursor: 'pointer',
-              position: 'relative',
-              padding: '8px',
-              color: '#666'
-            }}
-          >
-            {/* Icône de notification */}
-            <div style={{ position: 'relative' }}>
-              <svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" strokeWidth="2">
-                <path d="M18 8A6 6 0 0 0 6 8c0 7-3 9-3 9h18s-3-2-3-9" />
-                <path d="M13.73 21a2 2 0 0 1-3.46 0" />
-              </svg>
-              
-              {unreadCount > 0 && (
-                <span style={{
-                  position: 'absolute',
-                  top: '-6px',
-                  right: '-6px',
-                  background: '#ff4444',
-                  color: 'white',
-                  borderRadius: '50%',
-                  width: '16px',
-                  height: '16px',
-                  fontSize: '10px',
-                  display: 'flex',
-                  alignItems: 'center',
-                  justifyContent: 'center',
-                  fontWeight: '600'
-                }}>
-                  {unreadCount}
-                </span>
-              )}
-            </div>
-          </button>
-          
-          <button className="logout-btn">Déconnexion</button>
-        </nav>
-      </header>
-      
-      {showNotifications && (
-        <NotificationPanel onClose={() => setShowNotifications(false)} />
-      )}
-      
-      <main className="container">
-        {children}
-      </main>
-    </div>
-  );
-};
-
-// Exemple d'utilisation
-const AppExample = () => {
-  return (
-    <LayoutWithNotifications>
-      <div style={{ padding: '20px' }}>
-        <h1>Exemple de Page</h1>
-        <p>Cliquez sur l'icône de notification en haut à droite pour voir les alertes.</p>
-      </div>
-    </LayoutWithNotifications>
-  );
-};
-
-export default AppExample;
\ No newline at end of file
+export default NotificationPanel;
@@ -12,7 +12,7 @@ import {
   Legend
 } from 'chart.js';
 import { Line } from 'react-chartjs-2';
-import { getDashboard, setMode as setModeAPI, setComfortTemp, setManualControl, login } from '../services/api';
+import { getDashboard, subscribeDashboard, setMode as setModeAPI, setComfortTemp, setManualControl, login } from '../services/api';
 
 ChartJS.register(
   CategoryScale,
@@ -43,52 +43,55 @@ const DashboardPage = () => {
   const [showGraphs, setShowGraphs] = useState(false);
   const [showPredictionsTable, setShowPredictionsTable] = useState(false);
 
+  // Appliquer les données du dashboard (requête ou flux temps réel)
+  const applyDashboard = (data) => {
+    // Températures
+    setCurrentTemp(data.current_temperature || null);
+    
+    // État des équipements
+    setHeaterOn(data.heater_status === 'ON');
+    setFanOn(data.fan_status === 'ON');
+    setHeaterLevel(data.heater_level || 0);
+    setFanLevel(data.fan_level || 0);
+    
+    // Mode et configuration
+    setMode(data.current_mode || 'AUTO');
+    setComfortTemp(data.comfort_temperature || null);
+    setTargetTemp(data.comfort_temperature || null);
+    
+    // Dernière mise à jour
+    if (data.last_update) {
+      const date = new Date(data.last_update);
+      setLastUpdate(
+        `${date.getHours().toString().padStart(2, '0')}:${date
+          .getMinutes()
+          .toString()
+          .padStart(2, '0')}`
+      );
+    }
+    
+    // Données des 24 dernières heures (températures réelles)
+    if (data.temperature_24h && data.temperature_24h.length > 0) {
+      setTemperature24h(data.temperature_24h);
+    }
+    
+    // Prédictions des 24 prochaines heures
+    if (data.prediction_24h) {
+      // Filtrer les prédictions invalides
+      const validPredictions = data.prediction_24h.filter(pred => 
+        pred && pred.predicted_temp !== null && pred.predicted_temp !== undefined
+      );
+      setPrediction24h(validPredictions);
+    }
+  };
+
   // Charger les données du dashboard
   const loadDashboard = async () => {
     setLoading(true);
     const result = await getDashboard();
     
     if (result.success && result.data) {
-      const data = result.data;
-      
-      // Températures
-      setCurrentTemp(data.current_temperature || null);
-      
-      // État des équipements
-      setHeaterOn(data.heater_status === 'ON');
-      setFanOn(data.fan_status === 'ON');
-      setHeaterLevel(data.heater_level || 0);
-      setFanLevel(data.fan_level || 0);
-      
-      // Mode et configuration
-      setMode(data.current_mode || 'AUTO');
-      setComfortTemp(data.comfort_temperature || null);
-      setTargetTemp(data.comfort_temperature || null);
-      
-      // Dernière mise à jour
-      if (data.last_update) {
-        const date = new Date(data.last_update);
-        setLastUpdate(
-          `${date.getHours().toString().padStart(2, '0')}:${date
-            .getMinutes()
-            .toString()
-            .padStart(2, '0')}`
-        );
-      }
-      
-      // Données des 24 dernières heures (températures réelles)
-      if (data.temperature_24h && data.temperature_24h.length > 0) {
-        setTemperature24h(data.temperature_24h);
-      }
-      
-      // Prédictions des 24 prochaines heures
-      if (data.prediction_24h) {
-        // Filtrer les prédictions invalides
-        const validPredictions = data.prediction_24h.filter(pred => 
-          pred && pred.predicted_temp !== null && pred.predicted_temp !== undefined
-        );
-        setPrediction24h(validPredictions);
-      }
+      applyDashboard(result.data);
     }
     
     setLoading(false);
@@ -106,9 +109,13 @@ const DashboardPage = () => {
     
     autoLogin();
     
-    // Rafraîchir toutes les 30 secondes
-    const interval = setInterval(loadDashboard, 30000);
-    return () => clearInterval(interval);
+    // Mises à jour poussées par le serveur ; sinon rafraîchir toutes les 30 secondes
+    const unsubscribe = subscribeDashboard(applyDashboard);
+    const interval = unsubscribe ? null : setInterval(loadDashboard, 30000);
+    return () => {
+      if (unsubscribe) unsubscribe();
+      if (interval) clearInterval(interval);
+    };
   }, []);
 
   // Filtrer les prédictions selon la plage horaire sélectionnée
@@ -12,8 +12,7 @@ import {
   Legend
 } from 'chart.js';
 import { Line } from 'react-chartjs-2';
-import jsPDF from 'jspdf';
-import { getHistory } from '../services/api';
+import { getHistory, getHistoryReport } from '../services/api';
 
 ChartJS.register(
   CategoryScale,
@@ -148,31 +147,26 @@ const HistoryPage = () => {
     URL.revokeObjectURL(url);
   };
 
-  const handleExportPDF = () => {
-    if (rows.length === 0) {
-      alert('Aucune donnée à exporter');
+  const handleExportPDF = async () => {
+    // Rapport du jour sélectionné, généré par le serveur
+    const date = new Date(selectedDate);
+    const result = await getHistoryReport(
+      date.getFullYear(),
+      date.getMonth() + 1,
+      date.getDate(),
+      'pdf'
+    );
+    if (!result.success) {
+      alert(result.error);
       return;
     }
     
-    const doc = new jsPDF();
-    doc.setFontSize(14);
-    doc.text('Historique - Système de Climat', 14, 16);
-    doc.setFontSize(10);
-    let y = 26;
-    rows.slice(0, 20).forEach((r) => {
-      const line = `${r.date} | Réel: ${r.real}°C | Prédit: ${r.predicted !== null ? `${r.predicted}°C` : 'N/A'} | Chauffage: ${
-        r.heater.on ? 'ON' : 'OFF'
-      }(${r.heater.level}) | Ventilateur: ${
-        r.fan.on ? 'ON' : 'OFF'
-      }(${r.fan.level}) | ${r.mode}`;
-      doc.text(line, 14, y);
-      y += 6;
-      if (y > 280) {
-        doc.addPage();
-        y = 20;
-      }
-    });
-    doc.save('historique_climat.pdf');
+    const url = URL.createObjectURL(result.data);
+    const link = document.createElement('a');
+    link.href = url;
+    link.setAttribute('download', `rapport_${selectedDate}.pdf`);
+    link.click();
+    URL.revokeObjectURL(url);
   };
 
   const labels = rows.length > 0 ? rows.map((r) => r.date.split(' ')[1]) : [];
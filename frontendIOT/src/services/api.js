@@ -103,6 +103,37 @@ export const getDashboard = async () => {
   }
 };
 
+/**
+ * S'abonner au flux temps réel du dashboard (Server-Sent Events)
+ * onData reçoit l'état complet, reconstruit à partir du snapshot et des deltas
+ * Retourne une fonction de désabonnement (null si EventSource n'est pas supporté)
+ */
+export const subscribeDashboard = (onData, onError) => {
+  if (typeof EventSource === 'undefined') {
+    return null;
+  }
+
+  // EventSource renvoie Last-Event-ID à la reconnexion : le serveur ne renvoie que les deltas manqués
+  const source = new EventSource(`${API_BASE_URL}/temperature/stream`);
+  let state = {};
+
+  source.addEventListener('snapshot', (event) => {
+    state = JSON.parse(event.data);
+    onData(state);
+  });
+
+  source.addEventListener('delta', (event) => {
+    state = { ...state, ...JSON.parse(event.data) };
+    onData(state);
+  });
+
+  source.onerror = (error) => {
+    if (onError) onError(error);
+  };
+
+  return () => source.close();
+};
+
 /**
  * Récupérer la dernière mesure de température
  */
@@ -339,6 +370,46 @@ export const getModeHistory = async (limit = 100) => {
   }
 };
 
+/**
+ * Récupérer le rapport d'une période (année, mois ou jour) calculé par le serveur
+ * format : 'json' (données) ou 'pdf' (fichier Blob)
+ */
+export const getHistoryReport = async (year, month = null, day = null, format = 'json') => {
+  try {
+    const params = { year, format };
+    if (month) params.month = month;
+    if (day) params.day = day;
+    
+    const response = await api.get('/history/report', {
+      params,
+      responseType: format === 'pdf' ? 'blob' : 'json',
+    });
+    return { success: true, data: response.data };
+  } catch (error) {
+    return {
+      success: false,
+      error: error.response?.data?.detail || 'Erreur lors de la récupération du rapport',
+    };
+  }
+};
+
+// ==================== ALERTES ====================
+
+/**
+ * Récupérer le journal des alertes (levées et closes), les plus récentes d'abord
+ */
+export const getAlerts = async (limit = 50, activeOnly = false) => {
+  try {
+    const response = await api.get(`/alerts?limit=${limit}&active_only=${activeOnly}`);
+    return { success: true, data: response.data };
+  } catch (error) {
+    return {
+      success: false,
+      error: error.response?.data?.detail || 'Erreur lors de la récupération des alertes',
+    };
+  }
+};
+
 // ==================== FONCTION D'AUTO-LOGIN ====================
 
 /**